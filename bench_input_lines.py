@@ -0,0 +1,77 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Benchmark process_input_line against process_input_lines.
+
+Usage: python bench_input_lines.py [NUMBER-OF-LINES]
+
+Both applications count the lines that contain "foo". The first one
+gets one line per call, the second one a batch of lines per call.
+
+'''
+
+
+import os
+import sys
+import tempfile
+import time
+
+import cliapp
+
+
+class PerLineApp(cliapp.Application):
+
+    def process_input_line(self, name, line):
+        if 'foo' in line:
+            self.matches += 1
+
+
+class BatchApp(cliapp.Application):
+
+    def process_input_lines(self, name, lines, first_lineno):
+        self.matches += sum(1 for line in lines if 'foo' in line)
+
+
+def measure(app_class, filename, nlines):
+    app = app_class()
+    app.matches = 0
+    started = time.time()
+    app.process_inputs([filename])
+    duration = time.time() - started
+    assert app.global_lineno == nlines
+    return nlines / duration
+
+
+def main():
+    nlines = int(sys.argv[1]) if len(sys.argv) > 1 else 2 * 10**6
+    fd, filename = tempfile.mkstemp()
+    with os.fdopen(fd, 'w') as f:
+        for i in range(nlines):
+            f.write('line %d %s\n' % (i, 'foo' if i % 10 == 0 else 'bar'))
+
+    try:
+        per_line = measure(PerLineApp, filename, nlines)
+        batched = measure(BatchApp, filename, nlines)
+    finally:
+        os.remove(filename)
+
+    print('process_input_line:  %12.0f lines/s' % per_line)
+    print('process_input_lines: %12.0f lines/s (%.1fx)' %
+          (batched, batched / per_line))
+
+
+main()
@@ -0,0 +1,92 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Benchmark writing a line of output per input line.
+
+Usage: python bench_output_lines.py [NUMBER-OF-LINES]
+
+The application writes each input line to its output, which is a
+pipe to a process that reads and discards it. The output is first
+``sys.stdout``, as it is by default, and then the output with
+``--output-buffer-size``, in text and in binary mode.
+
+'''
+
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import cliapp
+
+
+class CopyApp(cliapp.Application):
+
+    def process_input_line(self, name, line):
+        self.output.write(line)
+
+
+class BinaryCopyApp(CopyApp):
+
+    binary_input = True
+    binary_output = True
+
+
+def measure(app_class, filename, nlines, args=()):
+    reader = subprocess.Popen(['cat'], stdin=subprocess.PIPE,
+                              stdout=open(os.devnull, 'w'))
+    saved = os.dup(1)
+    os.dup2(reader.stdin.fileno(), 1)
+    try:
+        app = app_class()
+        started = time.time()
+        app.run(list(args) + [filename])
+        duration = time.time() - started
+    finally:
+        os.dup2(saved, 1)
+        os.close(saved)
+        reader.stdin.close()
+        reader.wait()
+    assert app.global_lineno == nlines
+    return nlines / duration
+
+
+def main():
+    nlines = int(sys.argv[1]) if len(sys.argv) > 1 else 2 * 10**6
+    fd, filename = tempfile.mkstemp()
+    with os.fdopen(fd, 'w') as f:
+        for i in range(nlines):
+            f.write('line %d %s\n' % (i, 'foo' if i % 10 == 0 else 'bar'))
+
+    # Without --output-buffer-size, the output is sys.stdout.
+    buffered = ['--output-buffer-size=1M']
+    try:
+        before = measure(CopyApp, filename, nlines)
+        after = measure(CopyApp, filename, nlines, buffered)
+        binary = measure(BinaryCopyApp, filename, nlines, buffered)
+    finally:
+        os.remove(filename)
+
+    print('sys.stdout:      %12.0f lines/s' % before)
+    print('buffered output: %12.0f lines/s (%.1fx)' % (after, after / before))
+    print('binary output:   %12.0f lines/s (%.1fx)' %
+          (binary, binary / before))
+
+
+main()
@@ -32,11 +32,14 @@ from .version import __version__, __version_info__
 
 from .util import MemoryProfileDumper
 from .fmt import TextFormat
-from .app import Application, AppException
+from .app import Application, AppException, worker_settings
+from .mapreduce import MapReduceApplication
+from .asyncapp import AsyncApplication
 from .settings import (Settings, log_group_name, config_group_name,
-                       perf_group_name, UnknownConfigVariable,
-                       MalformedYamlConfig)
-from .runcmd import runcmd, runcmd_unchecked, shell_quote, ssh_runcmd
+                       perf_group_name, input_group_name,
+                       UnknownConfigVariable, MalformedYamlConfig)
+from .runcmd import (runcmd, runcmd_unchecked, shell_quote, ssh_runcmd,
+                     running_child_pids)
 
 # The plugin system
 from .hook import Hook, FilterHook
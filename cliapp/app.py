@@ -16,11 +16,19 @@
 
 from __future__ import unicode_literals
 
+import codecs
+import concurrent.futures
 import errno
 import inspect
+import io
+import itertools
+import locale
 import logging
 import logging.handlers
+import multiprocessing
 import os
+import pickle
+import stat
 try:
     from StringIO import StringIO
 except ImportError:            # pragma: no cover
@@ -28,9 +36,27 @@ except ImportError:            # pragma: no cover
 import sys
 import traceback
 import platform
+import signal
 import textwrap
+import threading
+import zlib
 
 import cliapp
+import cliapp.checkpoint
+import cliapp.chunks
+import cliapp.compress
+import cliapp.decompress
+import cliapp.extsort
+import cliapp.fastcopy
+import cliapp.follow
+import cliapp.incremental
+import cliapp.output
+import cliapp.parallel
+import cliapp.prefilter
+import cliapp.progress
+import cliapp.readahead
+import cliapp.records
+import cliapp.walk
 
 
 class AppException(Exception):
@@ -44,7 +70,7 @@ class AppException(Exception):
     '''
 
     def __init__(self, msg):
-        Exception.__init__(self)
+        Exception.__init__(self, msg)
         self.msg = msg
 
     def __str__(self):
@@ -68,6 +94,70 @@ class LogHandler(logging.handlers.RotatingFileHandler):  # pragma: no cover
         return logging.handlers.RotatingFileHandler._open(self)
 
 
+def _with_next(iterable):
+    '''Yield each item of an iterable with the item after it, or None.'''
+    it = iter(iterable)
+    for item in it:
+        for next_item in it:
+            yield item, next_item
+            item = next_item
+        yield item, None
+
+
+def _decoded_lines(f, start, end, encoding):
+    offset = start
+    for line in f:
+        if offset >= end:
+            break
+        offset += len(line)
+        yield line if encoding is None else line.decode(encoding)
+
+
+def _decoded_blocks(blocks, encoding):
+    decoder = codecs.getincrementaldecoder(encoding)()
+    for block in blocks:
+        yield decoder.decode(block)
+    yield decoder.decode(b'', True)
+
+
+def _in_shard(name, index, count):
+    '''Does a file name belong to shard ``index`` of ``count``?'''
+    return zlib.crc32(os.fsencode(name)) % count == index - 1
+
+
+# The settings of the application, in executor worker processes.
+_worker_settings = None
+
+
+def _init_worker(pickled_settings):
+    global _worker_settings
+    _worker_settings = pickle.loads(pickled_settings)
+
+
+def worker_settings():
+    '''Return the settings of the application in a worker process.
+
+    In the worker processes of ``Application.executor('process')``,
+    this is a copy of the application's settings, as they were when
+    the executor was created. Elsewhere, it is None.
+
+    '''
+
+    return _worker_settings
+
+
+def _skip_bytes(f, count):
+    '''Skip the first ``count`` bytes of a binary file.'''
+    if f.seekable():
+        f.seek(count)
+        return
+    while count > 0:
+        data = f.read(min(count, 1024**2))
+        if not data:
+            break
+        count -= len(data)
+
+
 class Application(object):
 
     '''A framework for Unix-like command line programs.
@@ -90,6 +180,20 @@ class Application(object):
     default behavior of ``optparse``, empty lines separate
     paragraphs.
 
+    While the application runs, the ``output`` attribute is the file
+    to write output to: the ``output`` setting, or else
+    ``sys.stdout``. If the ``output-buffer-size`` setting is not zero,
+    or the output is compressed, writes are collected in a buffer of
+    that many bytes, which is written out after cleanup, and also when
+    the application ends with an error; the standard output is then
+    written to through its file descriptor, so the output no longer
+    keeps its order with ``print``. The output is compressed, in
+    parallel threads, if the ``output-compression`` setting says so,
+    or by default, if the name of the output file ends in ``.gz``,
+    ``.bz2``, ``.xz``, or ``.zst``. If the subclass sets the
+    ``binary_output`` attribute to true, ``output`` is opened in binary
+    mode, and bytes must be written to it.
+
     '''
 
     def __init__(self, progname=None, version='0.0.0', description=None,
@@ -97,11 +201,29 @@ class Application(object):
         self.fileno = 0
         self.global_lineno = 0
         self.lineno = 0
+        self.input_offset = 0
+        self._checkpointer = None
+        self._checkpoint_index = 0
+        self._resume_point = None
+        self._stat_index = None
+        self._progress = None
+        self._input_name = None
+        self._follower = None
+        self._executors = {}
+        self._partitioned_outputs = []
+        self._sorters = []
         self._description = description
         if not hasattr(self, 'arg_synopsis'):
             self.arg_synopsis = '[FILE]...'
         if not hasattr(self, 'cmd_synopsis'):
             self.cmd_synopsis = {}
+        if not hasattr(self, 'binary_input'):
+            self.binary_input = False
+        if not hasattr(self, 'prefilter'):
+            self.prefilter = None
+        if not hasattr(self, 'binary_output'):
+            self.binary_output = False
+        self._opened_output = None
 
         self.subcommands = {}
         self.subcommand_aliases = {}
@@ -185,13 +307,28 @@ class Application(object):
             self.setup_logging()
             self.log_config()
 
-            if self.settings['output']:
-                self.output = open(self.settings['output'], 'w')
-            else:
-                self.output = sys.stdout
+            self.output = cliapp.output.open_output(
+                self.settings['output'],
+                self.settings.builtin('output-buffer-size'),
+                binary=self.binary_output,
+                compression=self._output_compression())
+            self._opened_output = self.output
 
-            self.process_args(args)
-            self.cleanup()
+            if self.settings.builtin('log-status-on-signal'):
+                previous_handlers = self._install_status_handler()
+            else:
+                previous_handlers = {}
+            try:
+                self._call_process_args(args)
+                self.cleanup()
+                self._shutdown_executors(wait=True)
+                self._close_partitioned_outputs()
+            finally:
+                self._shutdown_executors(wait=False)
+                self._close_sorters()
+                for signum, handler in previous_handlers.items():
+                    signal.signal(signum, handler)
+            self._close_output()
             self.disable_plugins()
         except cliapp.UnknownConfigVariable as e:  # pragma: no cover
             stderr.write('ERROR: %s\n' % str(e))
@@ -216,6 +353,8 @@ class Application(object):
                 # happens when we're being piped to less, and the user quits
                 # less before we finish writing everything out. So we ignore
                 # the error in that case.
+                if self._opened_output is not None:
+                    cliapp.output.discard_output(self._opened_output)
                 sys.exit(1)
             log(traceback.format_exc())
             stderr.write('ERROR: %s\n' % str(e))
@@ -231,11 +370,182 @@ class Application(object):
             log(traceback.format_exc())
             stderr.write(traceback.format_exc())
             sys.exit(1)
+        finally:
+            self._close_partitioned_outputs(quietly=True)
+            self._close_output(quietly=True)
 
         logging.info(
             '%s version %s ends normally',
             self.settings.progname, self.settings.version)
 
+    def _call_process_args(self, args):
+        self.process_args(args)
+
+    def partitioned_output(self, template, threaded=False):
+        '''Return a writer of output into many files, chosen by a key.
+
+        Call ``write(key, data)`` on the writer to write data to the
+        file named ``template % key``. At most ``partition-max-open``
+        files (a setting) are kept open at once, each with a buffer of
+        ``partition-buffer-size`` bytes: files not written to for the
+        longest time are closed, and re-opened for appending when
+        needed again. Files are in binary mode if ``binary_output`` is
+        true. If ``threaded`` is true, the files are written to in a
+        background thread.
+
+        All files are closed when the application ends, after cleanup,
+        or when there is an error. See ``cliapp.output.PartitionedWriter``
+        for details.
+
+        Partitioned output can't be used with ``jobs`` (a setting)
+        larger than one: the worker processes would each empty and
+        write the same files.
+
+        '''
+
+        if self._jobs() > 1:
+            raise cliapp.AppException(
+                'partitioned output cannot be used with --jobs')
+        writer = cliapp.output.PartitionedWriter(
+            template,
+            max_open=self.settings.builtin('partition-max-open'),
+            buffer_size=self.settings.builtin('partition-buffer-size'),
+            binary=self.binary_output,
+            threaded=threaded)
+        self._partitioned_outputs.append(writer)
+        return writer
+
+    def external_sorter(self, key=None, reverse=False):
+        '''Return a sorter for more records than fit in memory.
+
+        This is for applications that collect records from their
+        input, and write them out sorted at the end. Call ``add`` on the
+        sorter for each record, and then ``write_to(self.output)``, in
+        cleanup for example, to write them out in order, or iterate
+        over the sorter. ``key`` and ``reverse`` are as for ``sorted``.
+
+        Records are kept in memory up to about ``memory-budget`` bytes
+        (a setting). After that, they are sorted and written to a
+        temporary file, and at the end, the files are merged. Temporary
+        files that are left when the application ends are removed. See
+        ``cliapp.extsort.ExternalSorter`` for details.
+
+        A sorter can't be used with ``jobs`` (a setting) larger than
+        one: records added in the worker processes would go to their
+        copies of the sorter, and be lost.
+
+        '''
+
+        if self._jobs() > 1:
+            raise cliapp.AppException(
+                'an external sorter cannot be used with --jobs')
+        sorter = cliapp.extsort.ExternalSorter(
+            self.settings.builtin('memory-budget'), key=key, reverse=reverse)
+        self._sorters.append(sorter)
+        return sorter
+
+    def _close_sorters(self):
+        sorters = self._sorters
+        self._sorters = []
+        for sorter in sorters:
+            sorter.close()
+
+    def _close_partitioned_outputs(self, quietly=False):
+        # Close all writers, even if some fail, and then raise the
+        # first error, unless it would hide another error.
+        writers = self._partitioned_outputs
+        self._partitioned_outputs = []
+        error = None
+        for writer in writers:
+            try:
+                writer.close()
+            except Exception as e:
+                logging.debug('Could not write partitioned output: %s', e)
+                error = error or e
+        if error is not None and not quietly:
+            raise error
+
+    def _output_compression(self):
+        compression = self.settings.builtin('output-compression')
+        if compression == 'auto':
+            compression = cliapp.compress.compression_for_filename(
+                self.settings['output'])
+        elif compression == 'none':
+            compression = None
+        if compression and compression not in cliapp.compress.compressors:
+            raise cliapp.AppException(
+                'Output compression %s is not supported: is the Python '
+                'module for it installed?' % compression)
+        return compression
+
+    def _close_output(self, quietly=False):
+        # Write out what is left in the output buffer. This is also
+        # done after an error, so that output written before it is not
+        # lost, but then errors from this must not hide the original
+        # one.
+        output = self._opened_output
+        self._opened_output = None
+        if output is None:
+            return
+        try:
+            if output is sys.stdout or output is getattr(
+                    sys.stdout, 'buffer', None):
+                output.flush()
+            else:
+                output.close()
+        except EnvironmentError as e:
+            if e.errno == errno.EPIPE:
+                cliapp.output.discard_output(output)
+            if not quietly:
+                raise
+            logging.debug('Could not write output: %s', e)
+
+    def executor(self, kind='thread'):
+        '''Return a pool of workers for running tasks concurrently.
+
+        ``kind`` is either ``thread``, for a
+        ``concurrent.futures.ThreadPoolExecutor``, or ``process``, for
+        a ``ProcessPoolExecutor``. Either has ``jobs`` (a setting)
+        workers, or one per CPU if that is zero. The pool is created
+        the first time it is asked for, and the same pool is returned
+        after that.
+
+        The pools are shut down when the application ends. After a
+        successful run, that happens after cleanup, and waits for all
+        tasks to finish. If there is an error, tasks that have not
+        started are cancelled, without waiting for the others.
+
+        Process workers are forked, and get a copy of the settings,
+        which they can get with ``cliapp.worker_settings()``, so they
+        don't need to read configuration files again.
+
+        '''
+
+        if kind not in ('thread', 'process'):
+            raise ValueError('unknown kind of executor: %r' % (kind,))
+        if kind not in self._executors:
+            workers = self.settings.builtin('jobs') or os.cpu_count() or 1
+            if kind == 'thread':
+                executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=workers)
+            else:
+                executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('fork'),
+                    initializer=_init_worker,
+                    initargs=(pickle.dumps(self.settings),))
+            self._executors[kind] = executor
+        return self._executors[kind]
+
+    def _shutdown_executors(self, wait):
+        executors = self._executors
+        self._executors = {}
+        for executor in executors.values():
+            if wait:
+                executor.shutdown(wait=True)
+            else:
+                executor.shutdown(wait=False, cancel_futures=True)
+
     def compute_setting_values(self, settings):
         '''Compute setting values after configs and options are parsed.
 
@@ -320,6 +630,8 @@ class Application(object):
             text = '%s\n\n%s' % (usage, description)
 
         text = self.settings.progname.join(text.split('%prog'))
+        if self.binary_output:
+            text = text.encode(locale.getpreferredencoding(False))
         self.output.write(text)
 
     def help(self, args):  # pragma: no cover
@@ -506,6 +818,47 @@ class Application(object):
         logging.debug('Config:\n%s', f.getvalue())
         logging.debug('Python version: %s', sys.version)
 
+    def _install_status_handler(self):
+        previous = {}
+        for name in ['SIGUSR1', 'SIGINFO']:
+            if hasattr(signal, name):
+                signum = getattr(signal, name)
+                previous[signum] = signal.signal(
+                    signum, lambda signum, frame: self.log_status())
+        return previous
+
+    def log_status(self):
+        '''Log the status of the program.
+
+        This is called when the process gets the SIGUSR1 signal (or
+        SIGINFO, on systems that have it), if the
+        ``log-status-on-signal`` setting is true. It logs the current
+        input file and counters, how long the program has run, its
+        memory use, the process ids of external commands started with
+        runcmd that are still running, and the stack of every thread.
+        Nothing is done to prepare for this while the program runs, so
+        it costs nothing until the signal arrives.
+
+        '''
+
+        logging.info(
+            'Status: input file %s, fileno %d, lineno %d, global_lineno %d',
+            self._input_name, self.fileno, self.lineno, self.global_lineno)
+        logging.info(
+            'Status: running for %.1f s, VmRSS %s KiB',
+            os.times()[-1] - self._started,
+            self.memory_profile_dumper._vmrss())
+        logging.info(
+            'Status: external commands running: %s',
+            ' '.join(str(pid) for pid in cliapp.running_child_pids()) or
+            'none')
+        thread_names = dict((t.ident, t.name) for t in threading.enumerate())
+        for ident, frame in sys._current_frames().items():
+            logging.info(
+                'Status: stack of thread %s:\n%s',
+                thread_names.get(ident, ident),
+                ''.join(traceback.format_stack(frame)))
+
     def app_directory(self):
         '''Return the directory where the application class is defined.
 
@@ -577,23 +930,26 @@ class Application(object):
         '''
 
         if self.subcommands:
-            if not args:
-                raise SystemExit('must give subcommand')
-
-            cmd = args[0]
-            if cmd not in self.subcommands:
-                for name in self.subcommand_aliases:
-                    if cmd in self.subcommand_aliases[name]:
-                        cmd = name
-                        break
-                else:
-                    raise SystemExit('unknown subcommand %s' % args[0])
-
-            method = self.subcommands[cmd]
+            method = self._find_subcommand(args)
             method(args[1:])
         else:
             self.process_inputs(args)
 
+    def _find_subcommand(self, args):
+        if not args:
+            raise SystemExit('must give subcommand')
+
+        cmd = args[0]
+        if cmd not in self.subcommands:
+            for name in self.subcommand_aliases:
+                if cmd in self.subcommand_aliases[name]:
+                    cmd = name
+                    break
+            else:
+                raise SystemExit('unknown subcommand %s' % args[0])
+
+        return self.subcommands[cmd]
+
     def process_inputs(self, args):
         '''Process all arguments as input filenames.
 
@@ -601,16 +957,419 @@ class Application(object):
         input filename. If no filenames were given, then
         process_input is called with ``-`` as the argument name.
         This implements the usual Unix command line practice of
-        reading from stdin if no inputs are named.
+        reading from stdin if no inputs are named. The names of the
+        files come from input_names.
 
         The attributes ``fileno``, ``global_lineno``, and ``lineno`` are set,
         and count files and lines. The global line number is the
         line number as if all input files were one.
 
+        If the ``jobs`` setting is larger than one, the files are
+        processed in that many worker processes instead, and files
+        larger than ``input-split-size`` are split into parts given to
+        process_input_range, unless the application class defines
+        process_input. Output a worker writes to ``self.output`` is
+        written to the real output in the order the files were given,
+        unless ``jobs-as-completed`` is set. In a worker,
+        ``global_lineno`` counts only the lines of its file, and other
+        changes to the application object are lost: use
+        collect_input_result and merge_input_result to carry results
+        back to the main process. See cliapp.parallel for details.
+
+        The ``checkpoint``, ``incremental``, ``follow``, and
+        ``progress`` settings change how the files are read, as
+        described in the settings and in the cliapp modules of the same
+        names; ``shard`` is described in input_names. Combinations that
+        can't work, such as ``checkpoint`` with ``jobs``, are refused
+        with AppException.
+
         '''
 
-        for arg in args or ['-']:
+        shard = self._shard()
+        if shard is not None and self._is_single_splittable_file(args):
+            names = None
+        else:
+            names = self.input_names(args)
+        if self.settings.builtin('progress'):
+            self._progress = cliapp.progress.ProgressReporter(
+                self, self._known_input_names(args))
+            self._progress.start()
+        try:
+            if names is None:
+                self._process_file_shard(args[0], *shard)
+            elif self.settings.builtin('incremental'):
+                self._stat_index = cliapp.incremental.StatIndex(
+                    self.settings.builtin('incremental'))
+                try:
+                    self._process_names(self._changed_inputs(names))
+                    self._stat_index.save()
+                finally:
+                    self._stat_index.close()
+                    self._stat_index = None
+            else:
+                self._process_names(names)
+        finally:
+            if self._progress is not None:
+                self._progress.stop()
+                self._progress = None
+
+    def _known_input_names(self, args):
+        # All input files are known in advance only if they are all
+        # on the command line, and all of them will be processed. The
+        # size of the standard input is not known.
+        if not args or '-' in args:
+            return None
+        for setting in ['files-from', 'input-recursive', 'shard',
+                        'incremental']:
+            if self.settings.builtin(setting):
+                return None
+        return args
+
+    def _shard(self):
+        value = self.settings.builtin('shard')
+        if not value:
+            return None
+        try:
+            index, count = [int(x) for x in value.split('/')]
+        except ValueError:
+            index = count = 0
+        if not 1 <= index <= count:
+            raise cliapp.AppException(
+                '--shard must be I/N, with I from 1 to N, not %s' % value)
+        return index, count
+
+    def _is_single_splittable_file(self, args):
+        # A class that defines process_input expects whole files, and
+        # so do the other modes checked here. They are handled, or
+        # refused, by _process_names.
+        if (len(args) != 1 or args[0] == '-' or
+                self.settings.builtin('files-from') or
+                self.settings.builtin('input-format') != 'lines' or
+                self._overrides('process_input') or
+                self.settings.builtin('follow') or
+                self.settings.builtin('checkpoint') or
+                self.settings.builtin('incremental') or
+                self._jobs() > 1):
+            return False
+        try:
+            st = os.stat(args[0])
+        except OSError:
+            return False
+        if not stat.S_ISREG(st.st_mode):
+            return False
+        with open(args[0], 'rb') as f:
+            header = f.read(cliapp.decompress.magic_size)
+        return cliapp.decompress.detect(header) is None
+
+    def _process_file_shard(self, name, index, count):
+        size = os.path.getsize(name)
+        ranges = cliapp.parallel.line_aligned_ranges(
+            name, size, max(1, -(-size // count)))
+        self.fileno += 1
+        self.lineno = 0
+        if index <= len(ranges):
+            start, end = ranges[index - 1]
+            lineno = None
+            if self.settings.builtin('input-split-lineno') == 'count':
+                lineno = 1 + cliapp.parallel.count_lines_in_range(
+                    name, 0, start)
+            self.process_input_range(name, start, end, lineno)
+        self._merge_input_result(name, self.collect_input_result(name))
+
+    def _changed_inputs(self, names):
+        for name in names:
+            results = None
+            if name != '-':
+                results = self._stat_index.cached_results(name)
+            if results is None:
+                yield name
+            else:
+                for result in results:
+                    self.merge_input_result(name, result)
+
+    def _finish_input(self, name):
+        if self._progress is not None:
+            self._progress.finish_file(name)
+
+    def _merge_input_result(self, name, result):
+        if self._stat_index is not None:
+            self._stat_index.add_result(name, result)
+        self.merge_input_result(name, result)
+
+    def _jobs(self):
+        return self.settings.builtin('jobs') or os.cpu_count() or 1
+
+    def _process_names(self, names):
+        jobs = self._jobs()
+        if jobs > 1 and self._partitioned_outputs:
+            raise cliapp.AppException(
+                'partitioned output cannot be used with --jobs')
+        if jobs > 1 and self._sorters:
+            raise cliapp.AppException(
+                'an external sorter cannot be used with --jobs')
+        if self.settings.builtin('follow'):
+            if (jobs > 1 or self.settings.builtin('checkpoint') or
+                    self.settings.builtin('input-format') != 'lines' or
+                    self._prefilter_regex()):
+                raise cliapp.AppException(
+                    '--follow cannot be used with --jobs, --checkpoint, '
+                    '--input-format, or a prefilter')
+            if self._overrides('process_input'):
+                raise cliapp.AppException(
+                    '--follow cannot be used when the application '
+                    'defines process_input')
+            self._follow_inputs(names)
+        elif self.settings.builtin('checkpoint') and self._prefilter_regex():
+            raise cliapp.AppException(
+                '--checkpoint cannot be used with a prefilter')
+        elif (self.settings.builtin('checkpoint') and
+                self.settings.builtin('input-recursive')):
+            raise cliapp.AppException(
+                '--checkpoint cannot be used with --input-recursive')
+        elif jobs > 1 and self.settings.builtin('checkpoint'):
+            raise cliapp.AppException(
+                '--checkpoint cannot be used with --jobs')
+        elif jobs > 1:
+            if (self.settings.builtin('input-format') == 'lines' and
+                    not self._overrides('process_input')):
+                split_size = self.settings.builtin('input-split-size')
+            else:
+                split_size = 0
+            cliapp.parallel.process_inputs(
+                self, names, jobs,
+                as_completed=self.settings.builtin('jobs-as-completed'),
+                split_size=split_size,
+                count_lines=(
+                    self.settings.builtin('input-split-lineno') == 'count'))
+        elif self.settings.builtin('checkpoint'):
+            self._process_inputs_checkpointed(names)
+        else:
+            self._process_inputs_serially(names)
+
+    def _process_inputs_serially(self, names):
+        readahead = self.settings.builtin('input-readahead')
+        for arg, next_arg in _with_next(names):
+            if readahead and next_arg not in (None, '-'):
+                cliapp.readahead.prefetch(next_arg)
             self.process_input(arg)
+            self._merge_input_result(arg, self.collect_input_result(arg))
+
+    def _follow_inputs(self, names):
+        names = list(names)
+        self._follower = cliapp.follow.Follower(self._process_followed)
+        try:
+            for name in names:
+                self.fileno += 1
+                self._follower.add(name, self.fileno)
+            self._follower.run()
+        finally:
+            self._follower = None
+        for name in names:
+            self._merge_input_result(name, self.collect_input_result(name))
+
+    def _process_followed(self, source, offset, data):
+        name = source.name
+        self.fileno = source.fileno
+        self._input_name = name
+        if self._overrides('process_input_chunk'):
+            self.input_offset = offset
+            self.process_input_chunk(name, data)
+        else:
+            self._process_followed_lines(source, data)
+        # The output of a followed file must not wait in the buffer
+        # until more input arrives. There is no output attribute if
+        # process_inputs is called without run.
+        if hasattr(self, 'output'):
+            self.output.flush()
+
+    def _process_followed_lines(self, source, data):
+        name = source.name
+        lines = list(io.BytesIO(data))
+        if not self.binary_input:
+            encoding = locale.getpreferredencoding(False)
+            lines = [line.decode(encoding) for line in lines]
+        self.lineno = source.lineno
+        if self._overrides('process_input_lines'):
+            self._process_input_batches(name, iter(lines))
+        else:
+            for line in lines:
+                self.global_lineno += 1
+                self.lineno += 1
+                self.process_input_line(name, line)
+        source.lineno = self.lineno
+
+    def stop_following(self):
+        '''Stop following input files.
+
+        With the ``follow`` setting, process_inputs returns only after
+        this has been called, for example from process_input_line or
+        a signal handler. Lines that have already been read are
+        processed first.
+
+        '''
+
+        if self._follower is not None:
+            self._follower.stop()
+
+    def _process_inputs_checkpointed(self, names):
+        self._checkpointer = cliapp.checkpoint.Checkpointer(
+            self.settings.builtin('checkpoint'),
+            self.settings.builtin('checkpoint-interval'))
+        checkpoint = None
+        if self.settings.builtin('resume'):
+            checkpoint = self._checkpointer.load()
+        if checkpoint is not None:
+            names = self._resume_from(checkpoint, names)
+        try:
+            for name, next_name in _with_next(names):
+                self.process_input(name)
+                self._merge_input_result(
+                    name, self.collect_input_result(name))
+                self._checkpoint_index += 1
+                if next_name is not None and self._checkpointer.due():
+                    self._save_checkpoint(next_name, 0, started=False)
+            self._checkpointer.remove()
+        finally:
+            self._checkpointer = None
+
+    def _resume_from(self, checkpoint, names):
+        names = iter(names)
+        index = checkpoint['index']
+        for _ in itertools.islice(names, index):
+            pass
+        self._checkpoint_index = index
+        self.fileno = checkpoint['fileno']
+        self.global_lineno = checkpoint['global_lineno']
+        self.restore_checkpoint_state(checkpoint['state'])
+        name = next(names, None)
+        if name != checkpoint['name']:
+            raise cliapp.AppException(
+                'Cannot resume: input file %d is %s, but the checkpoint '
+                'is for %s' % (index + 1, name, checkpoint['name']))
+        if checkpoint['offset']:
+            self._resume_point = (checkpoint['offset'], checkpoint['lineno'])
+        names = itertools.chain([name], names)
+        logging.info(
+            'Resuming from checkpoint in %s, at input file %d, byte %d',
+            self._checkpointer.filename, index + 1, checkpoint['offset'])
+        return names
+
+    def _save_checkpoint(self, name, offset, started=True):
+        # ``name`` is the file to resume in, which has been started
+        # already, unless it is the next one.
+        self._checkpointer.save({
+            'index': self._checkpoint_index,
+            'name': name,
+            'offset': offset,
+            'fileno': self.fileno - 1 if started else self.fileno,
+            'lineno': self.lineno,
+            'global_lineno': self.global_lineno,
+            'state': self.checkpoint_state(),
+        })
+
+    def checkpoint_state(self):
+        '''Return the application state to save in a checkpoint.
+
+        The return value must be serialisable as JSON. It is given to
+        restore_checkpoint_state when a later run resumes from the
+        checkpoint. A checkpoint may be saved in the middle of an input
+        file, right after process_input_line (or process_input_lines)
+        has returned, so the state should include anything that has
+        not been merged with merge_input_result yet. The default
+        returns None.
+
+        '''
+
+        return None
+
+    def restore_checkpoint_state(self, state):
+        '''Restore the application state saved in a checkpoint.
+
+        ``state`` is what checkpoint_state returned. This is called
+        before any input is processed. The default does nothing.
+
+        '''
+
+    def input_names(self, args):
+        '''Return an iterator over the names of input files to process.
+
+        The default is the argument list, followed by the names listed
+        in the file given with the ``files-from`` setting, if any. If
+        there are no names at all, the list is ``-``. The names in the
+        ``files-from`` file are read as they are needed, so there can
+        be any number of them. If the ``input-recursive`` setting is
+        true, directories are replaced with the files in them, as they
+        are found.
+
+        If the ``shard`` setting is I/N, only the names that belong to
+        shard I are included. A name belongs to a shard according to a
+        CRC-32 checksum of the name, so runs on different hosts agree,
+        as long as they are given the same names. This works for names
+        read from ``files-from`` too. If the only argument is a regular
+        file of lines, and the application class does not define
+        process_input, process_inputs splits the file into N parts at
+        line boundaries instead, and gives part I to
+        process_input_range. Line numbers are then exact, which costs
+        reading all of the file before part I to count its lines, or
+        byte offsets with ``input-split-lineno=offset``. The file is
+        not split with ``follow``, ``checkpoint``, ``incremental``, or
+        ``jobs`` larger than one, which need whole files.
+
+        '''
+
+        if self.settings.builtin('files-from'):
+            names = itertools.chain(args, self._names_from_file(
+                self.settings.builtin('files-from')))
+        else:
+            names = args or ['-']
+        if self.settings.builtin('input-recursive'):
+            names = cliapp.walk.expand(
+                names,
+                include=self.settings.builtin('input-include'),
+                exclude=self.settings.builtin('input-exclude'))
+        shard = self._shard()
+        if shard is not None:
+            names = (name for name in names if _in_shard(name, *shard))
+        return iter(names)
+
+    def _names_from_file(self, filename):
+        f = self.open_input(filename, 'rb')
+        try:
+            for name in cliapp.records.iter_names(
+                    f, self._input_buffer_size()):
+                yield name
+        finally:
+            if filename != '-':
+                f.close()
+
+    def collect_input_result(self, name):
+        '''Return the result of processing one input file.
+
+        This is called right after process_input (or
+        process_input_range) has finished with a file, in the process
+        that did the work. The return value is given to
+        merge_input_result in the main process, so with ``--jobs`` it
+        needs to be picklable. The default returns None.
+
+        An application that keeps totals, such as a count of matching
+        lines, should count in process_input_line, return the count
+        here and reset it to zero, and add it to the totals in
+        merge_input_result. That way it works the same with and
+        without parallel workers.
+
+        '''
+
+        return None
+
+    def merge_input_result(self, name, result):
+        '''Merge the result of processing one input file.
+
+        ``result`` is what collect_input_result returned for the file
+        named ``name``. This is always called in the main process, in
+        the same order as output is written, once for each part of a
+        file that was split. The default does nothing.
+
+        '''
 
     def open_input(self, name, mode='r'):
         '''Open an input file for reading.
@@ -622,31 +1381,441 @@ class Application(object):
         The optional mode argument speficies the mode in which the file
         gets opened. It should allow reading. Some files should perhaps
         be opened in binary mode ('rb') instead of the default text mode.
+        ``-`` means the standard input: ``sys.stdin``, or the binary
+        buffer under it for binary mode. If the ``input-buffer-size``
+        setting is not zero, the standard input is instead read
+        directly from its file descriptor, with a buffer of that many
+        bytes, so nothing should have been read from ``sys.stdin``
+        before. That is not done if the standard input has been
+        replaced by something without a file descriptor.
+
+        If the ``input-decompress`` setting is true, regular files
+        compressed with gzip, bzip2, or xz (and zstd, if the zstandard
+        module is installed) are recognised from their first bytes, and
+        decompressed in a background thread while the caller reads the
+        decompressed data.
+
+        Files are read with a buffer of ``input-buffer-size`` bytes (a
+        setting), or 1 MiB, if it is zero.
+
+        If the ``input-readahead`` setting is true, the kernel is told
+        the file will be read sequentially. If ``input-drop-cache`` is
+        true, the parts of the file that have been read are dropped
+        from the page cache.
 
         '''
 
         if name == '-':
-            return sys.stdin
+            return self._open_stdin(mode)
+        elif mode in ('r', 'rb') and (
+                self.settings.builtin('input-decompress') or
+                self.settings.builtin('input-readahead') or
+                self.settings.builtin('input-drop-cache')):
+            return self._open_input_file(name, mode)
+        else:
+            return open(name, mode, buffering=self._input_buffer_size())
+
+    def _open_stdin(self, mode):
+        binary = getattr(sys.stdin, 'buffer', sys.stdin)
+        if not self.settings.builtin('input-buffer-size'):
+            return binary if 'b' in mode else sys.stdin
+        try:
+            fd = binary.fileno()
+        except (AttributeError, ValueError, io.UnsupportedOperation):
+            return binary if 'b' in mode else sys.stdin
+        f = io.BufferedReader(
+            io.FileIO(fd, closefd=False), self._input_buffer_size())
+        if 'b' not in mode:
+            f = io.TextIOWrapper(
+                f, encoding=sys.stdin.encoding, errors=sys.stdin.errors,
+                newline='\n')
+        return f
+
+    def copy_input_to_output(self, name):
+        '''Copy an input file to the output as it is.
+
+        This is for programs that pass on whole files unchanged. The
+        file is opened with open_input in binary mode. Where possible,
+        the data is moved by the kernel, with ``os.splice`` or
+        ``os.sendfile``, without going through Python at all; see
+        ``cliapp.fastcopy``. Return the number of bytes copied.
+
+        '''
+
+        f = self._open_tracked(name, 'rb')
+        try:
+            if hasattr(self.output, 'buffer'):
+                self.output.flush()
+                count = cliapp.fastcopy.copy(f, self.output.buffer)
+            elif isinstance(self.output, io.TextIOBase):
+                count = self._copy_decoded(f, self.output)
+            else:
+                count = cliapp.fastcopy.copy(f, self.output)
+            self._finish_input(name)
+        finally:
+            if f is not getattr(sys.stdin, 'buffer', sys.stdin):
+                f.close()
+        return count
+
+    def _copy_decoded(self, f, output):
+        decoder = codecs.getincrementaldecoder(
+            locale.getpreferredencoding(False))()
+        count = 0
+        while True:
+            data = f.read(cliapp.fastcopy.block_size)
+            output.write(decoder.decode(data, not data))
+            if not data:
+                return count
+            count += len(data)
+
+    def _input_buffer_size(self):
+        return self.settings.builtin('input-buffer-size') or 1024**2
+
+    def _open_input_file(self, name, mode):
+        if self.settings.builtin('input-drop-cache'):
+            raw = cliapp.readahead.CacheDroppingFileIO(name)
         else:
-            return open(name, mode)
+            raw = io.FileIO(name)
+        is_regular = stat.S_ISREG(os.fstat(raw.fileno()).st_mode)
+        if is_regular and self.settings.builtin('input-readahead'):
+            cliapp.readahead.advise(raw.fileno(), 0, 0, 'SEQUENTIAL')
+        f = io.BufferedReader(raw, self._input_buffer_size())
+
+        if is_regular and self.settings.builtin('input-decompress'):
+            header = f.peek(cliapp.decompress.magic_size)
+            new_decompressor = cliapp.decompress.detect(header)
+            if new_decompressor is not None:
+                f = io.BufferedReader(cliapp.decompress.DecompressingReader(
+                    f, new_decompressor))
+
+        if mode == 'r':
+            f = io.TextIOWrapper(f)
+            f.mode = mode
+        return f
 
     def process_input(self, name, stdin=sys.stdin):
         '''Process a particular input file.
 
+        If the application class defines process_input_chunk, the file
+        is given to that in large chunks. Otherwise, if it defines
+        process_input_lines, the lines are given to that in batches.
+        Otherwise, each line is given to process_input_line.
+
+        If the ``input-format`` setting is something other than
+        ``lines``, the file is parsed into records of that format
+        instead, and each record is given to process_input_record. The
+        ``lineno`` and ``global_lineno`` attributes then count records.
+
+        If the application sets the ``binary_input`` attribute to true,
+        the file is opened in binary mode, and lines are bytes objects
+        instead of strings. This avoids the cost of decoding the input,
+        when it is not needed.
+
+        If the ``prefilter`` setting, or else the ``prefilter``
+        attribute, is set to a regular expression, only the lines it
+        matches are given to process_input_line. The file is searched
+        in large blocks, and the lines in between are only counted, so
+        ``lineno`` and ``global_lineno`` are still right. The attribute
+        may be a string, bytes, or a compiled expression, and is
+        searched with ``re.MULTILINE``, so ``^`` and ``$`` match at the
+        start and end of each line. A match must be within one line. A
+        prefilter can't be used if the application class defines
+        process_input_chunk or process_input_lines, or with an
+        ``input-format`` other than ``lines``.
+
         The ``stdin`` argument is meant for unit test only.
 
         '''
 
         self.fileno += 1
         self.lineno = 0
-        f = self.open_input(name)
-        for line in f:
-            self.global_lineno += 1
-            self.lineno += 1
+        self._input_name = name
+        input_format = self.settings.builtin('input-format')
+        regex = self._prefilter_regex()
+        f = None
+        try:
+            if self._overrides('process_input_chunk'):
+                f = self._open_tracked(name, 'rb')
+                self._process_input_chunks(name, f)
+            elif input_format != 'lines':
+                reader = self._record_reader(input_format)
+                f = self._open_tracked(name, 'rb' if reader.binary else 'r')
+                self._process_input_records(name, reader.batches(f))
+            elif self._checkpointer is not None:
+                f = self._open_tracked(name, 'rb')
+                self._process_input_checkpointed(name, f)
+            elif self._overrides('process_input_lines'):
+                f = self._open_input_lines(name)
+                self._process_input_batches(name, f)
+            elif regex is not None:
+                f = self._open_input_lines(name)
+                matching = cliapp.prefilter.MatchingLines(
+                    regex, self._read_blocks(f))
+                self.lineno = self._process_matching_lines(name, matching)
+            else:
+                f = self._open_input_lines(name)
+                for line in f:
+                    self.global_lineno += 1
+                    self.lineno += 1
+                    self.process_input_line(name, line)
+            self._finish_input(name)
+        finally:
+            if (f is not None and f is not stdin and
+                    f is not getattr(stdin, 'buffer', None)):
+                f.close()
+
+    def _open_tracked(self, name, *args):
+        f = self.open_input(name, *args)
+        if self._progress is not None:
+            self._progress.start_file(f)
+        return f
+
+    def _process_input_checkpointed(self, name, f):
+        offset = 0
+        if self._resume_point is not None:
+            offset, self.lineno = self._resume_point
+            self._resume_point = None
+            _skip_bytes(f, offset)
+        encoding = (None if self.binary_input
+                    else locale.getpreferredencoding(False))
+        batched = self._overrides('process_input_lines')
+        batch_size = self.settings.builtin('input-batch-size')
+        raw = list(itertools.islice(f, batch_size))
+        while raw:
+            if encoding is None:
+                lines = raw
+            else:
+                lines = [line.decode(encoding) for line in raw]
+            if batched:
+                self._process_input_batch(name, lines)
+            else:
+                for line in lines:
+                    self.global_lineno += 1
+                    self.lineno += 1
+                    self.process_input_line(name, line)
+            offset += sum(len(line) for line in raw)
+            if self._checkpointer.due():
+                self._save_checkpoint(name, offset)
+            raw = list(itertools.islice(f, batch_size))
+
+    def _prefilter_regex(self):
+        pattern = self.settings.builtin('prefilter') or self.prefilter
+        if not pattern:
+            return None
+        if (self._overrides('process_input_chunk') or
+                self._overrides('process_input_lines') or
+                self.settings.builtin('input-format') != 'lines'):
+            raise cliapp.AppException(
+                'A prefilter cannot be used with process_input_chunk, '
+                'process_input_lines, or --input-format')
+        return cliapp.prefilter.compile_pattern(
+            pattern, self.binary_input, locale.getpreferredencoding(False))
+
+    def _read_blocks(self, f, size=None):
+        # Read a file in blocks of the input buffer size, up to
+        # ``size`` bytes if it is given.
+        block_size = self._input_buffer_size()
+        while size is None or size > 0:
+            block = f.read(block_size if size is None
+                           else min(block_size, size))
+            if not block:
+                break
+            if size is not None:
+                size -= len(block)
+            yield block
+
+    def _process_matching_lines(self, name, matching, offsets=False):
+        # While a line is processed, matching.count is the number of
+        # lines before it.
+        global_lineno = self.global_lineno
+        for lineno, offset, line in matching:
+            self.lineno = offset if offsets else lineno
+            self.global_lineno = global_lineno + matching.count + 1
             self.process_input_line(name, line)
-        if f != stdin:
+        self.global_lineno = global_lineno + matching.count
+        return matching.count
+
+    def _open_input_lines(self, name):
+        if self.binary_input:
+            return self._open_tracked(name, 'rb')
+        return self._open_tracked(name)
+
+    def _overrides(self, method_name):
+        return (getattr(type(self), method_name) is not
+                getattr(Application, method_name))
+
+    def _record_reader(self, input_format):
+        if self.binary_input:
+            encoding = None
+        else:
+            encoding = locale.getpreferredencoding(False)
+        return cliapp.records.readers[input_format](
+            self.settings.builtin('input-batch-size'),
+            self._input_buffer_size(), encoding=encoding)
+
+    def _process_input_records(self, name, batches):
+        for batch in batches:
+            for record in batch:
+                self.lineno += 1
+                self.global_lineno += 1
+                self.process_input_record(name, record)
+
+    def _process_input_batches(self, name, lines):
+        batch_size = self.settings.builtin('input-batch-size')
+        count = 0
+        batch = list(itertools.islice(lines, batch_size))
+        while batch:
+            self._process_input_batch(name, batch)
+            count += len(batch)
+            batch = list(itertools.islice(lines, batch_size))
+        return count
+
+    def _process_input_batch(self, name, batch):
+        # The counters are set afterwards, rather than added to, since
+        # the default process_input_lines changes them.
+        lineno = self.lineno + len(batch)
+        global_lineno = self.global_lineno + len(batch)
+        self.process_input_lines(name, batch, self.lineno + 1)
+        self.lineno = lineno
+        self.global_lineno = global_lineno
+
+    def _process_input_chunks(self, name, f, start=0, end=None):
+        chunk_size = self.settings.builtin('input-chunk-size')
+        chunks = cliapp.chunks.iter_chunks(f, chunk_size, start, end)
+        for offset, chunk in chunks:
+            self.input_offset = offset
+            self.process_input_chunk(name, chunk)
+
+    def process_input_chunk(self, filename, buffer):
+        '''Process a chunk of an input file.
+
+        Applications that want to avoid the cost of handling each line
+        separately can define this method instead of
+        process_input_line. ``buffer`` is a bytes-like object of about
+        ``input-chunk-size`` bytes (a setting), and always ends at the
+        end of a line. It can be searched with ``re.finditer``, for
+        example, or converted with ``bytes()`` and split into lines.
+
+        Regular files are memory mapped, and ``buffer`` is then a
+        memoryview into the mapping. It is only valid during this call:
+        copy any parts that need to be kept. Pipes, such as the
+        standard input, are read in large blocks instead.
+
+        The ``input_offset`` attribute is set to the offset of the
+        chunk in the file. ``lineno`` and ``global_lineno`` are not
+        updated, since that would mean another pass over the data.
+
+        '''
+
+    def process_input_range(self, name, start, end, lineno=None):
+        '''Process the lines in a byte range of an input file.
+
+        The range starts at byte offset ``start``, which must be at the
+        beginning of a line, and ends at ``end``. The file is opened
+        with open_input in binary mode, and each line is decoded
+        (unless ``binary_input`` is true) and given to
+        process_input_line. If ``lineno`` is given, it is the line
+        number of the first line in the range. Otherwise, the
+        ``lineno`` attribute is set to the byte offset of each line,
+        for when counting lines would cost too much.
+
+        The ``fileno`` attribute is not changed. Return the number of
+        lines processed.
+
+        If the application class defines process_input_chunk, the range
+        is given to that in chunks instead, and no lines are counted. If
+        it defines process_input_lines, lines are given to that in
+        batches; ``lineno`` must then be given, since batches have line
+        numbers, not byte offsets.
+
+        Otherwise, a prefilter is used like in process_input.
+
+        '''
+
+        if (lineno is None and self._overrides('process_input_lines') and
+                not self._overrides('process_input_chunk')):
+            raise cliapp.AppException(
+                'process_input_lines cannot be used with '
+                '--input-split-lineno=offset')
+        regex = self._prefilter_regex()
+        self._input_name = name
+        f = self.open_input(name, 'rb')
+        try:
+            if self._overrides('process_input_chunk'):
+                self._process_input_chunks(name, f, start, end)
+                return 0
+
+            encoding = (None if self.binary_input
+                        else locale.getpreferredencoding(False))
+            f.seek(start)
+            if self._overrides('process_input_lines'):
+                self.lineno = lineno - 1
+                return self._process_input_batches(
+                    name, _decoded_lines(f, start, end, encoding))
+
+            if regex is not None:
+                blocks = self._read_blocks(f, end - start)
+                if encoding is not None:
+                    blocks = _decoded_blocks(blocks, encoding)
+                matching = cliapp.prefilter.MatchingLines(
+                    regex, blocks, first_lineno=lineno or 1,
+                    first_offset=start,
+                    encoding=encoding if lineno is None else None)
+                return self._process_matching_lines(
+                    name, matching, offsets=lineno is None)
+
+            offset = start
+            count = 0
+            for line in f:
+                if offset >= end:
+                    break
+                count += 1
+                self.global_lineno += 1
+                self.lineno = (offset if lineno is None
+                               else lineno + count - 1)
+                offset += len(line)
+                if encoding is not None:
+                    line = line.decode(encoding)
+                self.process_input_line(name, line)
+            return count
+        finally:
             f.close()
 
+    def process_input_lines(self, filename, lines, first_lineno):
+        '''Process a batch of lines of the input file.
+
+        Applications that handle many lines at once can redefine this
+        method instead of process_input_line, to avoid the cost of a
+        method call per line. ``lines`` is a list of up to
+        ``input-batch-size`` lines (a setting), and ``first_lineno`` is
+        the line number of the first one in the file. During the call,
+        ``lineno`` and ``global_lineno`` are still those of the line
+        before the batch; they are updated after the call.
+
+        The default implementation calls process_input_line for each
+        line, with the counters set for that line.
+
+        '''
+
+        global_lineno = self.global_lineno
+        for i, line in enumerate(lines):
+            self.lineno = first_lineno + i
+            self.global_lineno = global_lineno + i + 1
+            self.process_input_line(filename, line)
+
+    def process_input_record(self, filename, record):
+        '''Process one record of the input file.
+
+        This is called instead of process_input_line if the
+        ``input-format`` setting is not ``lines``. For ``nul``, a record
+        is a string (bytes, if ``binary_input`` is true) without the
+        terminating NUL; for ``jsonl``, the decoded JSON value; for
+        ``csv``, a list of strings. An application sets the default
+        format in add_settings, for example with
+        ``self.settings['input-format'] = 'jsonl'``.
+
+        '''
+
     def process_input_line(self, filename, line):
         '''Process one line of the input file.
 
@@ -22,7 +22,16 @@ try:
     TextIOBase = file
 except ImportError:
     from io import StringIO, TextIOBase
+import gzip
+import io
+import lzma
+import os
+import re
+import shutil
+import signal
 import sys
+import tempfile
+import threading
 import unittest
 
 import cliapp
@@ -106,11 +115,73 @@ class ApplicationTests(unittest.TestCase):
         self.app.run(args=['foo', 'bar'])
         self.assertEqual(self.inputs, ['foo', 'bar'])
 
+    def test_runs_with_settings_named_like_builtin_ones(self):
+        lines = []
+
+        class Foo(cliapp.Application):
+
+            def add_settings(self):
+                self.settings.bytesize(['checkpoint'], 'checkpoint size')
+                self.settings.boolean(['follow'], 'follow symlinks')
+
+            def process_input_line(self, name, line):
+                lines.append(line)
+
+        with tempfile.NamedTemporaryFile(mode='w') as f:
+            f.write('foo\n')
+            f.flush()
+            foo = Foo()
+            foo.run(args=['--checkpoint=1M', '--follow', f.name])
+        self.assertEqual(lines, ['foo\n'])
+        self.assertEqual(foo.settings['checkpoint'], 1000**2)
+
     def test_run_sets_output_attribute(self):
         self.app.process_args = lambda args: None
         self.app.run(args=[])
         self.assertEqual(self.app.output, sys.stdout)
 
+    def test_run_writes_to_stdout_descriptor_with_buffer(self):
+        def process_args(args):
+            self.app.output.write('foo\n')
+            self.written = os.path.getsize(stdout.name)
+
+        self.app.process_args = process_args
+        saved = sys.stdout
+        with tempfile.NamedTemporaryFile(mode='w') as stdout:
+            sys.stdout = stdout
+            try:
+                self.app.run(args=['--output-buffer-size=1k'])
+            finally:
+                sys.stdout = saved
+            self.assertEqual(self.written, 0)
+            with open(stdout.name) as f:
+                self.assertEqual(f.read(), 'foo\n')
+
+    def test_run_writes_output_before_error(self):
+        class App(cliapp.Application):
+
+            def process_args(self, args):
+                self.output.write('foo\n')
+                raise cliapp.AppException('failed')
+
+        with tempfile.NamedTemporaryFile() as output:
+            with self.assertRaises(SystemExit):
+                App().run(['--output', output.name], stderr=StringIO(),
+                          log=devnull)
+            self.assertEqual(output.read(), b'foo\n')
+
+    def test_run_opens_binary_output(self):
+        class App(cliapp.Application):
+
+            binary_output = True
+
+            def process_args(self, args):
+                self.output.write(b'\xff\n')
+
+        with tempfile.NamedTemporaryFile() as output:
+            App().run(['--output', output.name])
+            self.assertEqual(output.read(), b'\xff\n')
+
     def test_run_sets_output_to_file_if_output_option_is_set(self):
         self.app.process_args = lambda args: None
         self.app.run(args=['--output=/dev/null'])
@@ -214,9 +285,51 @@ class ApplicationTests(unittest.TestCase):
         f = self.app.open_input('/dev/null', mode='rb')
         self.assertEqual(getattr(f, 'mode'), 'rb')
 
+    def with_stdin(self, stdin, func):
+        saved = sys.stdin
+        sys.stdin = stdin
+        try:
+            return func()
+        finally:
+            sys.stdin = saved
+
     def test_open_input_opens_stdin_if_dash_given(self):
         self.assertEqual(self.app.open_input('-'), sys.stdin)
 
+    def test_open_input_opens_stdin_without_descriptor(self):
+        self.app.settings['input-buffer-size'] = 1024
+        stdin = StringIO()
+        self.assertEqual(
+            self.with_stdin(stdin, lambda: self.app.open_input('-')), stdin)
+
+    def test_open_input_opens_stdin_buffer_if_binary_mode(self):
+        stdin = StringIO()
+        self.assertEqual(
+            self.with_stdin(stdin, lambda: self.app.open_input('-', 'rb')),
+            getattr(stdin, 'buffer', stdin))
+
+    def test_open_input_reads_stdin_descriptor(self):
+        with tempfile.TemporaryFile() as raw:
+            raw.write(b'foo\nbar\n')
+            raw.seek(0)
+            stdin = open(raw.fileno(), closefd=False)
+            self.app.settings['input-buffer-size'] = 1024
+            f = self.with_stdin(
+                stdin, lambda: self.app.open_input('-', mode='rb'))
+            self.assertEqual(f.read(), b'foo\nbar\n')
+            f.close()
+            self.assertFalse(stdin.closed)
+            self.assertEqual(raw.tell(), 8)
+
+    def test_open_input_reads_stdin_descriptor_as_text(self):
+        with tempfile.TemporaryFile() as raw:
+            raw.write(b'foo\r\nbar\n')
+            raw.seek(0)
+            stdin = open(raw.fileno(), closefd=False)
+            self.app.settings['input-buffer-size'] = 1024
+            f = self.with_stdin(stdin, lambda: self.app.open_input('-'))
+            self.assertEqual(list(f), ['foo\r\n', 'bar\n'])
+
     def test_process_input_calls_open_input(self):
         self.called = None
 
@@ -262,6 +375,22 @@ class ApplicationTests(unittest.TestCase):
         foo.run(args=['foo', 'bar'])
         self.assertEqual(lines, ['foo0\n', 'foo1\n', 'bar0\n', 'bar1\n'])
 
+    def test_processes_input_lines_as_bytes_in_binary_mode(self):
+        lines = []
+
+        class Foo(cliapp.Application):
+
+            binary_input = True
+
+            def process_input_line(self, name, line):
+                lines.append(line)
+
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'foo\n\xff\n')
+            f.flush()
+            Foo().process_input(f.name)
+        self.assertEqual(lines, [b'foo\n', b'\xff\n'])
+
     def test_process_input_line_can_access_counters(self):
         counters = []
 
@@ -282,6 +411,106 @@ class ApplicationTests(unittest.TestCase):
                           (2, 3, 1),
                           (2, 4, 2)])
 
+    def test_processes_input_lines_in_batches(self):
+        batches = []
+
+        class Foo(cliapp.Application):
+
+            def open_input(self, name, mode=None):
+                return StringIO(''.join('%s%d\n' % (name, i)
+                                        for i in range(5)))
+
+            def process_input_lines(self, name, lines, first_lineno):
+                batches.append((name, lines, first_lineno))
+
+        foo = Foo()
+        foo.run(args=['--input-batch-size=2', 'foo', 'bar'])
+        self.assertEqual(batches,
+                         [('foo', ['foo0\n', 'foo1\n'], 1),
+                          ('foo', ['foo2\n', 'foo3\n'], 3),
+                          ('foo', ['foo4\n'], 5),
+                          ('bar', ['bar0\n', 'bar1\n'], 1),
+                          ('bar', ['bar2\n', 'bar3\n'], 3),
+                          ('bar', ['bar4\n'], 5)])
+        self.assertEqual((foo.fileno, foo.global_lineno, foo.lineno),
+                         (2, 10, 5))
+
+    def test_counts_lines_when_batches_fall_back_to_default(self):
+        counters = []
+
+        class Foo(cliapp.Application):
+
+            def open_input(self, name, mode=None):
+                return StringIO('a\nb\nc\n')
+
+            def process_input_lines(self, name, lines, first_lineno):
+                super().process_input_lines(name, lines, first_lineno)
+
+            def process_input_line(self, name, line):
+                counters.append((self.lineno, self.global_lineno))
+
+        foo = Foo()
+        foo.run(args=['--input-batch-size=2', 'foo', 'bar'])
+        self.assertEqual(counters,
+                         [(1, 1), (2, 2), (3, 3), (1, 4), (2, 5), (3, 6)])
+        self.assertEqual((foo.global_lineno, foo.lineno), (6, 3))
+
+    def test_process_input_range_closes_file_on_error(self):
+        opened = []
+
+        class Foo(cliapp.Application):
+
+            def open_input(self, name, mode=None):
+                opened.append(io.BytesIO(b'foo\nbar\n'))
+                return opened[-1]
+
+            def process_input_line(self, name, line):
+                raise cliapp.AppException('xxx')
+
+        self.assertRaises(
+            cliapp.AppException, Foo().process_input_range, 'foo', 0, 8, 1)
+        self.assertTrue(opened[0].closed)
+
+    def test_process_input_lines_calls_process_input_line(self):
+        counters = []
+
+        def process_input_line(name, line):
+            counters.append(
+                (line, self.app.global_lineno, self.app.lineno))
+
+        self.app.global_lineno = 10
+        self.app.process_input_line = process_input_line
+        self.app.process_input_lines('foo', ['a', 'b'], 3)
+        self.assertEqual(counters, [('a', 11, 3), ('b', 12, 4)])
+
+    def test_logs_status_on_signal(self):
+        output = []
+
+        def process_args(args):
+            with self.assertLogs(level='INFO') as logs:
+                os.kill(os.getpid(), signal.SIGUSR1)
+            output.extend(logs.output)
+
+        self.app.process_args = process_args
+        self.app.global_lineno = 42
+        self.app.run(['--log-status-on-signal'])
+        output = '\n'.join(output)
+        self.assertIn('global_lineno 42', output)
+        self.assertIn('external commands running: none', output)
+        self.assertIn('in process_args', output)
+        self.assertEqual(
+            signal.getsignal(signal.SIGUSR1), signal.SIG_DFL)
+
+    def test_restores_signal_handler_after_error(self):
+        def raise_error(args):
+            raise cliapp.AppException('xxx')
+        self.app.process_args = raise_error
+        self.assertRaises(
+            SystemExit, self.app.run, ['--log-status-on-signal'],
+            stderr=StringIO(), log=devnull)
+        self.assertEqual(
+            signal.getsignal(signal.SIGUSR1), signal.SIG_DFL)
+
     def test_run_prints_out_error_for_appexception(self):
         def raise_error(args):
             raise cliapp.AppException('xxx')
@@ -313,6 +542,403 @@ class ApplicationTests(unittest.TestCase):
         self.assertRaises(SystemExit, self.app.run, [], stderr=f, log=devnull)
 
 
+class ShardTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def app(self, shard):
+        app = cliapp.Application()
+        app.settings['shard'] = shard
+        return app
+
+    def test_shards_cover_all_names_once(self):
+        names = ['file%d' % i for i in range(100)]
+        seen = []
+        for i in range(1, 4):
+            shard = list(self.app('%d/3' % i).input_names(names))
+            self.assertTrue(shard)
+            seen.extend(shard)
+        self.assertEqual(sorted(seen), sorted(names))
+
+    def test_shards_cover_all_lines_of_single_file_once(self):
+        filename = os.path.join(self.tempdir, 'foo')
+        lines = ['line %d\n' % i for i in range(100)]
+        with open(filename, 'w') as f:
+            f.write(''.join(lines))
+        seen = []
+        for i in range(1, 4):
+            app = self.app('%d/3' % i)
+            app.process_input_line = (
+                lambda name, line, app=app: seen.append((app.lineno, line)))
+            app.process_inputs([filename])
+        self.assertEqual(seen, list(enumerate(lines, 1)))
+
+    def test_gives_single_file_whole_to_process_input(self):
+        filename = os.path.join(self.tempdir, 'foo')
+        with open(filename, 'w') as f:
+            f.write('foo\nbar\n')
+        processed = []
+
+        class App(cliapp.Application):
+
+            def process_input(self, name, stdin=sys.stdin):
+                processed.append(name)
+
+        for i in range(1, 3):
+            app = App()
+            app.settings['shard'] = '%d/2' % i
+            app.process_inputs([filename])
+        self.assertEqual(processed, [filename])
+
+    def test_does_not_split_file_for_modes_that_need_whole_files(self):
+        filename = os.path.join(self.tempdir, 'foo')
+        with open(filename, 'w') as f:
+            f.write('foo\nbar\n')
+        seen = []
+        for i in range(1, 3):
+            app = self.app('%d/2' % i)
+            app.settings['incremental'] = os.path.join(self.tempdir, 'index')
+            app.process_input_line = (
+                lambda name, line, app=app, i=i:
+                seen.append((i, app.lineno, line)))
+            app.process_inputs([filename])
+        shard = seen[0][0]
+        self.assertEqual(seen, [(shard, 1, 'foo\n'), (shard, 2, 'bar\n')])
+
+    def test_refuses_checkpoint_with_recursive_input(self):
+        filename = os.path.join(self.tempdir, 'foo')
+        with open(filename, 'w') as f:
+            f.write('foo\nbar\n')
+        app = self.app('1/2')
+        app.settings['checkpoint'] = os.path.join(self.tempdir, 'checkpoint')
+        app.settings['input-recursive'] = True
+        self.assertRaises(
+            cliapp.AppException, app.process_inputs, [filename])
+
+    def test_refuses_batches_with_offsets(self):
+        filename = os.path.join(self.tempdir, 'foo')
+        with open(filename, 'w') as f:
+            f.write('foo\nbar\n')
+
+        class App(cliapp.Application):
+
+            def process_input_lines(self, name, lines, first_lineno):
+                pass
+
+        app = App()
+        app.settings['shard'] = '1/2'
+        app.settings['input-split-lineno'] = 'offset'
+        self.assertRaises(
+            cliapp.AppException, app.process_inputs, [filename])
+
+    def test_rejects_bad_shard(self):
+        for shard in ['0/3', '4/3', '1', 'a/b']:
+            self.assertRaises(
+                cliapp.AppException, self.app(shard).input_names, ['a'])
+
+
+class CompressedOutputTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_compresses_output_by_suffix(self):
+        class App(cliapp.Application):
+
+            def process_args(self, args):
+                for i in range(10000):
+                    self.output.write('line %d\n' % i)
+
+        filename = os.path.join(self.tempdir, 'output.gz')
+        App().run(['--output', filename])
+        with gzip.open(filename, 'rt') as f:
+            self.assertEqual(
+                f.read(), ''.join('line %d\n' % i for i in range(10000)))
+
+    def test_compresses_output_by_setting(self):
+        filename = os.path.join(self.tempdir, 'output')
+        app = cliapp.Application()
+        app.process_args = lambda args: app.output.write('foo\n')
+        app.run(['--output', filename, '--output-compression=xz'])
+        with lzma.open(filename, 'rt') as f:
+            self.assertEqual(f.read(), 'foo\n')
+
+    def test_refuses_unsupported_compression(self):
+        app = cliapp.Application()
+        app.settings['output-compression'] = 'lz4'
+        self.assertRaises(cliapp.AppException, app._output_compression)
+
+
+class PrefilterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, 'input')
+        with open(self.filename, 'w') as f:
+            f.write('foo\nbar\nfoobar\nbaz\nlast foo')
+        self.lines = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def app(self, prefilter=None, binary_input=False):
+        test = self
+
+        class App(cliapp.Application):
+
+            def process_input_line(self, name, line):
+                test.lines.append((self.lineno, self.global_lineno, line))
+
+        App.prefilter = prefilter
+        App.binary_input = binary_input
+        return App()
+
+    def test_gives_only_matching_lines_with_right_numbers(self):
+        app = self.app('^foo|foo$')
+        app.process_inputs(['/dev/null', self.filename])
+        self.assertEqual(
+            self.lines,
+            [(1, 1, 'foo\n'), (3, 3, 'foobar\n'), (5, 5, 'last foo')])
+        self.assertEqual((app.lineno, app.global_lineno), (5, 5))
+
+    def test_setting_overrides_attribute(self):
+        app = self.app('^foo')
+        app.settings['prefilter'] = 'ba'
+        app.settings['input-buffer-size'] = 5
+        app.process_inputs([self.filename])
+        self.assertEqual(
+            [line for _, _, line in self.lines],
+            ['bar\n', 'foobar\n', 'baz\n'])
+
+    def test_searches_bytes_with_binary_input(self):
+        app = self.app(re.compile('BAR', re.IGNORECASE), binary_input=True)
+        app.process_inputs([self.filename])
+        self.assertEqual(self.lines, [(2, 2, b'bar\n'), (3, 3, b'foobar\n')])
+
+    def test_filters_range_of_file(self):
+        app = self.app('^ba')
+        self.assertEqual(app.process_input_range(self.filename, 4, 19), 3)
+        self.assertEqual(self.lines, [(4, 1, 'bar\n'), (15, 3, 'baz\n')])
+        self.lines = []
+        app.process_input_range(self.filename, 4, 19, lineno=2)
+        self.assertEqual(self.lines, [(2, 4, 'bar\n'), (4, 6, 'baz\n')])
+
+    def test_refuses_prefilter_with_batches_chunks_and_records(self):
+
+        class BatchApp(cliapp.Application):
+
+            prefilter = 'foo'
+
+            def process_input_lines(self, name, lines, first_lineno):
+                pass
+
+        class ChunkApp(cliapp.Application):
+
+            prefilter = 'foo'
+
+            def process_input_chunk(self, name, chunk):
+                pass
+
+        for app in [BatchApp(), ChunkApp()]:
+            self.assertRaises(
+                cliapp.AppException, app.process_inputs, [self.filename])
+            self.assertRaises(
+                cliapp.AppException, app.process_input_range,
+                self.filename, 0, 4, lineno=1)
+        app = self.app('foo')
+        app.settings['input-format'] = 'nul'
+        self.assertRaises(
+            cliapp.AppException, app.process_inputs, [self.filename])
+        self.assertEqual(self.lines, [])
+
+    def test_refuses_to_follow_with_prefilter(self):
+        app = self.app('foo')
+        app.settings['follow'] = True
+        self.assertRaises(
+            cliapp.AppException, app.process_inputs, [self.filename])
+
+
+class CopyInputToOutputTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.input = os.path.join(self.tempdir, 'input')
+        with open(self.input, 'w') as f:
+            f.write('foo\nbar\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_copies_to_output_file(self):
+        class App(cliapp.Application):
+
+            def process_input(self, name):
+                self.output.write('%s:\n' % name)
+                self.copy_input_to_output(name)
+
+        output = os.path.join(self.tempdir, 'output')
+        App().run(['--output', output, self.input, self.input])
+        with open(output) as f:
+            self.assertEqual(
+                f.read(), ('%s:\nfoo\nbar\n' % self.input) * 2)
+
+    def test_copies_to_text_output(self):
+        app = cliapp.Application()
+        app.output = StringIO()
+        self.assertEqual(app.copy_input_to_output(self.input), 8)
+        self.assertEqual(app.output.getvalue(), 'foo\nbar\n')
+
+
+class PartitionedOutputTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_closes_partitions_when_run_ends(self):
+        tempdir = self.tempdir
+
+        class App(cliapp.Application):
+
+            def process_args(self, args):
+                self.writer = self.partitioned_output(
+                    os.path.join(tempdir, '%s'))
+                for arg in args:
+                    self.writer.write(arg[0], arg + '\n')
+
+        app = App()
+        app.run(['--partition-max-open=1', 'foo', 'bar', 'baz'])
+        self.assertEqual(app.writer._files, {})
+        with open(os.path.join(tempdir, 'b')) as f:
+            self.assertEqual(f.read(), 'bar\nbaz\n')
+
+    def test_refuses_partitioned_output_with_jobs(self):
+        app = cliapp.Application()
+        app.settings['jobs'] = 2
+        self.assertRaises(
+            cliapp.AppException, app.partitioned_output,
+            os.path.join(self.tempdir, '%s'))
+
+    def test_refuses_jobs_after_partitioned_output_is_created(self):
+        app = cliapp.Application()
+        app.partitioned_output(os.path.join(self.tempdir, '%s'))
+        app.settings['jobs'] = 2
+        self.assertRaises(
+            cliapp.AppException, app.process_inputs, [os.devnull])
+        app._close_partitioned_outputs()
+
+
+class ExternalSorterTests(unittest.TestCase):
+
+    def test_writes_sorted_records_to_output(self):
+        class App(cliapp.Application):
+
+            def setup(self):
+                self.sorter = self.external_sorter(reverse=True)
+
+            def process_args(self, args):
+                for arg in args:
+                    self.sorter.add(arg + '\n')
+
+            def cleanup(self):
+                self.sorter.write_to(self.output)
+
+        with tempfile.NamedTemporaryFile(mode='r') as output:
+            app = App()
+            app.run(['--memory-budget=100', '--output', output.name,
+                     'b', 'c', 'a', 'd'])
+            self.assertEqual(output.read(), 'd\nc\nb\na\n')
+        self.assertEqual(app._sorters, [])
+
+    def test_refuses_sorter_with_jobs(self):
+        app = cliapp.Application()
+        app.settings['jobs'] = 2
+        self.assertRaises(cliapp.AppException, app.external_sorter)
+
+    def test_refuses_jobs_after_sorter_is_created(self):
+        app = cliapp.Application()
+        app.external_sorter()
+        app.settings['jobs'] = 2
+        self.assertRaises(
+            cliapp.AppException, app.process_inputs, [os.devnull])
+        app._close_sorters()
+
+
+def get_worker_setting(name):
+    return cliapp.worker_settings()[name]
+
+
+class ExecutorTests(unittest.TestCase):
+
+    def test_returns_same_executor_each_time(self):
+        app = cliapp.Application()
+        self.assertIs(app.executor(), app.executor('thread'))
+        self.assertIsNot(app.executor(), app.executor('process'))
+        app._shutdown_executors(wait=True)
+
+    def test_rejects_unknown_kind(self):
+        app = cliapp.Application()
+        self.assertRaises(ValueError, app.executor, 'fiber')
+
+    def test_gives_settings_to_process_workers(self):
+        class App(cliapp.Application):
+
+            def process_args(self, args):
+                future = self.executor('process').submit(
+                    get_worker_setting, 'output')
+                self.result = future.result()
+
+        app = App()
+        app.run(['--output=/dev/null'])
+        self.assertEqual(app.result, '/dev/null')
+        self.assertEqual(cliapp.worker_settings(), None)
+
+    def test_waits_for_tasks_before_shutting_down(self):
+        class App(cliapp.Application):
+
+            def process_args(self, args):
+                self.executor_used = self.executor()
+                self.futures = [
+                    self.executor_used.submit(lambda: 42) for i in range(10)]
+
+        app = App()
+        app.run(['--jobs=2'])
+        self.assertEqual([f.result() for f in app.futures], [42] * 10)
+        self.assertRaises(RuntimeError, app.executor_used.submit, print)
+        self.assertEqual(app._executors, {})
+
+    def test_cancels_tasks_on_error(self):
+        class App(cliapp.Application):
+
+            def process_args(self, args):
+                self.started = threading.Event()
+                self.proceed = threading.Event()
+                executor = self.executor()
+                executor.submit(self.block)
+                self.future = executor.submit(lambda: 42)
+                self.started.wait()
+                raise cliapp.AppException('failed')
+
+            def block(self):
+                self.started.set()
+                self.proceed.wait()
+
+        app = App()
+        with self.assertRaises(SystemExit):
+            app.run(['--jobs=1'], stderr=StringIO(), log=devnull)
+        self.assertTrue(app.future.cancelled())
+        app.proceed.set()
+
+
 class DummySubcommandApp(cliapp.Application):
 
     def cmd_foo(self, args):
@@ -0,0 +1,215 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''An Application whose processing happens in an asyncio event loop.'''
+
+
+import asyncio
+import inspect
+import sys
+
+import cliapp
+
+
+class _TaskLimiter(object):
+
+    '''Run awaitables as tasks, at most ``limit`` at a time.'''
+
+    def __init__(self, limit):
+        self._semaphore = asyncio.Semaphore(limit)
+        self._tasks = set()
+        self._error = None
+
+    async def start(self, awaitable):
+        '''Start a task, after waiting for a free slot.
+
+        The task runs until it first waits for something before this
+        returns. Raise the exception of any task that has failed.
+
+        '''
+
+        await self._semaphore.acquire()
+        task = asyncio.ensure_future(self._run(awaitable))
+        self._tasks.add(task)
+        task.add_done_callback(self._done)
+        await asyncio.sleep(0)
+        self._check()
+
+    async def wait(self):
+        '''Wait for all tasks to finish, or one of them to fail.'''
+        if self._tasks:
+            await asyncio.wait(
+                self._tasks, return_when=asyncio.FIRST_EXCEPTION)
+        self._check()
+
+    async def cancel(self):
+        '''Cancel all tasks that are still running.'''
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+
+    async def _run(self, awaitable):
+        try:
+            return await awaitable
+        finally:
+            self._semaphore.release()
+
+    def _done(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and self._error is None:
+            self._error = task.exception()
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+
+class AsyncApplication(cliapp.Application):
+
+    '''A variant of Application for programs built on asyncio.
+
+    Settings, configuration files, logging, plugins, setup, cleanup,
+    and the handling of exceptions all work like in Application, but
+    process_args runs in an asyncio event loop, started with
+    ``asyncio.run``. Subcommand methods may be coroutines, and so may
+    process_input and process_input_line.
+
+    process_input calls process_input_line for each line in order,
+    with the usual counters set. If process_input_line returns an
+    awaitable, it is run as a task, and the next line is read without
+    waiting for the task to finish. At most ``concurrency`` (a
+    setting) tasks run at once. process_input waits for all tasks of
+    a file before it returns, and if any of them fails, the exception
+    is raised from process_input, and the other tasks are cancelled.
+    Since the counters change while a task waits, a coroutine should
+    read them before its first ``await``.
+
+    The ``semaphore`` attribute is an ``asyncio.Semaphore`` with the
+    same limit, which subcommands can use to limit their own
+    concurrency. It is created when the event loop starts, and is
+    separate from the limit on process_input_line tasks.
+
+    Only whole files of lines are processed one by one:
+    process_inputs raises AppException if the settings ask for
+    parallel processing, checkpoints, following files, an incremental
+    index, progress reports, other input formats, or a prefilter, or
+    if the class defines process_input_lines or process_input_chunk.
+
+    Input files are read in the event loop thread. Reading a pipe
+    that is slow to get data, such as the standard input from an
+    interactive program, therefore stops all tasks until the next line
+    arrives. Applications reading such input can override
+    process_input and read it with asyncio streams instead.
+
+    '''
+
+    def __init__(self, *args, **kwargs):
+        cliapp.Application.__init__(self, *args, **kwargs)
+        self.semaphore = None
+        self.settings.integer(
+            ['concurrency'],
+            'run at most N coroutines at once, for processing input '
+            'lines or in subcommands (default: %default)',
+            metavar='N',
+            default=16,
+            group=cliapp.perf_group_name)
+        self.settings._mark_builtin(['concurrency'])
+
+    def _call_process_args(self, args):
+        asyncio.run(self._main(args))
+
+    async def _main(self, args):
+        self.semaphore = asyncio.Semaphore(
+            self.settings.builtin('concurrency'))
+        await self.process_args(args)
+
+    async def process_args(self, args):
+        '''Process command line non-option arguments.
+
+        Like Application.process_args, except that subcommand methods
+        that are coroutines are awaited, and process_inputs is a
+        coroutine.
+
+        '''
+
+        if self.subcommands:
+            method = self._find_subcommand(args)
+            result = method(args[1:])
+            if inspect.isawaitable(result):
+                await result
+        else:
+            await self.process_inputs(args)
+
+    async def process_inputs(self, args):
+        '''Process all arguments as input filenames.
+
+        The names come from input_names. Each file is given to
+        process_input in turn, and its result is passed on with
+        collect_input_result and merge_input_result.
+
+        '''
+
+        for setting in ['checkpoint', 'follow', 'incremental', 'progress']:
+            if self.settings.builtin(setting):
+                raise cliapp.AppException(
+                    '--%s cannot be used with AsyncApplication' % setting)
+        if self._jobs() > 1:
+            raise cliapp.AppException(
+                '--jobs cannot be used with AsyncApplication')
+        if self.settings.builtin('input-format') != 'lines':
+            raise cliapp.AppException(
+                '--input-format cannot be used with AsyncApplication')
+        if self._prefilter_regex() is not None:
+            raise cliapp.AppException(
+                'a prefilter cannot be used with AsyncApplication')
+        for method_name in ['process_input_lines', 'process_input_chunk']:
+            if self._overrides(method_name):
+                raise cliapp.AppException(
+                    'AsyncApplication does not call %s' % method_name)
+
+        for name in self.input_names(args):
+            await self.process_input(name)
+            self._merge_input_result(name, self.collect_input_result(name))
+
+    async def process_input(self, name, stdin=sys.stdin):
+        '''Process a particular input file.
+
+        The ``stdin`` argument is meant for unit test only.
+
+        '''
+
+        self.fileno += 1
+        self.lineno = 0
+        self._input_name = name
+        limiter = _TaskLimiter(self.settings.builtin('concurrency'))
+        f = self._open_input_lines(name)
+        try:
+            for line in f:
+                self.global_lineno += 1
+                self.lineno += 1
+                result = self.process_input_line(name, line)
+                if inspect.isawaitable(result):
+                    await limiter.start(result)
+            await limiter.wait()
+        except BaseException:
+            await limiter.cancel()
+            raise
+        finally:
+            self._finish_input(name)
+            if f is not stdin and f is not getattr(stdin, 'buffer', None):
+                f.close()
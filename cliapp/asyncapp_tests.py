@@ -0,0 +1,152 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import asyncio
+import io
+import tempfile
+import time
+import unittest
+
+import cliapp
+
+
+def devnull(msg):
+    pass
+
+
+class LineApp(cliapp.AsyncApplication):
+
+    def setup(self):
+        self.events = []
+        self.running = 0
+        self.max_running = 0
+
+    async def process_input_line(self, name, line):
+        lineno = self.lineno
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(60 if line == 'slow\n' else 0.01)
+        self.running -= 1
+        if line == 'fail\n':
+            raise cliapp.AppException('failed at line %d' % lineno)
+        self.events.append((lineno, line))
+
+    def cleanup(self):
+        self.events.append('cleanup')
+
+
+class AsyncApplicationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.file = tempfile.NamedTemporaryFile(mode='w')
+
+    def tearDown(self):
+        self.file.close()
+
+    def write(self, lines):
+        self.file.write(''.join(lines))
+        self.file.flush()
+
+    def test_runs_line_coroutines_concurrently_up_to_limit(self):
+        self.write(['%d\n' % i for i in range(20)])
+        app = LineApp()
+        app.run(['--concurrency=5', self.file.name])
+        self.assertEqual(app.max_running, 5)
+        self.assertEqual(sorted(app.events[:-1]),
+                         [(i + 1, '%d\n' % i) for i in range(20)])
+        self.assertEqual(app.events[-1], 'cleanup')
+        self.assertEqual((app.fileno, app.global_lineno), (1, 20))
+
+    def test_exits_with_error_if_coroutine_fails(self):
+        self.write(['ok\n', 'fail\n', 'ok\n'])
+        app = LineApp()
+        stderr = io.StringIO()
+        with self.assertRaises(SystemExit) as cm:
+            app.run([self.file.name], stderr=stderr, log=devnull)
+        self.assertEqual(cm.exception.code, 1)
+        self.assertEqual(stderr.getvalue(), 'ERROR: failed at line 2\n')
+        self.assertNotIn('cleanup', app.events)
+
+    def test_cancels_other_coroutines_if_one_fails(self):
+        self.write(['slow\n', 'fail\n'])
+        app = LineApp()
+        started = time.time()
+        with self.assertRaises(SystemExit):
+            app.run([self.file.name], stderr=io.StringIO(), log=devnull)
+        self.assertLess(time.time() - started, 30)
+        self.assertEqual(app.events, [])
+
+    def test_refuses_settings_it_does_not_use(self):
+        self.write(['ok\n'])
+        options = [
+            '--checkpoint=foo', '--follow', '--incremental=foo',
+            '--progress', '--jobs=2', '--input-format=jsonl',
+            '--prefilter=ok',
+        ]
+        for option in options:
+            app = LineApp()
+            stderr = io.StringIO()
+            with self.assertRaises(SystemExit):
+                app.run([option, self.file.name], stderr=stderr,
+                        log=devnull)
+            self.assertIn('cannot be used with AsyncApplication',
+                          stderr.getvalue())
+            self.assertEqual(app.events, [])
+
+    def test_refuses_hooks_it_does_not_call(self):
+        self.write(['ok\n'])
+
+        class LinesApp(LineApp):
+
+            def process_input_lines(self, name, lines):
+                self.events.append(name)
+
+        class ChunkApp(LineApp):
+
+            def process_input_chunk(self, name, chunk):
+                self.events.append(name)
+
+        for klass in [LinesApp, ChunkApp]:
+            app = klass()
+            stderr = io.StringIO()
+            with self.assertRaises(SystemExit):
+                app.run([self.file.name], stderr=stderr, log=devnull)
+            self.assertIn('AsyncApplication does not call',
+                          stderr.getvalue())
+            self.assertEqual(app.events, [])
+
+    def test_awaits_coroutine_subcommands(self):
+        class App(cliapp.AsyncApplication):
+
+            async def cmd_foo(self, args):
+                async with self.semaphore:
+                    await asyncio.sleep(0)
+                    self.foo_args = args
+
+        app = App()
+        app.run(['foo', 'bar'])
+        self.assertEqual(app.foo_args, ['bar'])
+
+    def test_runs_plain_subcommands(self):
+        class App(cliapp.AsyncApplication):
+
+            def cmd_foo(self, args):
+                self.foo_args = args
+
+        app = App()
+        app.run(['foo'])
+        self.assertEqual(app.foo_args, [])
@@ -0,0 +1,97 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Save and restore the progress of processing input files.
+
+With the ``checkpoint`` setting, process_inputs saves the progress
+every ``checkpoint-interval`` seconds, together with what
+checkpoint_state returns. With ``resume``, processing continues from
+the saved checkpoint: files that were already done are skipped, and
+the file being processed is read from where it was. This requires
+the input files to be given in the same order, so the name of that
+file is checked, and ``input-recursive`` can't be used, since
+directories are not searched in the same order every time.
+
+Lines are then read in binary mode and decoded one by one, to know
+their byte offsets. With process_input_chunk or an ``input-format``
+other than ``lines``, checkpoints are saved only between files. The
+checkpoint file is removed when all input files have been processed.
+
+'''
+
+
+import json
+import os
+import time
+
+import cliapp
+
+
+class Checkpointer(object):
+
+    '''Save checkpoints to a file, at most once per ``interval`` seconds.
+
+    A checkpoint is a dict that can be serialised as JSON. It is
+    written to a temporary file, which is then renamed over the
+    checkpoint file, so the checkpoint file is always complete, even
+    if the program crashes while saving.
+
+    '''
+
+    version = 1
+
+    def __init__(self, filename, interval):
+        self.filename = filename
+        self.interval = interval
+        self._next_save = time.time() + interval
+
+    def due(self):
+        '''Is it time to save a checkpoint?'''
+        return time.time() >= self._next_save
+
+    def save(self, checkpoint):
+        '''Save a checkpoint.'''
+        data = dict(checkpoint, version=self.version)
+        tempname = self.filename + '.tmp'
+        with open(tempname, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(tempname, self.filename)
+        self._next_save = time.time() + self.interval
+
+    def load(self):
+        '''Return the saved checkpoint, or None if there isn't one.'''
+        try:
+            with open(self.filename) as f:
+                data = json.load(f)
+        except (IOError, OSError):
+            return None
+        except ValueError as e:
+            raise cliapp.AppException(
+                '%s: not a valid checkpoint file: %s' % (self.filename, e))
+        if data.get('version') != self.version:
+            raise cliapp.AppException(
+                '%s: unknown checkpoint version %r' %
+                (self.filename, data.get('version')))
+        del data['version']
+        return data
+
+    def remove(self):
+        '''Remove the checkpoint file, if it exists.'''
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
@@ -0,0 +1,196 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import cliapp
+import cliapp.checkpoint
+
+
+class CheckpointerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, 'checkpoint')
+        self.checkpointer = cliapp.checkpoint.Checkpointer(self.filename, 60)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_loads_nothing_if_there_is_no_checkpoint(self):
+        self.assertEqual(self.checkpointer.load(), None)
+
+    def test_loads_saved_checkpoint(self):
+        self.checkpointer.save({'index': 3})
+        self.assertEqual(self.checkpointer.load(), {'index': 3})
+        self.assertEqual(os.listdir(self.tempdir), ['checkpoint'])
+
+    def test_is_not_due_until_interval_has_passed(self):
+        self.assertFalse(self.checkpointer.due())
+        self.checkpointer.interval = 0
+        self.checkpointer.save({})
+        self.assertTrue(self.checkpointer.due())
+
+    def test_raises_error_for_garbage(self):
+        with open(self.filename, 'w') as f:
+            f.write('garbage')
+        self.assertRaises(cliapp.AppException, self.checkpointer.load)
+
+    def test_raises_error_for_unknown_version(self):
+        with open(self.filename, 'w') as f:
+            json.dump({'version': 0}, f)
+        self.assertRaises(cliapp.AppException, self.checkpointer.load)
+
+    def test_removes_checkpoint(self):
+        self.checkpointer.save({})
+        self.checkpointer.remove()
+        self.checkpointer.remove()
+        self.assertEqual(os.listdir(self.tempdir), [])
+
+
+class Crash(Exception):
+
+    pass
+
+
+class CountingApp(cliapp.Application):
+
+    def __init__(self, crash_at=None):
+        cliapp.Application.__init__(self)
+        self.crash_at = crash_at
+        self.seen = []
+        self.count = 0
+
+    def process_input_line(self, name, line):
+        if self.global_lineno == self.crash_at:
+            raise Crash()
+        self.seen.append((self.fileno, self.lineno, self.global_lineno, line))
+        self.count += 1
+
+    def checkpoint_state(self):
+        return self.count
+
+    def restore_checkpoint_state(self, state):
+        self.count = state
+
+
+class ResumeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.tempdir, 'checkpoint')
+        self.names = []
+        for name in ['foo', 'bar']:
+            filename = os.path.join(self.tempdir, name)
+            with open(filename, 'w') as f:
+                f.write(''.join('%s%d\n' % (name, i) for i in range(5)))
+            self.names.append(filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def process(self, app, resume=False):
+        app.settings['checkpoint'] = self.checkpoint
+        app.settings['checkpoint-interval'] = 0
+        app.settings['input-batch-size'] = 2
+        app.settings['resume'] = resume
+        app.process_inputs(self.names)
+
+    def test_resumes_after_last_checkpoint(self):
+        app = CountingApp(crash_at=8)
+        self.assertRaises(Crash, self.process, app)
+        self.assertTrue(os.path.exists(self.checkpoint))
+
+        resumed = CountingApp()
+        self.process(resumed, resume=True)
+        self.assertEqual(
+            resumed.seen,
+            [(2, 3, 8, 'bar2\n'),
+             (2, 4, 9, 'bar3\n'),
+             (2, 5, 10, 'bar4\n')])
+        self.assertEqual(resumed.count, 10)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resumes_from_start_without_checkpoint(self):
+        app = CountingApp()
+        self.process(app, resume=True)
+        self.assertEqual(app.count, 10)
+        self.assertEqual((app.fileno, app.lineno, app.global_lineno),
+                         (2, 5, 10))
+
+    def test_starts_over_without_resume(self):
+        self.assertRaises(Crash, self.process, CountingApp(crash_at=8))
+        app = CountingApp()
+        self.process(app)
+        self.assertEqual(app.count, 10)
+
+    def test_refuses_to_resume_with_other_inputs(self):
+        self.assertRaises(Crash, self.process, CountingApp(crash_at=8))
+        self.names.reverse()
+        self.assertRaises(
+            cliapp.AppException, self.process, CountingApp(), True)
+
+    def test_resumes_at_start_of_next_file(self):
+        self.assertRaises(Crash, self.process, CountingApp(crash_at=6))
+        resumed = CountingApp()
+        self.process(resumed, resume=True)
+        self.assertEqual(resumed.seen[0], (2, 1, 6, 'bar0\n'))
+        self.assertEqual(resumed.count, 10)
+
+    def test_refuses_to_resume_if_next_file_is_not_the_same(self):
+        self.assertRaises(Crash, self.process, CountingApp(crash_at=6))
+        self.names[1] = self.names[0]
+        self.assertRaises(
+            cliapp.AppException, self.process, CountingApp(), True)
+
+    def test_resumes_batches_after_last_checkpoint(self):
+
+        class BatchApp(CountingApp):
+
+            def process_input_lines(self, name, lines, first_lineno):
+                for i, line in enumerate(lines):
+                    global_lineno = self.global_lineno + i + 1
+                    if global_lineno == self.crash_at:
+                        raise Crash()
+                    self.seen.append(
+                        (self.fileno, first_lineno + i, global_lineno, line))
+                    self.count += 1
+
+        self.assertRaises(Crash, self.process, BatchApp(crash_at=8))
+        resumed = BatchApp()
+        self.process(resumed, resume=True)
+        self.assertEqual(
+            resumed.seen,
+            [(2, 3, 8, 'bar2\n'),
+             (2, 4, 9, 'bar3\n'),
+             (2, 5, 10, 'bar4\n')])
+        self.assertEqual(resumed.count, 10)
+        self.assertEqual(resumed.global_lineno, 10)
+
+    def test_refuses_to_checkpoint_with_input_recursive(self):
+        app = CountingApp()
+        app.settings['input-recursive'] = True
+        self.assertRaises(cliapp.AppException, self.process, app)
+
+    def test_refuses_to_checkpoint_with_jobs(self):
+        app = CountingApp()
+        app.settings['jobs'] = 2
+        self.assertRaises(cliapp.AppException, self.process, app)
@@ -0,0 +1,111 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Read input files in large chunks that end on line boundaries.'''
+
+
+import mmap
+import os
+import stat
+
+
+def iter_chunks(f, chunk_size, start=0, end=None):
+    '''Yield (offset, chunk) pairs for a binary file.
+
+    Each chunk is about ``chunk_size`` bytes, and ends just after a
+    newline, except possibly the last one. A chunk is longer than
+    ``chunk_size`` only if a single line is. Only the part of the file
+    from offset ``start`` up to ``end`` (or the end of the file) is
+    read.
+
+    Regular files are memory mapped, and the chunks are memoryview
+    objects into the mapping, so no data is copied. A chunk is only
+    valid until the next one is requested. Other files, such as pipes,
+    are read in blocks of ``chunk_size`` bytes, and the chunks are
+    bytes objects.
+
+    '''
+
+    if _is_mappable(f):
+        return _mapped_chunks(f, chunk_size, start, end)
+    else:
+        if start:
+            f.seek(start)
+        return _read_chunks(f, chunk_size, start, end)
+
+
+def _is_mappable(f):
+    try:
+        st = os.fstat(f.fileno())
+    except (AttributeError, OSError, ValueError):
+        return False
+    return stat.S_ISREG(st.st_mode) and st.st_size > 0
+
+
+def _mapped_chunks(f, chunk_size, start, end):
+    m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if hasattr(m, 'madvise'):
+        m.madvise(mmap.MADV_SEQUENTIAL)
+    view = memoryview(m)
+    size = len(m) if end is None else min(end, len(m))
+    try:
+        while start < size:
+            end = start + chunk_size
+            if end < size:
+                newline = m.rfind(b'\n', start, end)
+                if newline == -1:
+                    newline = m.find(b'\n', end, size)
+                end = size if newline == -1 else newline + 1
+            else:
+                end = size
+            chunk = view[start:end]
+            yield start, chunk
+            chunk.release()
+            start = end
+    finally:
+        view.release()
+        try:
+            m.close()
+        except BufferError:
+            # The application kept a reference to part of a chunk.
+            # The mapping goes away when that reference does.
+            pass
+
+
+def _read_chunks(f, chunk_size, offset, end):
+    remaining = None if end is None else end - offset
+    partial = b''
+    while remaining is None or remaining > 0:
+        if remaining is None:
+            data = f.read(chunk_size)
+        else:
+            data = f.read(min(chunk_size, remaining))
+            remaining -= len(data)
+        if not data:
+            break
+        if partial:
+            data = partial + data
+        newline = data.rfind(b'\n')
+        if newline == -1:
+            partial = data
+            continue
+        chunk = data[:newline + 1]
+        partial = data[newline + 1:]
+        yield offset, chunk
+        offset += len(chunk)
+    if partial:
+        yield offset, partial
@@ -0,0 +1,100 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import io
+import tempfile
+import unittest
+
+import cliapp
+import cliapp.chunks
+
+
+class IterChunksTests(unittest.TestCase):
+
+    def setUp(self):
+        self.data = b''.join(b'%d\n' % i for i in range(1000))
+        self.data += b'x' * 100 + b'\nlast'
+
+    def check(self, chunks):
+        self.assertTrue(len(chunks) > 1)
+        offset = 0
+        for chunk_offset, chunk in chunks:
+            self.assertEqual(chunk_offset, offset)
+            offset += len(chunk)
+        for _, chunk in chunks[:-1]:
+            self.assertEqual(chunk[-1:], b'\n')
+        self.assertEqual(b''.join(chunk for _, chunk in chunks), self.data)
+
+    def test_reads_unmappable_file_in_blocks(self):
+        f = io.BytesIO(self.data)
+        self.check(list(cliapp.chunks.iter_chunks(f, 64)))
+
+    def test_maps_regular_file(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(self.data)
+            f.flush()
+            f.seek(0)
+            chunks = [(offset, bytes(chunk))
+                      for offset, chunk in cliapp.chunks.iter_chunks(f, 64)]
+        self.check(chunks)
+
+    def test_gives_memoryviews_for_regular_file(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(self.data)
+            f.flush()
+            f.seek(0)
+            for _, chunk in cliapp.chunks.iter_chunks(f, 64):
+                self.assertTrue(isinstance(chunk, memoryview))
+
+    def test_reads_only_given_range(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(b'foo\nbar\nfoobar\n')
+            f.flush()
+            f.seek(0)
+            mapped = [(offset, bytes(chunk)) for offset, chunk in
+                      cliapp.chunks.iter_chunks(f, 4, 4, 15)]
+        read = list(cliapp.chunks.iter_chunks(
+            io.BytesIO(b'foo\nbar\nfoobar\n'), 4, 4, 15))
+        self.assertEqual(mapped, [(4, b'bar\n'), (8, b'foobar\n')])
+        self.assertEqual(read, mapped)
+
+    def test_handles_empty_file(self):
+        with tempfile.TemporaryFile() as f:
+            self.assertEqual(list(cliapp.chunks.iter_chunks(f, 64)), [])
+
+
+class ChunkApp(cliapp.Application):
+
+    def setup(self):
+        self.chunks = []
+
+    def process_input_chunk(self, filename, buffer):
+        self.chunks.append((self.input_offset, bytes(buffer)))
+
+
+class ProcessInputChunkTests(unittest.TestCase):
+
+    def test_gives_chunks_to_process_input_chunk(self):
+        app = ChunkApp()
+        app.setup()
+        app.settings['input-chunk-size'] = 8
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'foo\nbar\nfoobar\n')
+            f.flush()
+            app.process_input(f.name)
+        self.assertEqual(app.chunks, [(0, b'foo\nbar\n'), (8, b'foobar\n')])
+        self.assertEqual(app.lineno, 0)
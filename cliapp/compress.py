@@ -0,0 +1,159 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Compress output in parallel threads.
+
+The output is cut into blocks, which are compressed independently of
+each other, in a pool of threads, like pigz does. The compressed
+blocks are written in order. Each block is a complete gzip member, bz2
+or xz stream, or zstd frame, and the usual tools decompress such
+concatenated blocks as one file. The zlib, bz2, and lzma modules
+release the global interpreter lock while they work, so the blocks
+are compressed on all CPUs at once.
+
+'''
+
+
+import bz2
+import collections
+import concurrent.futures
+import io
+import lzma
+import os
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+# Size of the uncompressed blocks.
+block_size = 1024**2
+
+
+def _gzip(data):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _zstd(data):  # pragma: no cover
+    return zstandard.ZstdCompressor().compress(data)
+
+
+compressors = {
+    'gzip': _gzip,
+    'bzip2': bz2.compress,
+    'xz': lzma.compress,
+}
+if zstandard is not None:  # pragma: no cover
+    compressors['zstd'] = _zstd
+
+_suffixes = {
+    '.gz': 'gzip',
+    '.bz2': 'bzip2',
+    '.xz': 'xz',
+    '.zst': 'zstd',
+}
+
+
+def compression_for_filename(filename):
+    '''Return the compression format a file name suggests, or None.'''
+    return _suffixes.get(os.path.splitext(filename or '')[1])
+
+
+class CompressingWriter(io.BufferedIOBase):
+
+    '''A binary file that compresses what is written to it.
+
+    The compressed data is written to the binary file ``f``, which is
+    closed when this file is. ``compression`` is one of the keys of
+    ``compressors``. Blocks are compressed in ``threads`` threads, or
+    one per CPU, and at most twice that many blocks wait to be
+    written.
+
+    ``flush`` writes out the blocks that are full, but keeps the last
+    one, since compressing small blocks would compress badly. Only
+    ``close`` compresses the rest.
+
+    '''
+
+    def __init__(self, f, compression, threads=None):
+        io.BufferedIOBase.__init__(self)
+        self._f = f
+        self._compress = compressors[compression]
+        threads = threads or os.cpu_count() or 1
+        self._executor = concurrent.futures.ThreadPoolExecutor(threads)
+        self._max_pending = 2 * threads
+        self._pending = collections.deque()
+        self._buffer = []
+        self._buffered = 0
+        self._blocks = 0
+
+    @property
+    def name(self):
+        return self._f.name
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError('write to closed file')
+        data = bytes(data)
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= block_size:
+            self._submit()
+        return len(data)
+
+    def flush(self):
+        if not self.closed:
+            self._write_compressed(0)
+            self._f.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            # An empty file would not be valid compressed data.
+            if self._buffered or not self._blocks:
+                self._submit()
+            self.flush()
+        finally:
+            self._executor.shutdown()
+            self._pending.clear()
+            try:
+                io.BufferedIOBase.close(self)
+            finally:
+                self._f.close()
+
+    def _submit(self):
+        block = b''.join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self._blocks += 1
+        self._pending.append(self._executor.submit(self._compress, block))
+        self._write_compressed(self._max_pending)
+        while self._pending and self._pending[0].done():
+            self._f.write(self._pending.popleft().result())
+
+    def _write_compressed(self, keep):
+        # Write compressed blocks in order, until at most ``keep`` are
+        # still being compressed.
+        while len(self._pending) > keep:
+            self._f.write(self._pending.popleft().result())
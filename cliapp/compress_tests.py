@@ -0,0 +1,79 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import bz2
+import gzip
+import io
+import lzma
+import unittest
+
+import cliapp.compress
+
+
+class ClosingBytesIO(io.BytesIO):
+
+    def close(self):
+        self.value = self.getvalue()
+        io.BytesIO.close(self)
+
+
+class CompressingWriterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.block_size = cliapp.compress.block_size
+        cliapp.compress.block_size = 1000
+
+    def tearDown(self):
+        cliapp.compress.block_size = self.block_size
+
+    def compress(self, compression, pieces):
+        f = ClosingBytesIO()
+        writer = cliapp.compress.CompressingWriter(f, compression, threads=3)
+        for piece in pieces:
+            writer.write(piece)
+        writer.close()
+        return f.value
+
+    def test_compresses_blocks_in_order(self):
+        pieces = [b'line %d\n' % i for i in range(5000)]
+        for compression, decompress in [('gzip', gzip.decompress),
+                                        ('bzip2', bz2.decompress),
+                                        ('xz', lzma.decompress)]:
+            data = self.compress(compression, pieces)
+            self.assertEqual(decompress(data), b''.join(pieces))
+
+    def test_writes_valid_empty_file(self):
+        self.assertEqual(gzip.decompress(self.compress('gzip', [])), b'')
+
+    def test_flush_keeps_partial_block(self):
+        f = ClosingBytesIO()
+        writer = cliapp.compress.CompressingWriter(f, 'gzip')
+        writer.write(b'x' * 1500)
+        writer.flush()
+        self.assertEqual(gzip.decompress(f.getvalue()), b'x' * 1500)
+        writer.write(b'y')
+        writer.flush()
+        self.assertEqual(gzip.decompress(f.getvalue()), b'x' * 1500)
+        writer.close()
+        self.assertEqual(gzip.decompress(f.value), b'x' * 1500 + b'y')
+
+    def test_chooses_compression_from_suffix(self):
+        self.assertEqual(
+            cliapp.compress.compression_for_filename('foo.txt.xz'), 'xz')
+        self.assertEqual(
+            cliapp.compress.compression_for_filename('foo.txt'), None)
+        self.assertEqual(cliapp.compress.compression_for_filename(''), None)
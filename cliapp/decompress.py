@@ -0,0 +1,192 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Decompress input files in a background thread.
+
+Compressed files are recognised by their first bytes. The
+decompression happens in a separate thread, which hands blocks of
+decompressed data to the reader through a bounded queue. The zlib,
+bz2, and lzma modules release the global interpreter lock while they
+work, so decompression overlaps with processing the data. No block is
+larger than ``block_size`` bytes, however well the data compresses.
+
+'''
+
+
+import bz2
+import io
+import lzma
+import queue
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+# Size of the compressed blocks read by the thread, and the largest
+# decompressed block it hands to the reader.
+block_size = 256 * 1024
+
+# Number of decompressed blocks that may wait in the queue.
+queue_size = 16
+
+
+def _new_zstd_decompressor():  # pragma: no cover
+    return zstandard.ZstdDecompressor().decompressobj()
+
+
+_formats = [
+    (b'\x1f\x8b', lambda: zlib.decompressobj(16 + zlib.MAX_WBITS)),
+    (b'BZh', bz2.BZ2Decompressor),
+    (b'\xfd7zXZ\x00', lambda: lzma.LZMADecompressor(lzma.FORMAT_XZ)),
+]
+if zstandard is not None:  # pragma: no cover
+    _formats.append((b'\x28\xb5\x2f\xfd', _new_zstd_decompressor))
+
+# Number of bytes needed to recognise any supported format.
+magic_size = max(len(magic) for magic, _ in _formats)
+
+
+def detect(header):
+    '''Return a decompressor factory for data starting with ``header``.
+
+    Return None if the data does not look compressed in a supported
+    format.
+
+    '''
+
+    for magic, new_decompressor in _formats:
+        if header.startswith(magic):
+            return new_decompressor
+    return None
+
+
+def _decompressed(decompressor, data):
+    # Yield the decompressed data in blocks of at most block_size
+    # bytes. The zlib decompressor keeps the input it did not use in
+    # unconsumed_tail, the bz2 and lzma ones keep it themselves, and
+    # tell with needs_input whether they have more output.
+    if hasattr(decompressor, 'needs_input'):
+        yield decompressor.decompress(data, block_size)
+        while not decompressor.eof and not decompressor.needs_input:
+            yield decompressor.decompress(b'', block_size)
+    elif hasattr(decompressor, 'unconsumed_tail'):
+        output = decompressor.decompress(data, block_size)
+        yield output
+        while not decompressor.eof and (decompressor.unconsumed_tail or
+                                        len(output) == block_size):
+            output = decompressor.decompress(
+                decompressor.unconsumed_tail, block_size)
+            yield output
+    else:  # pragma: no cover
+        yield decompressor.decompress(data)
+
+
+class DecompressingReader(io.RawIOBase):
+
+    '''A raw binary stream of the decompressed contents of a file.
+
+    ``f`` is the compressed file, opened in binary mode, and
+    ``new_decompressor`` a function that returns a new decompressor
+    object with the interface of ``zlib.decompressobj``. Concatenated
+    compressed streams are decompressed one after the other.
+
+    Wrap the reader in ``io.BufferedReader`` for efficient use.
+
+    '''
+
+    def __init__(self, f, new_decompressor):
+        io.RawIOBase.__init__(self)
+        self._file = f
+        self._queue = queue.Queue(queue_size)
+        self._pending = memoryview(b'')
+        self._eof = False
+        self._closing = threading.Event()
+        self._thread = threading.Thread(
+            target=self._decompress, args=(new_decompressor,))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._pending:
+            if self._eof:
+                return 0
+            item = self._queue.get()
+            if item is None:
+                self._eof = True
+                return 0
+            if isinstance(item, BaseException):
+                self._eof = True
+                raise item
+            self._pending = memoryview(item)
+        n = min(len(b), len(self._pending))
+        b[:n] = self._pending[:n]
+        self._pending = self._pending[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._closing.set()
+            while self._thread.is_alive():
+                try:
+                    self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self._file.close()
+        io.RawIOBase.close(self)
+
+    def _decompress(self, new_decompressor):
+        try:
+            decompressor = new_decompressor()
+            fed = False
+            data = self._file.read(block_size)
+            while data and not self._closing.is_set():
+                fed = True
+                for output in _decompressed(decompressor, data):
+                    if self._closing.is_set():
+                        break
+                    if output:
+                        self._put(output)
+                if decompressor.eof:
+                    data = decompressor.unused_data
+                    decompressor = new_decompressor()
+                    fed = False
+                    if not data:
+                        data = self._file.read(block_size)
+                else:
+                    data = self._file.read(block_size)
+            if fed and not decompressor.eof:
+                raise EOFError(
+                    'Compressed file ended before the end-of-stream marker '
+                    'was reached')
+            self._put(None)
+        except BaseException as e:
+            self._put(e)
+
+    def _put(self, item):
+        while not self._closing.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
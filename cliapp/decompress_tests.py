@@ -0,0 +1,127 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+
+import cliapp
+import cliapp.decompress
+
+
+class DecompressingReaderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.data = b''.join(b'line %d\n' % i for i in range(20000))
+
+    def read(self, compressed):
+        new_decompressor = cliapp.decompress.detect(compressed)
+        self.assertNotEqual(new_decompressor, None)
+        reader = cliapp.decompress.DecompressingReader(
+            io.BytesIO(compressed), new_decompressor)
+        with io.BufferedReader(reader) as f:
+            return f.read()
+
+    def test_does_not_detect_plain_data(self):
+        self.assertEqual(cliapp.decompress.detect(b'hello'), None)
+
+    def test_decompresses_gzip(self):
+        self.assertEqual(self.read(gzip.compress(self.data)), self.data)
+
+    def test_decompresses_bzip2(self):
+        self.assertEqual(self.read(bz2.compress(self.data)), self.data)
+
+    def test_decompresses_xz(self):
+        self.assertEqual(self.read(lzma.compress(self.data)), self.data)
+
+    def test_decompresses_concatenated_streams(self):
+        compressed = gzip.compress(b'foo\n') + gzip.compress(b'bar\n')
+        self.assertEqual(self.read(compressed), b'foo\nbar\n')
+
+    def test_limits_size_of_decompressed_blocks(self):
+        data = b'\0' * (50 * cliapp.decompress.block_size)
+        for compress in [gzip.compress, bz2.compress, lzma.compress]:
+            compressed = compress(data)
+            reader = cliapp.decompress.DecompressingReader(
+                io.BytesIO(compressed), cliapp.decompress.detect(compressed))
+            sizes = []
+            while True:
+                block = reader.read(len(data))
+                if not block:
+                    break
+                sizes.append(len(block))
+            reader.close()
+            self.assertEqual(sum(sizes), len(data))
+            self.assertEqual(max(sizes), cliapp.decompress.block_size)
+
+    def test_raises_error_for_truncated_file(self):
+        compressed = gzip.compress(self.data)
+        self.assertRaises(EOFError, self.read, compressed[:1000])
+
+    def test_stops_thread_when_closed_early(self):
+        compressed = gzip.compress(self.data * 5)
+        reader = cliapp.decompress.DecompressingReader(
+            io.BytesIO(compressed), cliapp.decompress.detect(compressed))
+        f = io.BufferedReader(reader)
+        self.assertEqual(f.readline(), b'line 0\n')
+        f.close()
+        self.assertFalse(reader._thread.is_alive())
+
+
+class OpenCompressedInputTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.app = cliapp.Application()
+        self.app.settings['input-decompress'] = True
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write(self, basename, data):
+        filename = os.path.join(self.tempdir, basename)
+        with open(filename, 'wb') as f:
+            f.write(data)
+        return filename
+
+    def test_reads_compressed_file_as_text(self):
+        filename = self.write('foo.gz', gzip.compress(b'foo\nbar\n'))
+        with self.app.open_input(filename) as f:
+            self.assertEqual(list(f), ['foo\n', 'bar\n'])
+
+    def test_reads_compressed_file_as_binary(self):
+        filename = self.write('foo.xz', lzma.compress(b'foo\nbar\n'))
+        with self.app.open_input(filename, 'rb') as f:
+            self.assertEqual(f.read(), b'foo\nbar\n')
+
+    def test_reads_plain_file_as_is(self):
+        filename = self.write('foo', b'foo\nbar\n')
+        with self.app.open_input(filename) as f:
+            self.assertEqual(f.mode, 'r')
+            self.assertEqual(list(f), ['foo\n', 'bar\n'])
+
+    def test_does_not_decompress_by_default(self):
+        compressed = gzip.compress(b'foo\n')
+        filename = self.write('foo.gz', compressed)
+        app = cliapp.Application()
+        with app.open_input(filename, 'rb') as f:
+            self.assertEqual(f.read(), compressed)
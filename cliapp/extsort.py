@@ -0,0 +1,199 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Sort more records than fit in memory.
+
+Records are collected in memory until they take up the memory budget.
+They are then sorted, and written to a temporary file as a sorted run.
+Whenever there are ``max_merge`` runs of the same length, they are
+merged into one longer run, so the number of open files only grows
+with the logarithm of the number of records. At the end, the runs are
+merged with ``heapq.merge``. If there are more than ``max_merge``
+runs, groups of them are first merged into longer runs, so that only
+that many files are read at once.
+
+The records are written to the runs with ``pickle``, in batches, so
+they can be any objects that can be pickled, and are compared the
+same way as in memory.
+
+'''
+
+
+import heapq
+import itertools
+import pickle
+import sys
+import tempfile
+
+
+# Most runs that are merged at once.
+max_merge = 64
+
+# Number of records pickled together in a run file.
+batch_size = 1024
+
+# Size of the buffer for reading and writing each run file.
+run_buffer_size = 256 * 1024
+
+
+class ExternalSorter(object):
+
+    '''Sort records, using temporary files if they don't fit in memory.
+
+    Add records with ``add``, then iterate over the sorter to get them
+    in order, or call ``write_to`` to write them to a file. ``key`` and
+    ``reverse`` are as for ``sorted``. Records are kept in memory
+    until their size, as estimated with ``sizeof``, reaches
+    ``memory_budget`` bytes. The default, ``sys.getsizeof``, does not
+    count the objects inside a record, such as the items of a tuple.
+    Temporary files are created in ``tempdir``, or the default
+    directory for them.
+
+    The records can be iterated over only once. The temporary files
+    are removed when the iteration ends. Call ``close`` to remove them
+    without iterating. The ``count`` attribute is the number of records
+    added.
+
+    '''
+
+    def __init__(self, memory_budget, key=None, reverse=False,
+                 tempdir=None, sizeof=sys.getsizeof):
+        self._memory_budget = memory_budget
+        self._sizeof = sizeof
+        self._key = key
+        self._reverse = reverse
+        self._tempdir = tempdir
+        self._records = []
+        self._size = 0
+        self._runs = []
+        self._levels = []
+        self.count = 0
+
+    def add(self, record):
+        '''Add a record to be sorted.'''
+        self._records.append(record)
+        self._size += self._sizeof(record) + 8
+        self.count += 1
+        if self._size >= self._memory_budget:
+            self._spill()
+
+    def __iter__(self):
+        '''Yield all records in order.'''
+        self._sort(self._records)
+        if not self._runs:
+            records = self._records
+            self._records = []
+            self._size = 0
+            return iter(records)
+        if self._records:
+            self._spill()
+        while len(self._runs) > max_merge:
+            self._merge_runs()
+        runs = self._runs
+        self._runs = []
+        self._levels = []
+        return self._merge(runs)
+
+    def write_to(self, f):
+        '''Write all records in order to a file, and return their number.
+
+        The records must be of a type the file accepts.
+
+        '''
+
+        count = 0
+        write = f.write
+        for record in self:
+            write(record)
+            count += 1
+        return count
+
+    def close(self):
+        '''Forget all records, and remove the temporary files.'''
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._levels = []
+        self._records = []
+        self._size = 0
+
+    def _sort(self, records):
+        records.sort(key=self._key, reverse=self._reverse)
+
+    def _spill(self):
+        self._sort(self._records)
+        self._runs.append(self._write_run(self._records))
+        self._levels.append(0)
+        self._records = []
+        self._size = 0
+        self._merge_newest_runs()
+
+    def _merge_newest_runs(self):
+        # The runs are in the order they were made, and the older ones
+        # are at the same or a higher level: a run at level N is
+        # merged from max_merge runs at level N-1.
+        while (len(self._runs) >= max_merge and
+               self._levels[-max_merge] == self._levels[-1]):
+            group = self._runs[-max_merge:]
+            level = self._levels[-1] + 1
+            del self._runs[-max_merge:]
+            del self._levels[-max_merge:]
+            self._runs.append(self._write_run(self._merge(group)))
+            self._levels.append(level)
+
+    def _write_run(self, records):
+        run = tempfile.TemporaryFile(
+            dir=self._tempdir, prefix='cliapp-sort-',
+            buffering=run_buffer_size)
+        records = iter(records)
+        while True:
+            batch = list(itertools.islice(records, batch_size))
+            if not batch:
+                break
+            pickle.dump(batch, run, pickle.HIGHEST_PROTOCOL)
+        run.flush()
+        return run
+
+    def _merge_runs(self):
+        runs = self._runs
+        self._runs = []
+        for i in range(0, len(runs), max_merge):
+            group = runs[i:i + max_merge]
+            self._runs.append(self._write_run(self._merge(group)))
+
+    def _merge(self, runs):
+        # The runs are closed, and so removed, when the merge ends.
+        readers = [_read_run(run) for run in runs]
+        try:
+            merged = heapq.merge(*readers, key=self._key,
+                                 reverse=self._reverse)
+            for record in merged:
+                yield record
+        finally:
+            for run in runs:
+                run.close()
+
+
+def _read_run(run):
+    run.seek(0)
+    while True:
+        try:
+            batch = pickle.load(run)
+        except EOFError:
+            return
+        for record in batch:
+            yield record
@@ -0,0 +1,103 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import cliapp.extsort
+
+
+class ExternalSorterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.max_merge = cliapp.extsort.max_merge
+        self.records = ['%05d\n' % i for i in range(5000)]
+        random.seed(0)
+        random.shuffle(self.records)
+
+    def tearDown(self):
+        cliapp.extsort.max_merge = self.max_merge
+        shutil.rmtree(self.tempdir)
+
+    def sorter(self, memory_budget, **kwargs):
+        return cliapp.extsort.ExternalSorter(
+            memory_budget, tempdir=self.tempdir, **kwargs)
+
+    def test_sorts_in_memory(self):
+        sorter = self.sorter(10**9)
+        for record in self.records:
+            sorter.add(record)
+        self.assertEqual(list(sorter), sorted(self.records))
+        self.assertEqual(os.listdir(self.tempdir), [])
+
+    def test_sorts_with_spilled_runs(self):
+        sorter = self.sorter(10000, key=lambda r: r[::-1], reverse=True)
+        for record in self.records:
+            sorter.add(record)
+        self.assertGreater(len(sorter._runs), 10)
+        self.assertEqual(
+            list(sorter),
+            sorted(self.records, key=lambda r: r[::-1], reverse=True))
+        self.assertEqual(os.listdir(self.tempdir), [])
+
+    def test_merges_runs_in_several_passes(self):
+        cliapp.extsort.max_merge = 3
+        sorter = self.sorter(1000)
+        for record in self.records:
+            sorter.add(record)
+        output = io.StringIO()
+        self.assertEqual(sorter.write_to(output), 5000)
+        self.assertEqual(output.getvalue(), ''.join(sorted(self.records)))
+
+    def test_merges_runs_while_records_are_added(self):
+        cliapp.extsort.max_merge = 4
+        sorter = self.sorter(1000)
+        most_runs = 0
+        for record in self.records:
+            sorter.add(record)
+            most_runs = max(most_runs, len(sorter._runs))
+        # About 300 runs are made, which are five levels of merging.
+        self.assertLess(most_runs, 4 * 5)
+        self.assertEqual(list(sorter), sorted(self.records))
+        self.assertEqual(os.listdir(self.tempdir), [])
+
+    def test_keeps_order_of_equal_records_in_merged_runs(self):
+        cliapp.extsort.max_merge = 3
+        sorter = self.sorter(500, key=lambda r: r[0])
+        records = [(i % 3, i) for i in range(1000)]
+        for record in records:
+            sorter.add(record)
+        self.assertEqual(list(sorter), sorted(records, key=lambda r: r[0]))
+
+    def test_keeps_order_of_equal_records(self):
+        sorter = self.sorter(500, key=lambda r: r[0])
+        records = [(i % 3, i) for i in range(1000)]
+        for record in records:
+            sorter.add(record)
+        self.assertEqual(list(sorter), sorted(records, key=lambda r: r[0]))
+
+    def test_close_removes_runs(self):
+        sorter = self.sorter(1000)
+        for record in self.records:
+            sorter.add(record)
+        sorter.close()
+        self.assertEqual(list(sorter), [])
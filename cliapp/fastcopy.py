@@ -0,0 +1,134 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Copy data from one file to another without passing it through Python.
+
+When one of the files is a pipe, the data is moved with ``os.splice``,
+and otherwise with ``os.sendfile``, so the kernel copies it, and
+Python is only entered once for each block. Where neither works, for
+example because the system does not support them for those kinds of
+files, the data is read and written in large blocks instead.
+
+'''
+
+
+import errno
+import io
+import os
+import stat
+
+
+# Most bytes moved by one system call.
+block_size = 1024**2
+
+
+# Errors that mean a way of copying does not work for the files.
+_unsupported = set([errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP,
+                    errno.ENOTSOCK, errno.EXDEV, errno.ESPIPE])
+
+
+def copy(src, dst):
+    '''Copy the rest of binary file ``src`` to binary file ``dst``.
+
+    Data already read into the buffer of ``src`` is written first.
+    ``dst`` is flushed before the rest is copied. The data is copied
+    by the kernel only if both files are plain files of the operating
+    system, possibly buffered, and not, for example, decompressing
+    readers. Return the number of bytes copied.
+
+    '''
+
+    dst.flush()
+    total = 0
+    in_fd = _raw_fileno(src)
+    out_fd = _raw_fileno(dst)
+    if in_fd is None or out_fd is None:
+        while True:
+            data = src.read(block_size)
+            if not data:
+                break
+            dst.write(data)
+            total += len(data)
+        return total
+
+    if isinstance(src, io.BufferedReader):
+        data = src.read(len(src.peek(1)))
+        if data:
+            dst.write(data)
+            dst.flush()
+            total += len(data)
+    return total + copy_fd(in_fd, out_fd)
+
+
+def copy_fd(in_fd, out_fd):
+    '''Copy data between two file descriptors, until end of file.
+
+    Return the number of bytes copied.
+
+    '''
+
+    total = 0
+    for move in _fast_ways(in_fd, out_fd):
+        try:
+            while True:
+                count = move(in_fd, out_fd)
+                if count == 0:
+                    return total
+                total += count
+        except OSError as e:
+            if e.errno not in _unsupported:
+                raise
+
+    while True:
+        data = os.read(in_fd, block_size)
+        if not data:
+            return total
+        view = memoryview(data)
+        while view:
+            view = view[os.write(out_fd, view):]
+        total += len(data)
+
+
+def _raw_fileno(f):
+    if isinstance(f, io.TextIOWrapper):
+        f = f.buffer
+    if isinstance(f, (io.BufferedReader, io.BufferedWriter)):
+        f = f.raw
+    if type(f) is not io.FileIO:
+        return None
+    return f.fileno()
+
+
+def _fast_ways(in_fd, out_fd):
+    ways = []
+    if hasattr(os, 'splice') and (_is_pipe(in_fd) or _is_pipe(out_fd)):
+        ways.append(_splice)
+    if hasattr(os, 'sendfile'):
+        ways.append(_sendfile)
+    return ways
+
+
+def _is_pipe(fd):
+    return stat.S_ISFIFO(os.fstat(fd).st_mode)
+
+
+def _splice(in_fd, out_fd):
+    return os.splice(in_fd, out_fd, block_size)
+
+
+def _sendfile(in_fd, out_fd):
+    return os.sendfile(out_fd, in_fd, None, block_size)
@@ -0,0 +1,97 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+import cliapp.fastcopy
+
+
+class CopyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.data = b''.join(b'line %d\n' % i for i in range(100000))
+        self.src = os.path.join(self.tempdir, 'src')
+        self.dst = os.path.join(self.tempdir, 'dst')
+        with open(self.src, 'wb') as f:
+            f.write(self.data)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def read_dst(self):
+        with open(self.dst, 'rb') as f:
+            return f.read()
+
+    def test_copies_file_to_file(self):
+        with open(self.src, 'rb') as src, open(self.dst, 'wb') as dst:
+            count = cliapp.fastcopy.copy(src, dst)
+        self.assertEqual(count, len(self.data))
+        self.assertEqual(self.read_dst(), self.data)
+
+    def test_copies_rest_of_partly_read_file(self):
+        with open(self.src, 'rb') as src, open(self.dst, 'wb') as dst:
+            first = src.readline()
+            dst.write(b'header\n')
+            cliapp.fastcopy.copy(src, dst)
+        self.assertEqual(first, b'line 0\n')
+        self.assertEqual(self.read_dst(), b'header\n' + self.data[7:])
+
+    def test_copies_file_to_pipe(self):
+        read_fd, write_fd = os.pipe()
+        received = []
+
+        def read_all():
+            with io.open(read_fd, 'rb') as f:
+                received.append(f.read())
+
+        thread = threading.Thread(target=read_all)
+        thread.start()
+        with open(self.src, 'rb') as src, io.open(write_fd, 'wb') as dst:
+            cliapp.fastcopy.copy(src, dst)
+        thread.join()
+        self.assertEqual(received, [self.data])
+
+    def test_copies_pipe_to_file(self):
+        read_fd, write_fd = os.pipe()
+
+        def write_all():
+            with io.open(write_fd, 'wb') as f:
+                f.write(self.data)
+
+        thread = threading.Thread(target=write_all)
+        thread.start()
+        with io.open(read_fd, 'rb') as src, open(self.dst, 'wb') as dst:
+            cliapp.fastcopy.copy(src, dst)
+        thread.join()
+        self.assertEqual(self.read_dst(), self.data)
+
+    def test_copies_between_file_objects_without_descriptors(self):
+        dst = io.BytesIO()
+        count = cliapp.fastcopy.copy(io.BytesIO(self.data), dst)
+        self.assertEqual(count, len(self.data))
+        self.assertEqual(dst.getvalue(), self.data)
+
+    def test_falls_back_to_reading_and_writing(self):
+        with open(self.src, 'rb') as src, open(self.dst, 'ab') as dst:
+            cliapp.fastcopy.copy_fd(src.fileno(), dst.fileno())
+        self.assertEqual(self.read_dst(), self.data)
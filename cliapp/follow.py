@@ -0,0 +1,377 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Follow input files as they grow, like ``tail -F``.
+
+On Linux, the files are watched with inotify, through ctypes, so new
+lines are noticed as soon as they are written. The inotify descriptor
+and any pipes are waited on with a single selector, however many
+files there are. Elsewhere, the files are polled, less often when
+nothing happens, up to once every ``poll_interval`` seconds.
+
+A file that is replaced by a new file with the same name, as when a
+log file is rotated, is read to its end, and then the new file is
+opened. A file that shrinks is read again from the start.
+
+With the ``follow`` setting, process_inputs reads all input files to
+the end, and then processes lines as they are added, until
+stop_following is called. Lines are read in binary mode and decoded
+one by one. collect_input_result is called for the files only when
+following stops. Following is refused if the application class
+defines process_input, since process_input is not called for the
+lines.
+
+'''
+
+
+import collections
+import ctypes
+import ctypes.util
+import errno
+import io
+import os
+import selectors
+import struct
+import sys
+
+
+# Longest time between checks for new data, in seconds.
+poll_interval = 1.0
+
+# Shortest time between polls, when inotify is not available.
+min_poll_interval = 0.05
+
+# Size of reads from the files.
+block_size = 1024**2
+
+
+_IN_MODIFY = 0x00000002
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_event_header = struct.Struct('iIII')
+
+
+class _Inotify(object):
+
+    def __init__(self, libc):
+        self._libc = libc
+        self.fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            self._raise_error(None)
+
+    def add_watch(self, path, mask):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            self._raise_error(path)
+        return wd
+
+    def rm_watch(self, wd):
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        '''Return the pending events as (wd, mask, name) tuples.'''
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                raise
+            pos = 0
+            while pos < len(data):
+                wd, mask, _, length = _event_header.unpack_from(data, pos)
+                pos += _event_header.size
+                name = data[pos:pos + length].rstrip(b'\0')
+                pos += length
+                events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+    def _raise_error(self, path):
+        code = ctypes.get_errno()
+        raise OSError(code, os.strerror(code), path)
+
+
+def _new_inotify():
+    if not sys.platform.startswith('linux'):  # pragma: no cover
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        return _Inotify(libc)
+    except (OSError, AttributeError):  # pragma: no cover
+        return None
+
+
+class _FileSource(object):
+
+    '''A regular file being followed.'''
+
+    def __init__(self, name, fileno):
+        self.name = name
+        self.fileno = fileno
+        self.lineno = 0
+        self.file = None
+        self.identity = None
+        self.offset = 0
+        self.partial = b''
+
+    def open(self):
+        self.file = io.open(self.name, 'rb', buffering=0)
+        st = os.fstat(self.file.fileno())
+        self.identity = (st.st_dev, st.st_ino)
+        self.offset = 0
+        self.partial = b''
+
+    def close(self):
+        self.file.close()
+
+    def replaced(self):
+        try:
+            st = os.stat(self.name)
+        except OSError:
+            return False
+        return (st.st_dev, st.st_ino) != self.identity
+
+    def read(self):
+        '''Yield (offset, data) pairs of new complete lines.'''
+        size = os.fstat(self.file.fileno()).st_size
+        if size < self.offset + len(self.partial):
+            self.file.seek(0)
+            self.offset = 0
+            self.partial = b''
+        while True:
+            data = self.file.read(block_size)
+            if not data:
+                break
+            for item in self._complete_lines(data):
+                yield item
+
+    def flush(self):
+        '''Yield the last line, if it has no newline at the end.'''
+        if self.partial:
+            yield self.offset, self.partial
+            self.offset += len(self.partial)
+            self.partial = b''
+
+    def _complete_lines(self, data):
+        data = self.partial + data
+        end = data.rfind(b'\n') + 1
+        self.partial = data[end:]
+        if end:
+            yield self.offset, data[:end]
+            self.offset += end
+
+
+class _StreamSource(_FileSource):
+
+    '''A pipe or terminal being followed, such as the standard input.
+
+    It is never opened, closed, or replaced: it is only read, until
+    its end.
+
+    '''
+
+    def __init__(self, name, fileno, fd):
+        _FileSource.__init__(self, name, fileno)
+        self.fd = fd
+        self.eof = False
+
+    def read(self):
+        data = os.read(self.fd, block_size)
+        if data:
+            return self._complete_lines(data)
+        self.eof = True
+        return self.flush()
+
+
+class Follower(object):
+
+    '''Follow input files, giving new lines to a callback.
+
+    ``callback`` is called as ``callback(source, offset, data)``,
+    where ``data`` is a bytes object of one or more complete lines
+    that start at byte ``offset`` in the file. ``source`` has the
+    attributes ``name``, ``fileno``, and ``lineno``; the last one is
+    for the callback to keep track of line numbers in the file.
+
+    Add files with ``add``, and then call ``run``, which returns after
+    ``stop`` has been called. ``stop`` may be called from the
+    callback, another thread, or a signal handler.
+
+    '''
+
+    def __init__(self, callback, use_inotify=True):
+        self._callback = callback
+        self._sources = []
+        self._streams = {}
+        self._selector = selectors.DefaultSelector()
+        self._wake_r, self._wake_w = os.pipe()
+        self._selector.register(self._wake_r, selectors.EVENT_READ)
+        self._inotify = _new_inotify() if use_inotify else None
+        if self._inotify is not None:
+            self._selector.register(self._inotify.fd, selectors.EVENT_READ)
+        self._file_watches = collections.defaultdict(set)
+        self._dir_watches = {}
+        self._stopped = False
+        self._got_data = False
+
+    def add(self, name, fileno):
+        '''Add a file to follow. ``-`` means the standard input.'''
+        if name == '-':
+            source = _StreamSource(name, fileno, sys.stdin.fileno())
+            self._streams[source.fd] = source
+            self._selector.register(source.fd, selectors.EVENT_READ)
+        else:
+            source = _FileSource(name, fileno)
+            source.open()
+            self._watch(source)
+        self._sources.append(source)
+        return source
+
+    def stop(self):
+        '''Make ``run`` return, after reading the files once more.'''
+        self._stopped = True
+        try:
+            os.write(self._wake_w, b'x')
+        except OSError:
+            # run has already returned and closed the pipe.
+            pass
+
+    def run(self):
+        '''Process new lines until ``stop`` is called.'''
+        try:
+            for source in self._files():
+                self._read(source)
+            self._wait()
+            # Data may have been added since the files were last read.
+            for source in self._files():
+                self._read(source)
+            for source in self._sources:
+                self._give(source, source.flush())
+        finally:
+            self._close()
+
+    def _files(self):
+        return [s for s in self._sources
+                if not isinstance(s, _StreamSource)]
+
+    def _wait(self):
+        if self._inotify is not None:
+            timeout = poll_interval
+        else:
+            timeout = min_poll_interval
+        while not self._stopped:
+            self._got_data = False
+            changed = set()
+            events = self._selector.select(timeout)
+            if not events:
+                changed.update(self._files())
+            for key, _ in events:
+                if key.fd == self._wake_r:
+                    os.read(self._wake_r, 4096)
+                elif self._inotify is not None and key.fd == self._inotify.fd:
+                    changed.update(self._changed_files())
+                else:
+                    self._read_stream(self._streams[key.fd])
+            for source in changed:
+                self._check(source)
+            if self._inotify is None:
+                if self._got_data:
+                    timeout = min_poll_interval
+                else:
+                    timeout = min(timeout * 2, poll_interval)
+
+    def _changed_files(self):
+        changed = set()
+        for wd, mask, name in self._inotify.read_events():
+            if mask & _IN_Q_OVERFLOW:
+                changed.update(self._files())
+            elif wd in self._dir_watches:
+                dirname = self._dir_watches[wd]
+                changed.update(
+                    s for s in self._files()
+                    if os.path.dirname(os.path.abspath(s.name)) == dirname and
+                    os.path.basename(s.name) == name)
+            else:
+                changed.update(self._file_watches.get(wd, ()))
+        return changed
+
+    def _check(self, source):
+        if source.replaced():
+            self._read(source)
+            self._give(source, source.flush())
+            self._unwatch(source)
+            source.close()
+            try:
+                source.open()
+            except (IOError, OSError):
+                # The new file went away already. Wait for another one
+                # to appear.
+                source.file = io.open(os.devnull, 'rb', buffering=0)
+            self._watch(source)
+        self._read(source)
+
+    def _read(self, source):
+        self._give(source, source.read())
+
+    def _read_stream(self, source):
+        self._read(source)
+        if source.eof:
+            self._selector.unregister(source.fd)
+            del self._streams[source.fd]
+
+    def _give(self, source, items):
+        for offset, data in items:
+            self._got_data = True
+            self._callback(source, offset, data)
+
+    def _watch(self, source):
+        if self._inotify is None:
+            return
+        try:
+            wd = self._inotify.add_watch(source.name, _IN_MODIFY)
+        except OSError:
+            pass
+        else:
+            self._file_watches[wd].add(source)
+        dirname = os.path.dirname(os.path.abspath(source.name))
+        if dirname not in self._dir_watches.values():
+            wd = self._inotify.add_watch(dirname, _IN_CREATE | _IN_MOVED_TO)
+            self._dir_watches[wd] = dirname
+
+    def _unwatch(self, source):
+        for wd, sources in list(self._file_watches.items()):
+            sources.discard(source)
+            if not sources:
+                del self._file_watches[wd]
+                self._inotify.rm_watch(wd)
+
+    def _close(self):
+        for source in self._files():
+            source.close()
+        if self._inotify is not None:
+            self._inotify.close()
+        self._selector.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
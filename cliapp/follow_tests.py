@@ -0,0 +1,275 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import errno
+import io
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import cliapp
+import cliapp.follow
+
+
+class FollowerTests(unittest.TestCase):
+
+    use_inotify = True
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, 'log')
+        self.append(b'a\nb\n')
+        self.data = queue.Queue()
+        self.follower = cliapp.follow.Follower(
+            self.callback, use_inotify=self.use_inotify)
+        self.follower.add(self.filename, 1)
+        self.thread = threading.Thread(target=self.follower.run)
+        self.thread.start()
+
+    def tearDown(self):
+        self.follower.stop()
+        self.thread.join()
+        shutil.rmtree(self.tempdir)
+
+    def callback(self, source, offset, data):
+        self.data.put((source.name, offset, data))
+
+    def append(self, data, filename=None):
+        with open(filename or self.filename, 'ab') as f:
+            f.write(data)
+
+    def next_data(self):
+        return self.data.get(timeout=5)[1:]
+
+    def test_reads_existing_and_appended_lines(self):
+        self.assertEqual(self.next_data(), (0, b'a\nb\n'))
+        self.append(b'c\n')
+        self.assertEqual(self.next_data(), (4, b'c\n'))
+
+    def test_waits_for_end_of_line(self):
+        self.next_data()
+        self.append(b'c')
+        self.append(b'd\n')
+        self.assertEqual(self.next_data(), (4, b'cd\n'))
+
+    def test_gives_last_partial_line_when_stopped(self):
+        self.next_data()
+        self.append(b'c')
+        self.follower.stop()
+        self.assertEqual(self.next_data(), (4, b'c'))
+
+    def test_follows_rotated_file(self):
+        self.next_data()
+        os.rename(self.filename, self.filename + '.1')
+        self.append(b'old\n', self.filename + '.1')
+        self.append(b'new\n')
+        self.assertEqual(self.next_data(), (4, b'old\n'))
+        self.assertEqual(self.next_data(), (0, b'new\n'))
+
+    def test_waits_for_rotated_file_that_cannot_be_opened(self):
+        self.next_data()
+        source = self.follower._sources[0]
+        os.rename(self.filename, self.filename + '.1')
+        self.append(b'old\n', self.filename + '.1')
+        # A directory can be found, but not opened, even by root.
+        os.mkdir(self.filename)
+        self.assertEqual(self.next_data(), (4, b'old\n'))
+        deadline = time.time() + 5
+        while source.file.name != os.devnull and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(source.file.name, os.devnull)
+        os.rmdir(self.filename)
+        self.append(b'new\n')
+        self.assertEqual(self.next_data(), (0, b'new\n'))
+
+    def test_reads_truncated_file_from_start(self):
+        self.next_data()
+        with open(self.filename, 'wb') as f:
+            f.write(b'x\n')
+        self.assertEqual(self.next_data(), (0, b'x\n'))
+
+
+class PollingFollowerTests(FollowerTests):
+
+    use_inotify = False
+
+
+class StreamFollowerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.data = queue.Queue()
+        read_fd, self.write_fd = os.pipe()
+        stdin = sys.stdin
+        sys.stdin = os.fdopen(read_fd, 'rb')
+        try:
+            self.follower = cliapp.follow.Follower(self.callback)
+            self.follower.add('-', 1)
+        finally:
+            self.stdin, sys.stdin = sys.stdin, stdin
+        self.thread = threading.Thread(target=self.follower.run)
+        self.thread.start()
+
+    def tearDown(self):
+        self.follower.stop()
+        self.thread.join()
+        self.stdin.close()
+        if self.write_fd is not None:
+            os.close(self.write_fd)
+
+    def callback(self, source, offset, data):
+        self.data.put((source.name, offset, data))
+
+    def test_follows_pipe_until_it_is_closed(self):
+        os.write(self.write_fd, b'a\nb')
+        self.assertEqual(self.data.get(timeout=5), ('-', 0, b'a\n'))
+        os.close(self.write_fd)
+        self.write_fd = None
+        self.assertEqual(self.data.get(timeout=5), ('-', 2, b'b'))
+
+
+class FollowerPartsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, 'log')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_removed_file_is_not_replaced(self):
+        with open(self.filename, 'wb'):
+            pass
+        source = cliapp.follow._FileSource(self.filename, 1)
+        source.open()
+        os.remove(self.filename)
+        self.assertFalse(source.replaced())
+        source.close()
+
+    def test_inotify_reports_errors(self):
+        inotify = cliapp.follow._new_inotify()
+        self.assertRaises(
+            OSError, inotify.add_watch, self.filename,
+            cliapp.follow._IN_MODIFY)
+        inotify.close()
+        try:
+            inotify.read_events()
+        except OSError as e:
+            self.assertEqual(e.errno, errno.EBADF)
+        else:
+            self.fail('read_events did not fail')
+
+    def test_inotify_reports_failure_to_start(self):
+
+        class FailingLibc(object):
+
+            def inotify_init1(self, flags):
+                return -1
+
+        self.assertRaises(OSError, cliapp.follow._Inotify, FailingLibc())
+
+    def test_follows_missing_file_by_its_directory(self):
+        follower = cliapp.follow.Follower(lambda *args: None)
+        source = cliapp.follow._FileSource(self.filename, 1)
+        follower._watch(source)
+        self.assertEqual(dict(follower._file_watches), {})
+        self.assertEqual(list(follower._dir_watches.values()), [self.tempdir])
+        follower._close()
+
+    def test_checks_all_files_when_inotify_queue_overflows(self):
+        with open(self.filename, 'wb'):
+            pass
+        follower = cliapp.follow.Follower(lambda *args: None)
+        source = follower.add(self.filename, 1)
+        follower._inotify.read_events = (
+            lambda: [(-1, cliapp.follow._IN_Q_OVERFLOW, '')])
+        self.assertEqual(follower._changed_files(), set([source]))
+        follower._close()
+
+    def test_stop_after_run_does_nothing(self):
+        follower = cliapp.follow.Follower(lambda *args: None)
+        follower.stop()
+        follower.run()
+        follower.stop()
+
+
+class FollowApplicationTests(unittest.TestCase):
+
+    def test_processes_lines_until_stopped(self):
+        lines = []
+
+        class App(cliapp.Application):
+
+            def process_input_line(self, name, line):
+                lines.append((self.fileno, self.lineno, line))
+                if line == 'stop\n':
+                    self.stop_following()
+
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'foo\nstop\nbar')
+            f.flush()
+            app = App()
+            app.settings['follow'] = True
+            app.process_inputs([f.name])
+        self.assertEqual(
+            lines, [(1, 1, 'foo\n'), (1, 2, 'stop\n'), (1, 3, 'bar')])
+        self.assertEqual(app.global_lineno, 3)
+
+    def test_flushes_output_after_new_lines(self):
+        flushed = []
+
+        class Output(io.StringIO):
+
+            def flush(self):
+                flushed.append(self.getvalue())
+
+        class App(cliapp.Application):
+
+            def process_input_line(self, name, line):
+                self.output.write(line)
+                if line == 'stop\n':
+                    self.stop_following()
+
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'foo\nstop\n')
+            f.flush()
+            app = App()
+            app.output = Output()
+            app.settings['follow'] = True
+            app.process_inputs([f.name])
+        self.assertEqual(flushed, ['foo\nstop\n'])
+
+    def test_refuses_to_follow_with_process_input(self):
+
+        class App(cliapp.Application):
+
+            def process_input(self, name, stdin=sys.stdin):
+                pass
+
+        app = App()
+        app.settings['follow'] = True
+        self.assertRaises(cliapp.AppException, app.process_inputs, ['foo'])
+
+    def test_refuses_to_follow_with_jobs(self):
+        app = cliapp.Application()
+        app.settings['follow'] = True
+        app.settings['jobs'] = 2
+        self.assertRaises(cliapp.AppException, app.process_inputs, ['foo'])
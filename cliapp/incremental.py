@@ -0,0 +1,114 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Remember which input files have been processed, and their results.
+
+The index is an SQLite database, keyed by the absolute path of each
+file, stored as bytes so that names that are not valid UTF-8 work too.
+A file is unchanged if its device, inode, size, and modification time
+are the same as when it was processed. Looking up a file is a single
+primary key lookup, so the cost does not depend on how many files the
+index has.
+
+With the ``incremental`` setting, process_inputs skips regular files
+that have not changed, and gives the results that collect_input_result
+returned for them to merge_input_result again. Skipped files are not
+counted in ``fileno`` or the line counters. The index is updated only
+when all input files have been processed successfully.
+
+'''
+
+
+import os
+import pickle
+import sqlite3
+import stat
+import time
+
+
+# Files modified less than this many nanoseconds before they were
+# looked at may still be changing within the same timestamp, so they
+# are not recorded.
+racy_interval = 2 * 10**9
+
+
+def signature(name):
+    '''Return the stat signature of a regular file, or None.'''
+    try:
+        st = os.stat(name)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+class StatIndex(object):
+
+    '''An index of processed files, stored in the database ``filename``.
+
+    Results of processing files are stored pickled. Changes are kept
+    in memory until ``save`` is called.
+
+    '''
+
+    def __init__(self, filename):
+        self._db = sqlite3.connect(filename)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            'path BLOB PRIMARY KEY, dev INTEGER, ino INTEGER, '
+            'size INTEGER, mtime_ns INTEGER, results BLOB)')
+        self._updates = {}
+
+    def cached_results(self, name):
+        '''Return the stored results for an unchanged file, or None.
+
+        If the file has changed, or is not in the index, remember its
+        current signature, so that ``add_result`` can record new
+        results for it.
+
+        '''
+
+        sig = signature(name)
+        if sig is None:
+            return None
+        path = os.fsencode(os.path.abspath(name))
+        row = self._db.execute(
+            'SELECT dev, ino, size, mtime_ns, results FROM files '
+            'WHERE path = ?', (path,)).fetchone()
+        if row is not None and tuple(row[:4]) == sig:
+            return pickle.loads(row[4])
+        if time.time_ns() - sig[3] >= racy_interval:
+            self._updates[name] = (path, sig, [])
+        return None
+
+    def add_result(self, name, result):
+        '''Record a result of processing a file.'''
+        if name in self._updates:
+            self._updates[name][2].append(result)
+
+    def save(self):
+        '''Write the recorded results to the database.'''
+        with self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)',
+                [(path,) + sig + (pickle.dumps(results, -1),)
+                 for path, sig, results in self._updates.values()])
+        self._updates = {}
+
+    def close(self):
+        self._db.close()
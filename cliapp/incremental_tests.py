@@ -0,0 +1,140 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import cliapp
+import cliapp.incremental
+
+
+def write_file(filename, data, age=10):
+    with open(filename, 'w') as f:
+        f.write(data)
+    mtime = os.stat(filename).st_mtime - age
+    os.utime(filename, (mtime, mtime))
+
+
+class StatIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.dbname = os.path.join(self.tempdir, 'index')
+        self.filename = os.path.join(self.tempdir, 'foo')
+        write_file(self.filename, 'foo\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def store(self, *results):
+        index = cliapp.incremental.StatIndex(self.dbname)
+        self.assertEqual(index.cached_results(self.filename), None)
+        for result in results:
+            index.add_result(self.filename, result)
+        index.save()
+        index.close()
+
+    def lookup(self):
+        index = cliapp.incremental.StatIndex(self.dbname)
+        try:
+            return index.cached_results(self.filename)
+        finally:
+            index.close()
+
+    def test_returns_stored_results_for_unchanged_file(self):
+        self.store({'count': 1}, {'count': 2})
+        self.assertEqual(self.lookup(), [{'count': 1}, {'count': 2}])
+
+    def test_returns_none_for_changed_file(self):
+        self.store(1)
+        write_file(self.filename, 'foobar\n')
+        self.assertEqual(self.lookup(), None)
+
+    def test_returns_none_for_missing_file(self):
+        os.remove(self.filename)
+        self.assertEqual(self.lookup(), None)
+
+    def test_stores_name_that_is_not_utf8(self):
+        self.filename = os.path.join(self.tempdir, os.fsdecode(b'l\xe9'))
+        write_file(self.filename, 'foo\n')
+        self.store(1)
+        self.assertEqual(self.lookup(), [1])
+
+    def test_does_not_store_recently_modified_file(self):
+        write_file(self.filename, 'foo\n', age=0)
+        self.store(1)
+        self.assertEqual(self.lookup(), None)
+
+
+class CountingApp(cliapp.Application):
+
+    def __init__(self):
+        cliapp.Application.__init__(self)
+        self.processed = []
+        self.merged = []
+        self.count = 0
+
+    def process_input_line(self, name, line):
+        self.count += 1
+
+    def collect_input_result(self, name):
+        self.processed.append(os.path.basename(name))
+        count = self.count
+        self.count = 0
+        return count
+
+    def merge_input_result(self, name, result):
+        self.merged.append((os.path.basename(name), result))
+
+
+class IncrementalTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.names = []
+        for name, lines in [('foo', 1), ('bar', 2)]:
+            filename = os.path.join(self.tempdir, name)
+            write_file(filename, 'x\n' * lines)
+            self.names.append(filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def process(self):
+        app = CountingApp()
+        app.settings['incremental'] = os.path.join(self.tempdir, 'index')
+        app.process_inputs(self.names)
+        return app
+
+    def test_skips_unchanged_files_and_replays_results(self):
+        self.process()
+        write_file(self.names[1], 'x\n' * 3)
+        app = self.process()
+        self.assertEqual(app.processed, ['bar'])
+        self.assertEqual(app.merged, [('foo', 1), ('bar', 3)])
+        self.assertEqual(app.fileno, 1)
+
+    def test_does_not_update_index_if_processing_fails(self):
+        app = CountingApp()
+        app.settings['incremental'] = os.path.join(self.tempdir, 'index')
+        self.assertRaises(
+            IOError, app.process_inputs,
+            self.names + [os.path.join(self.tempdir, 'missing')])
+        app = self.process()
+        self.assertEqual(app.processed, ['foo', 'bar'])
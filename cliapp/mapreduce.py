@@ -0,0 +1,282 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''An Application that aggregates input lines by key, on all CPUs.'''
+
+
+import collections
+import concurrent.futures
+import heapq
+import io
+import itertools
+import multiprocessing
+import operator
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import zlib
+
+import cliapp
+import cliapp.extsort
+
+
+# Approximate memory used by a dict entry, besides the key and value.
+_entry_size = 100
+
+# Number of items pickled together in a spill file.
+_batch_size = 1024
+
+# The application, in the worker processes of the reduce phase.
+_app = None
+
+
+def _partition(key, count):
+    # Python's own hash of strings changes between runs, so use one
+    # that does not, to get the same output every time.
+    data = repr(key).encode('utf-8', 'backslashreplace')
+    return zlib.crc32(data) % count
+
+
+def _item_size(item):
+    return (sys.getsizeof(item) + sys.getsizeof(item[0]) +
+            sys.getsizeof(item[1]))
+
+
+def _read_spill(filename):
+    with open(filename, 'rb') as f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            for item in batch:
+                yield item
+
+
+def _reduce_task(filenames):  # pragma: no cover
+    # This only runs in a worker process. What reduce writes for each
+    # key is pickled with the key, in batches, as in spill files, so
+    # that the main process can merge the partitions by key.
+    app = _app
+    fd, tempname = tempfile.mkstemp(dir=app._tempdir, prefix='reduced-')
+    with os.fdopen(fd, 'wb') as f:
+        batch = []
+        for key, values in app._grouped_values(filenames, []):
+            if app.binary_output:
+                app.output = io.BytesIO()
+            else:
+                app.output = io.StringIO()
+            app.reduce(key, values)
+            batch.append((key, app.output.getvalue()))
+            if len(batch) >= _batch_size:
+                pickle.dump(batch, f, pickle.HIGHEST_PROTOCOL)
+                batch = []
+        if batch:
+            pickle.dump(batch, f, pickle.HIGHEST_PROTOCOL)
+    return tempname
+
+
+class MapReduceApplication(cliapp.Application):
+
+    '''An Application that aggregates input lines by key.
+
+    Subclasses define ``map``, which turns each input line into any
+    number of key/value pairs, and ``reduce``, which is called once
+    for each key, with all the values for that key. They may also
+    define ``combine``, which combines values of a key into one, so
+    that fewer values need to be kept. Keys must be hashable, sortable,
+    and have a ``repr`` that is the same in every run, such as strings,
+    numbers, or tuples of them. Keys and values must be picklable.
+
+    The input files are processed with process_inputs, as usual. With
+    ``jobs`` (a setting) larger than one, the map phase runs in that
+    many worker processes, with large files split, as for other
+    applications. The keys are divided into as many partitions by a
+    hash. Each process keeps the values for each key in memory, until
+    they take up about ``memory-budget`` bytes (a setting), and then
+    writes them into a temporary file for each partition.
+
+    In the reduce phase, the partitions are processed in parallel:
+    the values of all keys in a partition are sorted by key, using
+    temporary files if they do not fit in the memory budget, and
+    reduce is called for each key in order. What reduce writes for
+    each key is kept with the key, and the results of the partitions
+    are merged, so the output is sorted by key, and the same for any
+    number of jobs and any memory budget.
+
+    The map phase can't be used with the ``checkpoint``,
+    ``incremental``, or ``follow`` settings, and collect_input_result
+    and merge_input_result are used by MapReduceApplication itself.
+
+    '''
+
+    def map(self, filename, line):
+        '''Return or yield the key/value pairs for an input line.'''
+        raise NotImplementedError()
+
+    def combine(self, key, values):
+        '''Combine a list of values for a key into one value.
+
+        If this is defined, the values of a key are combined as they
+        are produced by map, and reduce gets a list of one value,
+        combined from all of them. Otherwise, all values are kept, and
+        reduce gets a list of them all.
+
+        '''
+
+        raise NotImplementedError()
+
+    def reduce(self, key, values):
+        '''Write the result for a key to the output.
+
+        ``values`` is a list of the values for the key, in no
+        particular order. The default implementation writes a line for
+        each value, with the key and the value separated by a TAB.
+
+        '''
+
+        for value in values:
+            self.output.write('%s\t%s\n' % (key, value))
+
+    def process_inputs(self, args):
+        for setting in ['checkpoint', 'incremental', 'follow']:
+            if self.settings.builtin(setting):
+                raise cliapp.AppException(
+                    '--%s cannot be used with MapReduceApplication' %
+                    setting)
+
+        self._combining = (type(self).combine is not
+                           MapReduceApplication.combine)
+        self._partitions = self.settings.builtin('jobs') or os.cpu_count() or 1
+        self._table = {}
+        self._table_size = 0
+        self._spills = collections.defaultdict(list)
+        self._new_spills = collections.defaultdict(list)
+        self._tempdir = tempfile.mkdtemp(prefix='cliapp-mapreduce-')
+        try:
+            cliapp.Application.process_inputs(self, args)
+            if self._partitions == 1:
+                items = list(self._table.items())
+                self._table = {}
+                self.merge_input_result(None, self._take_new_spills())
+                for key, values in self._grouped_values(
+                        self._spills[0], items):
+                    self.reduce(key, values)
+            else:
+                self._spill()
+                self.merge_input_result(None, self._take_new_spills())
+                self._reduce_in_parallel()
+        finally:
+            self._table = {}
+            shutil.rmtree(self._tempdir)
+
+    def process_input_line(self, filename, line):
+        for key, value in self.map(filename, line):
+            self._add(key, value)
+
+    def collect_input_result(self, filename):
+        # With more than one partition, worker processes give the
+        # names of their new spill files to the main process. The main
+        # process does the same for the standard input, so that worker
+        # processes forked after it have no values that are not theirs.
+        # With one partition, values stay in memory.
+        if self._partitions > 1:
+            self._spill()
+            return self._take_new_spills()
+        return None
+
+    def merge_input_result(self, filename, result):
+        if result:
+            for partition, filenames in result.items():
+                self._spills[partition].extend(filenames)
+
+    def _take_new_spills(self):
+        spills = dict(self._new_spills)
+        self._new_spills.clear()
+        return spills
+
+    def _add(self, key, value):
+        table = self._table
+        if key not in table:
+            table[key] = value if self._combining else [value]
+            self._table_size += (_entry_size + sys.getsizeof(key) +
+                                 sys.getsizeof(value))
+        elif self._combining:
+            table[key] = self.combine(key, [table[key], value])
+        else:
+            table[key].append(value)
+            self._table_size += 8 + sys.getsizeof(value)
+        if self._table_size >= self.settings.builtin('memory-budget'):
+            self._spill()
+
+    def _spill(self):
+        if not self._table:
+            return
+        partitions = collections.defaultdict(list)
+        for item in self._table.items():
+            partitions[_partition(item[0], self._partitions)].append(item)
+        for partition, items in partitions.items():
+            fd, filename = tempfile.mkstemp(
+                dir=self._tempdir, prefix='spill-%d-' % partition)
+            with os.fdopen(fd, 'wb') as f:
+                for i in range(0, len(items), _batch_size):
+                    pickle.dump(items[i:i + _batch_size], f,
+                                pickle.HIGHEST_PROTOCOL)
+            self._new_spills[partition].append(filename)
+        self._table = {}
+        self._table_size = 0
+
+    def _reduce_in_parallel(self):
+        global _app
+        _app = self
+        context = multiprocessing.get_context('fork')
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self._partitions, mp_context=context)
+        with executor:
+            futures = [
+                executor.submit(_reduce_task, self._spills[partition])
+                for partition in range(self._partitions)]
+            tempnames = [future.result() for future in futures]
+        merged = heapq.merge(
+            *[_read_spill(tempname) for tempname in tempnames],
+            key=operator.itemgetter(0))
+        for _, text in merged:
+            if text:
+                self.output.write(text)
+
+    def _grouped_values(self, filenames, items):
+        # Yield each key in order, with a list of its values, from
+        # spill files and items of the table.
+        sorter = cliapp.extsort.ExternalSorter(
+            self.settings.builtin('memory-budget'), key=operator.itemgetter(0),
+            tempdir=self._tempdir, sizeof=_item_size)
+        for item in items:
+            sorter.add(item)
+        for filename in filenames:
+            for item in _read_spill(filename):
+                sorter.add(item)
+        groups = itertools.groupby(sorter, key=operator.itemgetter(0))
+        for key, group in groups:
+            if self._combining:
+                values = [value for _, value in group]
+                if len(values) > 1:
+                    values = [self.combine(key, values)]
+            else:
+                values = [value for _, values in group for value in values]
+            yield key, values
@@ -0,0 +1,169 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+from io import StringIO
+import collections
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import cliapp
+
+
+class WordCount(cliapp.MapReduceApplication):
+
+    def map(self, filename, line):
+        for word in line.split():
+            yield word, 1
+
+    def combine(self, key, values):
+        return sum(values)
+
+    def reduce(self, key, values):
+        self.output.write('%s %d\n' % (key, sum(values)))
+
+
+class DefaultReduceWordCount(cliapp.MapReduceApplication):
+
+    def map(self, filename, line):
+        for word in line.split():
+            yield word, 1
+
+    def combine(self, key, values):
+        return sum(values)
+
+
+class WordFiles(cliapp.MapReduceApplication):
+
+    def map(self, filename, line):
+        for word in line.split():
+            yield word, os.path.basename(filename)
+
+
+class MapReduceApplicationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.names = []
+        self.counts = collections.Counter()
+        for i in range(4):
+            name = os.path.join(self.tempdir, 'f%d' % i)
+            with open(name, 'w') as f:
+                for j in range(200):
+                    words = ['w%d' % ((i * j + k) % 37) for k in range(5)]
+                    self.counts.update(words)
+                    f.write(' '.join(words) + '\n')
+            self.names.append(name)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def run_app(self, app_class, jobs=1, memory_budget=None, **settings):
+        app = app_class()
+        app.settings['jobs'] = jobs
+        app.settings['input-split-size'] = 1000
+        if memory_budget is not None:
+            app.settings['memory-budget'] = memory_budget
+        for name, value in settings.items():
+            app.settings[name] = value
+        app.output = StringIO()
+        app.process_inputs(self.names)
+        return app.output.getvalue()
+
+    def word_counts(self, output):
+        counts = {}
+        for line in output.splitlines():
+            word, count = line.split()
+            self.assertNotIn(word, counts)
+            counts[word] = int(count)
+        return counts
+
+    def test_counts_words_in_sorted_order(self):
+        output = self.run_app(WordCount)
+        self.assertEqual(self.word_counts(output), dict(self.counts))
+        words = [line.split()[0] for line in output.splitlines()]
+        self.assertEqual(words, sorted(self.counts))
+
+    def test_output_is_the_same_for_any_jobs_and_memory_budget(self):
+        expected = ''.join(
+            '%s\t%d\n' % (word, count)
+            for word, count in sorted(self.counts.items()))
+        for jobs in [1, 2, 3]:
+            for memory_budget in [None, 2000]:
+                output = self.run_app(
+                    DefaultReduceWordCount, jobs=jobs,
+                    memory_budget=memory_budget)
+                self.assertEqual(output, expected)
+
+    def test_counts_words_in_parallel(self):
+        output = self.run_app(WordCount, jobs=3)
+        self.assertEqual(self.word_counts(output), dict(self.counts))
+
+    def test_parallel_output_is_the_same_every_time(self):
+        self.assertEqual(
+            self.run_app(WordCount, jobs=3), self.run_app(WordCount, jobs=3))
+
+    def test_counts_words_when_values_are_spilled(self):
+        output = self.run_app(WordCount, jobs=2, memory_budget=2000)
+        self.assertEqual(self.word_counts(output), dict(self.counts))
+
+    def test_counts_words_serially_when_values_are_spilled(self):
+        output = self.run_app(WordCount, memory_budget=2000)
+        self.assertEqual(self.word_counts(output), dict(self.counts))
+
+    def test_gives_reduce_all_values_without_combine(self):
+        output = self.run_app(WordFiles, jobs=2, memory_budget=5000)
+        files = collections.defaultdict(collections.Counter)
+        for line in output.splitlines():
+            word, filename = line.split('\t')
+            files[word][filename] += 1
+        self.assertEqual(
+            {word: sum(c.values()) for word, c in files.items()},
+            dict(self.counts))
+
+    def test_gives_reduce_all_values_without_combine_serially(self):
+        output = self.run_app(WordFiles, memory_budget=5000)
+        self.assertEqual(len(output.splitlines()), sum(self.counts.values()))
+
+    def test_reads_standard_input_in_main_process(self):
+        with open(self.names[0]) as f:
+            self.names[0] = '-'
+            stdin = sys.stdin
+            sys.stdin = f
+            try:
+                output = self.run_app(WordCount, jobs=2)
+            finally:
+                sys.stdin = stdin
+        self.assertEqual(self.word_counts(output), dict(self.counts))
+
+    def test_removes_temporary_files(self):
+        before = set(os.listdir(tempfile.gettempdir()))
+        self.run_app(WordCount, jobs=2, memory_budget=2000)
+        after = set(os.listdir(tempfile.gettempdir()))
+        self.assertEqual(
+            [x for x in after - before if x.startswith('cliapp-')], [])
+
+    def test_map_and_combine_must_be_defined_by_subclasses(self):
+        app = cliapp.MapReduceApplication()
+        self.assertRaises(NotImplementedError, app.map, 'foo', 'bar\n')
+        self.assertRaises(NotImplementedError, app.combine, 'foo', [1, 2])
+
+    def test_refuses_follow(self):
+        self.assertRaises(
+            cliapp.AppException, self.run_app, WordCount, follow=True)
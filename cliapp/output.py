@@ -0,0 +1,245 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Open the output of an application with a large buffer.
+
+Writes to the output are collected into blocks of the buffer size,
+which are written with one system call each. For text output, the
+text is also encoded a block at a time.
+
+PartitionedWriter writes output into many files, chosen by a key,
+while keeping only some of them open at once.
+
+'''
+
+
+import collections
+import errno
+import io
+import os
+import queue
+import sys
+import threading
+
+import cliapp.compress
+
+
+# Buffer size for output files, if none is given.
+default_buffer_size = 1024**2
+
+
+def open_output(filename, buffer_size, binary=False, compression=None):
+    '''Open a file for writing, or the standard output.
+
+    If ``filename`` is empty, the standard output is used. If
+    ``buffer_size`` is zero, and the output is not compressed,
+    ``sys.stdout`` is returned as it is, or its binary buffer, if
+    ``binary`` is true, so that writes to it stay in order with
+    ``print``. Otherwise, it is written directly to its file
+    descriptor, which is not closed when the returned file is. It is
+    line buffered, if ``sys.stdout`` is. If ``sys.stdout`` has been
+    replaced by something without a file descriptor, it is returned
+    as it is, or its binary buffer.
+
+    A ``buffer_size`` of zero means ``default_buffer_size`` for files.
+
+    If ``compression`` is given, it is a format in
+    ``cliapp.compress.compressors``, and the output is compressed in
+    that format, in parallel threads.
+
+    '''
+
+    encoding = errors = None
+    line_buffering = False
+    if not filename and not compression and not buffer_size:
+        return _stdout(binary)
+    buffer_size = buffer_size or default_buffer_size
+    if filename and not compression:
+        f = io.open(filename, 'wb' if binary else 'w',
+                    buffering=buffer_size)
+        if not binary:
+            _set_chunk_size(f, buffer_size)
+        return f
+    elif filename:
+        f = io.open(filename, 'wb', buffering=buffer_size)
+    else:
+        stdout = sys.stdout
+        try:
+            fd = stdout.fileno()
+        except (AttributeError, ValueError, io.UnsupportedOperation):
+            return _stdout(binary)
+        stdout.flush()
+        f = io.BufferedWriter(io.FileIO(fd, 'w', closefd=False), buffer_size)
+        encoding = stdout.encoding
+        errors = stdout.errors
+        line_buffering = stdout.line_buffering
+
+    if compression:
+        f = cliapp.compress.CompressingWriter(f, compression)
+        line_buffering = False
+    if binary:
+        return f
+    f = io.TextIOWrapper(
+        f, encoding=encoding, errors=errors, line_buffering=line_buffering)
+    _set_chunk_size(f, buffer_size)
+    return f
+
+
+def _stdout(binary):
+    stdout = sys.stdout
+    if binary and hasattr(stdout, 'buffer'):
+        # Text already written must come out first.
+        stdout.flush()
+        return stdout.buffer
+    return stdout
+
+
+def _set_chunk_size(f, buffer_size):
+    # The text is encoded and given to the binary buffer in pieces of
+    # this size.
+    f._CHUNK_SIZE = buffer_size
+
+
+def discard_output(f):
+    '''Make anything still in the buffer of an output file go nowhere.
+
+    This is for when the reader of a pipe has gone away, so that
+    flushing the file later does not fail again. The file descriptor
+    is made to point at ``/dev/null``.
+
+    '''
+
+    try:
+        fd = f.fileno()
+    except (AttributeError, ValueError, io.UnsupportedOperation):
+        return
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, fd)
+    os.close(devnull)
+
+
+class PartitionedWriter(object):
+
+    '''Write data to many files, chosen by a key.
+
+    The name of the file for a key is ``template % key``, so a key
+    may also be a tuple, for templates with several parts, such as
+    ``'out/%s/%s.log'``. Missing directories are created.
+
+    At most ``max_open`` files are kept open. When another one is
+    needed, the one that was written to longest ago is closed. A file
+    is emptied the first time it is opened, and after that, re-opened
+    for appending. Each open file has a buffer of ``buffer_size``
+    bytes. If the system runs out of file descriptors anyway, half of
+    the files are closed.
+
+    If ``threaded`` is true, the files are opened and written to in a
+    background thread, and ``write`` only queues the data. An error in
+    the thread is raised by the next call to ``write`` or ``close``.
+
+    A writer must only be used in one process: files are emptied
+    again by each process that opens them.
+
+    '''
+
+    def __init__(self, template, max_open=128, buffer_size=256 * 1024,
+                 binary=False, threaded=False):
+        self._template = template
+        self._max_open = max(1, max_open)
+        self._buffer_size = buffer_size
+        self._binary = binary
+        self._files = collections.OrderedDict()
+        self._opened = set()
+        self._error = None
+        self._queue = None
+        self._thread = None
+        if threaded:
+            self._queue = queue.Queue(maxsize=1024)
+            self._thread = threading.Thread(target=self._write_queued)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def write(self, key, data):
+        '''Write data to the file for a key.'''
+        self._check()
+        if self._queue is None:
+            self._write(key, data)
+        else:
+            self._queue.put((key, data))
+
+    def close(self):
+        '''Write out all buffers, and close all files.'''
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._close_files(len(self._files))
+        self._check()
+
+    def _check(self):
+        if self._error is not None:
+            error = self._error
+            self._error = None
+            raise error
+
+    def _write_queued(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self._error is None:
+                try:
+                    self._write(*item)
+                except Exception as e:
+                    self._error = e
+
+    def _write(self, key, data):
+        filename = self._template % key
+        f = self._files.get(filename)
+        if f is None:
+            f = self._open(filename)
+        else:
+            self._files.move_to_end(filename)
+        f.write(data)
+
+    def _open(self, filename):
+        if len(self._files) >= self._max_open:
+            self._close_files(1)
+        dirname = os.path.dirname(filename)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        mode = 'a' if filename in self._opened else 'w'
+        if self._binary:
+            mode += 'b'
+        try:
+            f = io.open(filename, mode, buffering=self._buffer_size)
+        except EnvironmentError as e:
+            if e.errno not in (errno.EMFILE, errno.ENFILE) or not self._files:
+                raise
+            self._close_files(max(1, len(self._files) // 2))
+            f = io.open(filename, mode, buffering=self._buffer_size)
+        if not self._binary:
+            _set_chunk_size(f, self._buffer_size)
+        self._opened.add(filename)
+        self._files[filename] = f
+        return f
+
+    def _close_files(self, count):
+        # Close the files that were written to longest ago.
+        for _ in range(count):
+            filename, f = self._files.popitem(last=False)
+            f.close()
@@ -0,0 +1,148 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import cliapp.output
+
+
+class OpenOutputTests(unittest.TestCase):
+
+    def setUp(self):
+        self.file = tempfile.NamedTemporaryFile()
+
+    def tearDown(self):
+        self.file.close()
+
+    def written(self):
+        with open(self.file.name, 'rb') as f:
+            return f.read()
+
+    def with_stdout(self, stdout, func):
+        saved = sys.stdout
+        sys.stdout = stdout
+        try:
+            return func()
+        finally:
+            sys.stdout = saved
+
+    def test_collects_text_in_buffer(self):
+        f = cliapp.output.open_output(self.file.name, 1024)
+        f.write('x' * 1000)
+        self.assertEqual(self.written(), b'')
+        f.write('x' * 1000)
+        f.close()
+        self.assertEqual(self.written(), b'x' * 2000)
+
+    def test_opens_binary_file(self):
+        with cliapp.output.open_output(self.file.name, 1024, True) as f:
+            f.write(b'\xff')
+        self.assertEqual(self.written(), b'\xff')
+
+    def test_writes_to_stdout_descriptor(self):
+        stdout = io.open(self.file.name, 'w')
+        stdout.write('foo\n')
+        f = self.with_stdout(
+            stdout, lambda: cliapp.output.open_output('', 1024))
+        f.write('bar\n')
+        f.close()
+        self.assertFalse(stdout.closed)
+        self.assertEqual(self.written(), b'foo\nbar\n')
+        stdout.close()
+
+    def test_returns_stdout_without_buffer_size(self):
+        with io.open(self.file.name, 'w') as stdout:
+            f = self.with_stdout(
+                stdout, lambda: cliapp.output.open_output('', 0))
+            self.assertIs(f, stdout)
+
+    def test_returns_stdout_without_descriptor(self):
+        stdout = io.StringIO()
+        f = self.with_stdout(
+            stdout, lambda: cliapp.output.open_output(None, 1024))
+        self.assertIs(f, stdout)
+
+
+class DiscardOutputTests(unittest.TestCase):
+
+    def test_makes_broken_pipe_writable(self):
+        read_fd, write_fd = os.pipe()
+        f = io.open(write_fd, 'wb')
+        f.write(b'foo')
+        os.close(read_fd)
+        self.assertRaises(IOError, f.flush)
+        cliapp.output.discard_output(f)
+        f.close()
+
+
+class PartitionedWriterTests(unittest.TestCase):
+
+    threaded = False
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.template = os.path.join(self.tempdir, '%s', '%s.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def read(self, *key):
+        with open(self.template % key) as f:
+            return f.read()
+
+    def test_writes_to_file_for_key(self):
+        writer = cliapp.output.PartitionedWriter(
+            self.template, threaded=self.threaded)
+        writer.write(('a', '1'), 'foo\n')
+        writer.write(('b', '1'), 'bar\n')
+        writer.write(('a', '1'), 'foobar\n')
+        writer.close()
+        self.assertEqual(self.read('a', '1'), 'foo\nfoobar\n')
+        self.assertEqual(self.read('b', '1'), 'bar\n')
+
+    def test_reopens_closed_files_for_appending(self):
+        with open(os.path.join(self.tempdir, 'old'), 'w') as f:
+            f.write('old data\n')
+        writer = cliapp.output.PartitionedWriter(
+            os.path.join(self.tempdir, '%s'), max_open=2,
+            threaded=self.threaded)
+        for i in range(10):
+            for key in ['old', 'x', 'y']:
+                writer.write(key, '%d\n' % i)
+        writer.close()
+        numbers = ''.join('%d\n' % i for i in range(10))
+        for key in ['old', 'x', 'y']:
+            with open(os.path.join(self.tempdir, key)) as f:
+                self.assertEqual(f.read(), numbers)
+        self.assertEqual(writer._files, {})
+
+    def test_raises_write_errors(self):
+        writer = cliapp.output.PartitionedWriter(
+            self.template, binary=True, threaded=self.threaded)
+        with self.assertRaises(TypeError):
+            writer.write(('a', 'b'), 'text')
+            writer.close()
+
+
+class ThreadedPartitionedWriterTests(PartitionedWriterTests):
+
+    threaded = True
@@ -0,0 +1,289 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Process input files in parallel worker processes.
+
+The workers are forked from the application process, so they inherit
+the application object, with its settings and whatever state it has
+set up before ``process_inputs`` was called. Each worker writes the
+output of a task into a temporary file, which the parent process then
+copies to the real output, in a deterministic order.
+
+A task is either a whole file, or a byte range of a large file. Byte
+ranges always start at the beginning of a line and end after a
+newline, so that each line is processed by exactly one worker.
+
+'''
+
+
+import collections
+import concurrent.futures
+import io
+import multiprocessing
+import os
+import shutil
+import stat
+import tempfile
+
+import cliapp.decompress
+import cliapp.fastcopy
+import cliapp.output
+
+
+# The application the workers run. This is set by the parent process
+# before any workers are created, and the workers inherit it when
+# they are forked.
+_app = None
+
+
+def process_inputs(app, names, jobs, as_completed=False, split_size=0,
+                   count_lines=True):
+    '''Process named input files using ``jobs`` worker processes.
+
+    Output written to ``app.output`` by workers is copied to the
+    parent's ``app.output`` in the order of ``names``, or in the
+    order in which files are finished if ``as_completed`` is true.
+
+    Regular files larger than ``split_size`` bytes are split into
+    parts of about that size, unless ``split_size`` is zero. If
+    ``count_lines`` is true, the lines in each part are counted first
+    (in parallel) so that line numbers in the workers are exact.
+    Otherwise, workers see the byte offset of each line instead.
+
+    The standard input (``-``) is always processed in the parent
+    process, since workers can't read it.
+
+    '''
+
+    global _app
+    _app = app
+
+    context = multiprocessing.get_context('fork')
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, mp_context=context)
+    pending = collections.deque()
+    window = jobs * 2
+    try:
+        for fileno, name in enumerate(names, app.fileno + 1):
+            if name == '-':
+                _finish_all(app, pending)
+                _process_in_parent(app, fileno, name)
+                continue
+            for task in _tasks(executor, fileno, name, split_size,
+                               count_lines):
+                pending.append(executor.submit(_run_task, *task))
+                while len(pending) >= window:
+                    _finish_one(app, pending, as_completed)
+        _finish_all(app, pending)
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        for future in pending:
+            _discard(future)
+        raise
+    executor.shutdown()
+
+
+def _tasks(executor, fileno, name, split_size, count_lines):
+    size = _regular_file_size(name)
+    if not split_size or size is None or size <= split_size:
+        return [(fileno, name, None, None, None)]
+    if _is_compressed(name):
+        return [(fileno, name, None, None, None)]
+
+    ranges = line_aligned_ranges(name, size, split_size)
+    if count_lines:
+        counts = executor.map(
+            count_lines_in_range, [name] * len(ranges), *zip(*ranges))
+        linenos = [1]
+        for count in counts:
+            linenos.append(linenos[-1] + count)
+    else:
+        linenos = [None] * len(ranges)
+    return [(fileno, name, start, end, lineno)
+            for (start, end), lineno in zip(ranges, linenos)]
+
+
+def _regular_file_size(name):
+    try:
+        st = os.stat(name)
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    return st.st_size
+
+
+def _is_compressed(name):
+    with open(name, 'rb') as f:
+        header = f.read(cliapp.decompress.magic_size)
+    return cliapp.decompress.detect(header) is not None
+
+
+def line_aligned_ranges(name, size, part_size):
+    '''Split a file into byte ranges of about ``part_size`` bytes.
+
+    Return a list of (start, end) pairs. Every range except the last
+    one ends just after a newline character.
+
+    '''
+
+    ranges = []
+    start = 0
+    with open(name, 'rb') as f:
+        while start < size:
+            end = start + part_size
+            if end >= size:
+                end = size
+            else:
+                f.seek(end - 1)
+                end += len(f.readline()) - 1
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def count_lines_in_range(name, start, end):
+    '''Count the lines in a byte range of a file.
+
+    A partial line at the end of the range is counted as a line.
+
+    '''
+
+    count = 0
+    last = b'\n'
+    with open(name, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            data = f.read(min(remaining, _count_block_size))
+            if not data:
+                break
+            count += data.count(b'\n')
+            last = data[-1:]
+            remaining -= len(data)
+    if last != b'\n':
+        count += 1
+    return count
+
+
+_count_block_size = 1024**2
+
+
+def _finish_one(app, pending, as_completed):
+    if as_completed:
+        done, _ = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED)
+        future = next(f for f in pending if f in done)
+        pending.remove(future)
+    else:
+        future = pending.popleft()
+    _merge(app, future.result())
+
+
+def _finish_all(app, pending):
+    while pending:
+        _merge(app, pending.popleft().result())
+
+
+def _process_in_parent(app, fileno, name):
+    app.fileno = fileno - 1
+    app.process_input(name)
+    app._merge_input_result(name, app.collect_input_result(name))
+
+
+# The functions below run only in the worker processes, which are
+# not covered by the tests' coverage measurement.
+
+def _run_task(fileno, name, start, end, lineno):  # pragma: no cover
+    app = _app
+    # The progress reporter thread is not running in the worker, and
+    # its lock may have been held when the worker was forked.
+    app._progress = None
+    tempname, (lines, result) = run_with_output(
+        app, _process_task, app, fileno, name, start, end, lineno)
+    return fileno, name, start, tempname, lines, result
+
+
+def _process_task(app, fileno, name, start, end,
+                  lineno):  # pragma: no cover
+    app.global_lineno = 0
+    if start is None:
+        app.fileno = fileno - 1
+        app.process_input(name)
+        lines = app.lineno
+    else:
+        app.fileno = fileno
+        lines = app.process_input_range(name, start, end, lineno)
+    return lines, app.collect_input_result(name)
+
+
+def run_with_output(app, func, *args):  # pragma: no cover
+    '''Call ``func(*args)`` with ``app.output`` set to a temporary file.
+
+    This is for worker processes. Return the name of the file, and
+    what the function returned. Give the name to copy_output in the
+    parent process.
+
+    '''
+
+    fd, tempname = tempfile.mkstemp(prefix='cliapp-output-')
+    try:
+        mode = 'wb' if app.binary_output else 'w'
+        buffer_size = (app.settings.builtin('output-buffer-size') or
+                       cliapp.output.default_buffer_size)
+        with io.open(fd, mode, buffering=buffer_size) as output:
+            app.output = output
+            result = func(*args)
+    except BaseException:
+        os.remove(tempname)
+        raise
+    return tempname, result
+
+
+def copy_output(app, tempname):
+    '''Copy the output a worker wrote to a file to ``app.output``.
+
+    The file is removed afterwards.
+
+    '''
+
+    try:
+        if app.binary_output:
+            with io.open(tempname, 'rb') as f:
+                cliapp.fastcopy.copy(f, app.output)
+        else:
+            with io.open(tempname, 'r') as f:
+                shutil.copyfileobj(f, app.output)
+    finally:
+        os.remove(tempname)
+
+
+def _merge(app, task_result):
+    fileno, name, start, tempname, lines, result = task_result
+    copy_output(app, tempname)
+    if not start:
+        app.fileno += 1
+        app.lineno = 0
+        app._finish_input(name)
+    app.lineno += lines
+    app.global_lineno += lines
+    app._merge_input_result(name, result)
+
+
+def _discard(future):
+    if future.done() and not future.cancelled() and not future.exception():
+        os.remove(future.result()[3])
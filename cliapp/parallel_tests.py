@@ -0,0 +1,310 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+from io import BytesIO, StringIO
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import time
+import unittest
+
+import cliapp
+
+
+class CountingApp(cliapp.Application):
+
+    def setup(self):
+        self.matches = 0
+        self.total = 0
+        self.merged = []
+
+    def process_input_line(self, name, line):
+        self.matches += 1
+        self.output.write('%s:%d:%d:%s' % (
+            os.path.basename(name), self.fileno, self.lineno, line))
+
+    def collect_input_result(self, name):
+        matches = self.matches
+        self.matches = 0
+        return matches
+
+    def merge_input_result(self, name, result):
+        self.total += result
+        self.merged.append(os.path.basename(name))
+
+
+class ParallelInputTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.names = []
+        for i in range(6):
+            name = os.path.join(self.tempdir, 'f%d' % i)
+            with open(name, 'w') as f:
+                for j in range(i + 1):
+                    f.write('line%d\n' % j)
+            self.names.append(name)
+        self.app = CountingApp()
+        self.app.setup()
+        self.app.output = StringIO()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def process(self, jobs, as_completed=False):
+        self.app.settings['jobs'] = jobs
+        self.app.settings['jobs-as-completed'] = as_completed
+        self.app.process_inputs(self.names)
+        return self.app.output.getvalue()
+
+    def test_output_is_the_same_as_without_workers(self):
+        serial = self.process(1)
+        self.setUp()
+        self.assertEqual(self.process(3), serial)
+
+    def test_counters_are_as_if_files_were_processed_in_order(self):
+        self.process(3)
+        self.assertEqual(self.app.fileno, 6)
+        self.assertEqual(self.app.global_lineno, 21)
+        self.assertEqual(self.app.lineno, 6)
+
+    def test_merges_results_in_argument_order(self):
+        self.process(3)
+        self.assertEqual(self.app.total, 21)
+        self.assertEqual(self.app.merged, ['f%d' % i for i in range(6)])
+
+    def test_writes_all_output_when_as_completed(self):
+        output = self.process(3, as_completed=True)
+        self.assertEqual(len(output.splitlines()), 21)
+        self.assertEqual(sorted(self.app.merged),
+                         ['f%d' % i for i in range(6)])
+
+    def test_removes_temporary_files(self):
+        before = set(os.listdir(tempfile.gettempdir()))
+        self.process(3)
+        after = set(os.listdir(tempfile.gettempdir()))
+        self.assertEqual(
+            [x for x in after - before if x.startswith('cliapp-')], [])
+
+    def test_raises_worker_exception(self):
+        self.names.append(os.path.join(self.tempdir, 'does-not-exist'))
+        self.assertRaises(IOError, self.process, 3)
+
+    def test_removes_output_of_finished_files_after_exception(self):
+
+        class FailingApp(CountingApp):
+
+            def process_input_line(self, name, line):
+                if name.endswith('f0'):
+                    # Let the other files finish first.
+                    time.sleep(0.5)
+                    raise RuntimeError('failed')
+                CountingApp.process_input_line(self, name, line)
+
+        self.app = FailingApp()
+        self.app.setup()
+        self.app.output = StringIO()
+        before = set(os.listdir(tempfile.gettempdir()))
+        self.assertRaises(RuntimeError, self.process, 3)
+        after = set(os.listdir(tempfile.gettempdir()))
+        self.assertEqual(
+            [x for x in after - before if x.startswith('cliapp-')], [])
+
+    def test_processes_standard_input_in_parent(self):
+        names = self.names[:3] + ['-', os.devnull] + self.names[3:]
+
+        def process(jobs):
+            self.setUp()
+            stdin = sys.stdin
+            with open(self.names[5]) as f:
+                sys.stdin = f
+                try:
+                    self.app.settings['jobs'] = jobs
+                    self.app.process_inputs(names)
+                finally:
+                    sys.stdin = stdin
+            return self.app.output.getvalue()
+
+        serial = process(1)
+        self.assertEqual(process(3), serial)
+        self.assertEqual(self.app.fileno, 8)
+        self.assertEqual(self.app.global_lineno, 27)
+        self.assertEqual(
+            self.app.merged,
+            ['f0', 'f1', 'f2', '-', 'null', 'f3', 'f4', 'f5'])
+
+
+class SplitInputTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tempdir, 'big')
+        with open(self.filename, 'w') as f:
+            for i in range(1000):
+                f.write('%s\n' % ('x' * (i % 17)))
+            f.write('no newline at end')
+        self.size = os.path.getsize(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def process(self, jobs, lineno='count', decompress=False):
+        app = CountingApp()
+        app.setup()
+        app.output = StringIO()
+        app.settings['input-decompress'] = decompress
+        app.settings['jobs'] = jobs
+        app.settings['input-split-size'] = 500
+        app.settings['input-split-lineno'] = lineno
+        app.process_inputs([self.filename])
+        return app
+
+    def test_ranges_cover_file_and_end_at_newlines(self):
+        ranges = cliapp.parallel.line_aligned_ranges(
+            self.filename, self.size, 500)
+        self.assertTrue(len(ranges) > 1)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], self.size)
+        with open(self.filename, 'rb') as f:
+            data = f.read()
+        for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, next_start)
+            self.assertEqual(data[end - 1:end], b'\n')
+
+    def test_counts_lines_in_range(self):
+        self.assertEqual(
+            cliapp.parallel.count_lines_in_range(
+                self.filename, 0, self.size),
+            1001)
+
+    def test_counts_lines_to_end_of_file_in_longer_range(self):
+        self.assertEqual(
+            cliapp.parallel.count_lines_in_range(
+                self.filename, 0, self.size + 100),
+            1001)
+
+    def test_does_not_split_compressed_file(self):
+        compressed = self.filename + '.gz'
+        with gzip.open(compressed, 'wt') as f:
+            for i in range(1000):
+                f.write('%d\n' % (i * 7919 % 1000003))
+        self.assertTrue(os.path.getsize(compressed) > 500)
+        self.filename = compressed
+        app = self.process(3, decompress=True)
+        self.assertEqual(app.global_lineno, 1000)
+        self.assertEqual(app.output.getvalue(),
+                         self.process(1, decompress=True).output.getvalue())
+
+    def test_copies_binary_output_of_workers(self):
+
+        class BinaryOutputApp(CountingApp):
+
+            binary_output = True
+
+            def process_input_line(self, name, line):
+                self.output.write(line.encode())
+
+        app = BinaryOutputApp()
+        app.setup()
+        app.output = BytesIO()
+        app.settings['jobs'] = 3
+        app.settings['input-split-size'] = 500
+        app.process_inputs([self.filename])
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(app.output.getvalue(), f.read())
+
+    def test_output_is_the_same_as_without_workers(self):
+        serial = self.process(1)
+        parallel = self.process(3)
+        self.assertEqual(parallel.output.getvalue(),
+                         serial.output.getvalue())
+        self.assertEqual(parallel.total, 1001)
+        self.assertEqual(parallel.fileno, 1)
+        self.assertEqual(parallel.lineno, 1001)
+        self.assertEqual(parallel.global_lineno, 1001)
+
+    def test_gives_batches_of_split_file_with_exact_line_numbers(self):
+
+        class BatchApp(CountingApp):
+
+            def process_input_lines(self, name, lines, first_lineno):
+                self.output.write('%d %d\n' % (first_lineno, len(lines)))
+
+        app = BatchApp()
+        app.setup()
+        app.output = StringIO()
+        app.settings['jobs'] = 3
+        app.settings['input-split-size'] = 500
+        app.settings['input-batch-size'] = 100
+        app.process_inputs([self.filename])
+        expected = 1
+        for line in app.output.getvalue().splitlines():
+            first_lineno, count = map(int, line.split())
+            self.assertEqual(first_lineno, expected)
+            expected += count
+        self.assertEqual(expected, 1002)
+        self.assertEqual(app.global_lineno, 1001)
+
+    def test_gives_whole_file_to_process_input(self):
+
+        class WholeFileApp(CountingApp):
+
+            def process_input(self, name, stdin=sys.stdin):
+                self.output.write('%s\n' % os.path.basename(name))
+
+        app = WholeFileApp()
+        app.setup()
+        app.output = StringIO()
+        app.settings['jobs'] = 3
+        app.settings['input-split-size'] = 500
+        app.process_inputs([self.filename])
+        self.assertEqual(
+            app.output.getvalue(), os.path.basename(self.filename) + '\n')
+
+    def test_gives_bytes_to_binary_application(self):
+
+        class BinaryApp(CountingApp):
+
+            binary_input = True
+
+            def process_input_line(self, name, line):
+                assert isinstance(line, bytes)
+                CountingApp.process_input_line(self, name, line.decode())
+
+        app = BinaryApp()
+        app.setup()
+        app.output = StringIO()
+        app.settings['jobs'] = 3
+        app.settings['input-split-size'] = 500
+        app.process_inputs([self.filename])
+        self.assertEqual(app.output.getvalue(),
+                         self.process(1).output.getvalue())
+
+    def test_gives_byte_offsets_as_line_numbers(self):
+        app = self.process(3, lineno='offset')
+        with open(self.filename) as f:
+            offsets = []
+            offset = 0
+            for line in f:
+                offsets.append(offset)
+                offset += len(line)
+        linenos = [int(line.split(':')[2])
+                   for line in app.output.getvalue().splitlines()]
+        self.assertEqual(linenos, offsets)
+        self.assertEqual(app.global_lineno, 1001)
@@ -0,0 +1,129 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Find the lines that match a regular expression, without splitting.
+
+A large block of lines is searched with one call to the regular
+expression, and only the lines with a match are cut out of the block.
+The lines in between are counted with the ``count`` method of the
+block, so line numbers are known without handling each line in Python.
+
+The pattern is compiled with ``re.MULTILINE``, so ``^`` and ``$``
+match at the start and end of each line. A match must be within one
+line: each line where the block search finds a match is searched
+again on its own, to make sure.
+
+'''
+
+
+import re
+
+
+def compile_pattern(pattern, binary, encoding):
+    '''Compile a pattern for searching text, or bytes if ``binary``.
+
+    ``pattern`` may be a string, bytes, or a compiled regular
+    expression. A string is encoded with ``encoding`` for searching
+    bytes, and bytes decoded for searching text. The pattern and
+    flags of a compiled expression are used, with ``re.MULTILINE``
+    added.
+
+    '''
+
+    flags = re.MULTILINE
+    if hasattr(pattern, 'pattern'):
+        flags |= pattern.flags
+        pattern = pattern.pattern
+    if binary and not isinstance(pattern, bytes):
+        pattern = pattern.encode(encoding)
+    elif not binary and isinstance(pattern, bytes):
+        pattern = pattern.decode(encoding)
+    if binary:
+        flags &= ~re.UNICODE
+    return re.compile(pattern, flags)
+
+
+class MatchingLines(object):
+
+    '''Iterate over the matching lines in blocks of a file.
+
+    ``blocks`` is an iterable of strings, or bytes, that together are
+    the contents of the file, and may be split anywhere. Iterating
+    gives ``(lineno, offset, line)`` for each line that ``regex``
+    matches, where ``lineno`` counts from ``first_lineno``, and
+    ``offset`` is the offset of the line from ``first_offset``. If
+    ``encoding`` is given, the blocks are strings, and the offsets
+    count bytes in that encoding, instead of characters.
+
+    When the iteration has finished, ``count`` is the number of lines
+    in the file.
+
+    '''
+
+    def __init__(self, regex, blocks, first_lineno=1, first_offset=0,
+                 encoding=None):
+        self._regex = regex
+        self._blocks = blocks
+        self._encoding = encoding
+        self.count = 0
+        self._lineno = first_lineno
+        self._offset = first_offset
+
+    def __iter__(self):
+        partial = None
+        for block in self._blocks:
+            if not block:
+                continue
+            if partial:
+                block = partial + block
+            newline = '\n' if isinstance(block, str) else b'\n'
+            end = block.rfind(newline) + 1
+            partial = block[end:]
+            for item in self._lines(block, 0, end, newline):
+                yield item
+        if partial:
+            for item in self._lines(partial, 0, len(partial), newline):
+                yield item
+            self.count += 1
+
+    def _lines(self, block, pos, end, newline):
+        search = self._regex.search
+        counted = pos
+        while pos < end:
+            m = search(block, pos, end)
+            if m is None:
+                break
+            start = block.rfind(newline, pos, m.start()) + 1 or pos
+            line_end = block.find(newline, m.start(), end) + 1 or end
+            if start == line_end:
+                # An empty match at the end, after the last line.
+                break
+            if search(block, start, line_end) is not None:
+                self._advance(block, counted, start, newline)
+                yield self._lineno, self._offset, block[start:line_end]
+                counted = start
+            pos = line_end
+        self._advance(block, counted, end, newline)
+
+    def _advance(self, block, start, end, newline):
+        lines = block.count(newline, start, end)
+        self.count += lines
+        self._lineno += lines
+        if self._encoding is None:
+            self._offset += end - start
+        else:
+            self._offset += len(block[start:end].encode(self._encoding))
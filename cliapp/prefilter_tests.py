@@ -0,0 +1,81 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import re
+import unittest
+
+import cliapp.prefilter
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class CompilePatternTests(unittest.TestCase):
+
+    def test_encodes_string_for_bytes(self):
+        regex = cliapp.prefilter.compile_pattern(u'\xe4', True, 'utf-8')
+        self.assertEqual(regex.pattern, b'\xc3\xa4')
+
+    def test_keeps_flags_of_compiled_pattern(self):
+        regex = cliapp.prefilter.compile_pattern(
+            re.compile('foo', re.IGNORECASE), True, 'utf-8')
+        self.assertTrue(regex.search(b'FOO'))
+        self.assertTrue(regex.flags & re.MULTILINE)
+
+
+class MatchingLinesTests(unittest.TestCase):
+
+    data = 'foo\nbar\nzoo\nxx\nyo'
+
+    def matching(self, pattern, blocks, **kwargs):
+        regex = cliapp.prefilter.compile_pattern(
+            pattern, isinstance(blocks[0], bytes), 'utf-8')
+        return cliapp.prefilter.MatchingLines(regex, blocks, **kwargs)
+
+    def test_finds_lines_in_blocks_split_anywhere(self):
+        for size in [1, 2, 5, 100]:
+            matching = self.matching('o$', split(self.data, size))
+            self.assertEqual(
+                list(matching),
+                [(1, 0, 'foo\n'), (3, 8, 'zoo\n'), (5, 15, 'yo')])
+            self.assertEqual(matching.count, 5)
+
+    def test_finds_empty_lines_only(self):
+        for size in [1, 2, 100]:
+            matching = self.matching('^$', split('a\n\nb\nc\n', size))
+            self.assertEqual(list(matching), [(2, 2, '\n')])
+            self.assertEqual(matching.count, 4)
+
+    def test_matches_end_of_last_line_without_newline(self):
+        matching = self.matching('$', ['a\nb'])
+        self.assertEqual(list(matching), [(1, 0, 'a\n'), (2, 2, 'b')])
+
+    def test_ignores_matches_across_lines(self):
+        matching = self.matching(r'o\sb|x\sy', [self.data])
+        self.assertEqual(list(matching), [])
+        self.assertEqual(matching.count, 5)
+
+    def test_counts_from_first_line_and_offset(self):
+        matching = self.matching(
+            b'^b', [b'a\nb\n'], first_lineno=10, first_offset=100)
+        self.assertEqual(list(matching), [(11, 102, b'b\n')])
+
+    def test_counts_offsets_in_bytes_if_encoding_given(self):
+        matching = self.matching(
+            'b', [u'\xe4\xe4\nb\n'], encoding='utf-8')
+        self.assertEqual(list(matching), [(2, 5, 'b\n')])
@@ -0,0 +1,171 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Report the progress of processing input files.
+
+A background thread looks at the application's counters and at the
+position of the current input file every now and then, so processing
+a line costs nothing extra. The application tells the reporter only
+when it starts and finishes a file.
+
+The number of files, lines, and bytes processed so far, and the
+rates, are reported every second on the standard error, if it is a
+terminal, or otherwise every minute to the log. If the input files
+are named on the command line, the time remaining is estimated from
+their sizes.
+
+'''
+
+
+import logging
+import os
+import stat
+import sys
+import threading
+import time
+
+
+# Seconds between reports on a terminal.
+tty_interval = 1.0
+
+# Seconds between reports to the log.
+log_interval = 60.0
+
+
+def _file_size(name):
+    try:
+        st = os.stat(name)
+    except OSError:
+        return 0
+    if not stat.S_ISREG(st.st_mode):
+        return 0
+    return st.st_size
+
+
+def format_size(size):
+    '''Format a number of bytes for humans.'''
+    for unit in ['B', 'KiB', 'MiB', 'GiB']:
+        if size < 1024:
+            break
+        size /= 1024.0
+    else:
+        unit = 'TiB'
+    if unit == 'B':
+        return '%d B' % size
+    return '%.1f %s' % (size, unit)
+
+
+def format_duration(seconds):
+    '''Format a number of seconds as H:MM:SS.'''
+    seconds = int(seconds)
+    return '%d:%02d:%02d' % (seconds // 3600, seconds // 60 % 60,
+                             seconds % 60)
+
+
+class ProgressReporter(object):
+
+    '''Report the progress of ``app`` processing its input files.
+
+    If the names of all input files are known in advance, give them
+    in ``names``, so that the reporter can estimate the time
+    remaining. Their sizes are added up in the background thread.
+
+    Reports are written to ``stream`` if it is a terminal, and logged
+    otherwise.
+
+    '''
+
+    def __init__(self, app, names=None, stream=sys.stderr):
+        self._app = app
+        self._names = names
+        self._stream = stream
+        self._tty = stream.isatty()
+        self._interval = tty_interval if self._tty else log_interval
+        self._lock = threading.Lock()
+        self._done_bytes = 0
+        self._fd = None
+        self._total = None
+        self._started = time.time()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+
+    def start(self):
+        '''Start reporting.'''
+        self._thread.start()
+
+    def stop(self):
+        '''Stop reporting, after a final report.'''
+        self._stopped.set()
+        self._thread.join()
+        self._report()
+        if self._tty:
+            self._stream.write('\n')
+            self._stream.flush()
+
+    def start_file(self, f):
+        '''Tell the reporter the application has started reading ``f``.'''
+        try:
+            fd = f.fileno()
+        except (AttributeError, IOError, OSError, ValueError):
+            fd = None
+        with self._lock:
+            self._fd = fd
+
+    def finish_file(self, name):
+        '''Tell the reporter the application has finished a file.'''
+        size = 0 if name == '-' else _file_size(name)
+        with self._lock:
+            self._fd = None
+            self._done_bytes += size
+
+    def status(self):
+        '''Return a one-line description of the progress so far.'''
+        with self._lock:
+            done = self._done_bytes
+            if self._fd is not None:
+                try:
+                    done += os.lseek(self._fd, 0, os.SEEK_CUR)
+                except OSError:
+                    pass
+        elapsed = max(time.time() - self._started, 1e-6)
+        bytes_rate = done / elapsed
+        text = '%d files, %d lines (%d lines/s), %s' % (
+            self._app.fileno, self._app.global_lineno,
+            self._app.global_lineno / elapsed, format_size(done))
+        if self._total is not None:
+            text += ' of %s' % format_size(self._total)
+        text += ' (%s/s)' % format_size(bytes_rate)
+        if self._total is not None and bytes_rate > 0:
+            remaining = max(self._total - done, 0) / bytes_rate
+            text += ', ETA %s' % format_duration(remaining)
+        return text
+
+    def _run(self):
+        if self._names is not None:
+            self._total = sum(_file_size(name) for name in self._names
+                              if name != '-')
+        while not self._stopped.wait(self._interval):
+            self._report()
+
+    def _report(self):
+        text = self.status()
+        if self._tty:
+            self._stream.write('\r\033[K' + text)
+            self._stream.flush()
+        else:
+            logging.info('Progress: %s', text)
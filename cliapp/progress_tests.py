@@ -0,0 +1,83 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import io
+import tempfile
+import unittest
+
+import cliapp
+import cliapp.progress
+
+
+class FakeTerminal(io.StringIO):
+
+    def isatty(self):
+        return True
+
+
+class FormatTests(unittest.TestCase):
+
+    def test_formats_sizes(self):
+        self.assertEqual(cliapp.progress.format_size(10), '10 B')
+        self.assertEqual(cliapp.progress.format_size(1536), '1.5 KiB')
+        self.assertEqual(cliapp.progress.format_size(3 * 1024**4), '3.0 TiB')
+
+    def test_formats_durations(self):
+        self.assertEqual(cliapp.progress.format_duration(3723), '1:02:03')
+
+
+class ProgressReporterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = cliapp.Application()
+        self.file = tempfile.NamedTemporaryFile()
+        self.file.write(b'x\n' * 1000)
+        self.file.flush()
+
+    def tearDown(self):
+        self.file.close()
+
+    def test_counts_position_in_current_file(self):
+        reporter = cliapp.progress.ProgressReporter(
+            self.app, stream=FakeTerminal())
+        with open(self.file.name, 'rb', buffering=0) as f:
+            reporter.start_file(f)
+            f.read(100)
+            self.assertIn(' 100 B (', reporter.status())
+            reporter.finish_file(self.file.name)
+        self.assertIn(' 2.0 KiB (', reporter.status())
+
+    def test_has_no_total_for_standard_input(self):
+        self.assertEqual(self.app._known_input_names([]), None)
+        self.assertEqual(
+            self.app._known_input_names([self.file.name, '-']), None)
+        self.assertEqual(
+            self.app._known_input_names([self.file.name]), [self.file.name])
+
+    def test_writes_final_report_to_terminal(self):
+        terminal = FakeTerminal()
+        self.app.settings['progress'] = True
+        self.app.process_inputs([self.file.name])
+        reporter = cliapp.progress.ProgressReporter(
+            self.app, [self.file.name], stream=terminal)
+        reporter.start()
+        reporter.finish_file(self.file.name)
+        reporter.stop()
+        self.assertTrue(terminal.getvalue().endswith('\n'))
+        self.assertIn('1 files, 1000 lines', terminal.getvalue())
+        self.assertIn('2.0 KiB of 2.0 KiB', terminal.getvalue())
+        self.assertIn('ETA 0:00:00', terminal.getvalue())
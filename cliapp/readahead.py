@@ -0,0 +1,123 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Tell the kernel how input files are going to be read.
+
+On systems with ``posix_fadvise``, the kernel is told to read the next
+input file into the page cache in the background, that the current
+file is read sequentially, and that parts of it that have been read
+are not needed any more. Elsewhere, a thread reads the start of the
+next file instead, and the other advice is skipped.
+
+'''
+
+
+import io
+import os
+import threading
+
+
+# How much of the next file the fallback thread reads.
+prefetch_size = 64 * 1024**2
+
+# How often CacheDroppingFileIO drops the parts already read.
+drop_interval = 8 * 1024**2
+
+
+def advise(fd, offset, length, advice):
+    '''Give the kernel advice about a range of an open file.
+
+    ``advice`` is the name of the advice without the ``POSIX_FADV_``
+    prefix, such as ``'SEQUENTIAL'``. A ``length`` of zero means to
+    the end of the file. Return True if the advice was given, False if
+    it is not supported.
+
+    '''
+
+    if not hasattr(os, 'posix_fadvise'):  # pragma: no cover
+        return False
+    try:
+        os.posix_fadvise(fd, offset, length,
+                         getattr(os, 'POSIX_FADV_' + advice))
+    except OSError:  # pragma: no cover
+        return False
+    return True
+
+
+def prefetch(name):
+    '''Start reading a file into the page cache in the background.'''
+
+    try:
+        fd = os.open(name, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        if advise(fd, 0, 0, 'WILLNEED'):
+            return
+    finally:
+        os.close(fd)
+    thread = threading.Thread(target=_read_ahead, args=(name,))
+    thread.daemon = True
+    thread.start()
+
+
+def _read_ahead(name):  # pragma: no cover
+    try:
+        with io.open(name, 'rb', buffering=0) as f:
+            remaining = prefetch_size
+            while remaining > 0:
+                data = f.read(min(remaining, 1024**2))
+                if not data:
+                    break
+                remaining -= len(data)
+    except (IOError, OSError):
+        pass
+
+
+class CacheDroppingFileIO(io.FileIO):
+
+    '''A raw file that drops parts already read from the page cache.
+
+    This keeps a sequential scan of a large file from pushing
+    everything else out of the page cache.
+
+    '''
+
+    def __init__(self, name, mode='r', *args, **kwargs):
+        io.FileIO.__init__(self, name, mode, *args, **kwargs)
+        self._dropped = 0
+        self._position = 0
+
+    def readinto(self, b):
+        n = io.FileIO.readinto(self, b)
+        if n:
+            self._position += n
+            if self._position - self._dropped >= drop_interval:
+                advise(self.fileno(), self._dropped,
+                       self._position - self._dropped, 'DONTNEED')
+                self._dropped = self._position
+        return n
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        self._position = io.FileIO.seek(self, offset, whence)
+        self._dropped = min(self._dropped, self._position)
+        return self._position
+
+    def close(self):
+        if not self.closed:
+            advise(self.fileno(), 0, 0, 'DONTNEED')
+        io.FileIO.close(self)
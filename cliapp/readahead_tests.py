@@ -0,0 +1,78 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import io
+import os
+import tempfile
+import unittest
+
+import cliapp
+import cliapp.readahead
+
+
+class ReadaheadTests(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.filename = tempfile.mkstemp()
+        self.data = b'x' * (3 * 1024**2 + 17)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(self.data)
+        self.advice = []
+        self.real_advise = cliapp.readahead.advise
+        self.real_drop_interval = cliapp.readahead.drop_interval
+
+        def advise(fd, offset, length, advice):
+            self.advice.append((offset, length, advice))
+            return self.real_advise(fd, offset, length, advice)
+
+        cliapp.readahead.advise = advise
+        cliapp.readahead.drop_interval = 1024**2
+
+    def tearDown(self):
+        cliapp.readahead.advise = self.real_advise
+        cliapp.readahead.drop_interval = self.real_drop_interval
+        os.remove(self.filename)
+
+    def test_prefetch_ignores_missing_file(self):
+        cliapp.readahead.prefetch('/does/not/exist')
+        self.assertEqual(self.advice, [])
+
+    def test_prefetch_advises_willneed(self):
+        cliapp.readahead.prefetch(self.filename)
+        self.assertEqual(self.advice, [(0, 0, 'WILLNEED')])
+
+    def test_drops_data_already_read_from_cache(self):
+        raw = cliapp.readahead.CacheDroppingFileIO(self.filename)
+        with io.BufferedReader(raw, 256 * 1024) as f:
+            data = b''.join(iter(lambda: f.read(100 * 1024), b''))
+        self.assertEqual(data, self.data)
+        self.assertTrue((0, 1024**2, 'DONTNEED') in self.advice)
+        self.assertEqual(self.advice[-1], (0, 0, 'DONTNEED'))
+
+    def test_open_input_advises_sequential_reading(self):
+        app = cliapp.Application()
+        app.settings['input-readahead'] = True
+        with app.open_input(self.filename, 'rb') as f:
+            self.assertEqual(f.read(), self.data)
+        self.assertEqual(self.advice, [(0, 0, 'SEQUENTIAL')])
+
+    def test_process_inputs_prefetches_next_file(self):
+        app = cliapp.Application()
+        app.settings['input-readahead'] = True
+        app.process_input = lambda name: None
+        app.process_inputs([self.filename, '-', self.filename])
+        self.assertEqual(self.advice, [(0, 0, 'WILLNEED')])
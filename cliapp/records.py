@@ -0,0 +1,192 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Read input files as records other than lines of text.
+
+Each reader parses a file in batches, using code that handles many
+records per call, such as ``bytes.split`` or ``json.loads`` on a
+whole batch, instead of Python code for every record.
+
+'''
+
+
+import csv
+import io
+import itertools
+import json
+import os
+
+import cliapp
+
+
+class RecordReader(object):
+
+    '''Base class for record readers.
+
+    A subclass sets ``binary`` to say whether it wants the file opened
+    in binary mode, and implements ``batches``.
+
+    '''
+
+    binary = False
+
+    def __init__(self, batch_size, block_size, encoding=None):
+        self.batch_size = batch_size
+        self.block_size = block_size
+        self.encoding = encoding
+
+    def batches(self, f):
+        '''Yield lists of records in an open file.'''
+        raise NotImplementedError()
+
+
+class NulRecordReader(RecordReader):
+
+    '''Records terminated by NUL bytes, as from ``find -print0``.
+
+    Records are bytes objects, or strings decoded with ``encoding``
+    if it is set. The terminating NUL is not included.
+
+    '''
+
+    binary = True
+
+    def batches(self, f):
+        partial = b''
+        while True:
+            data = f.read(self.block_size)
+            if not data:
+                break
+            records = (partial + data).split(b'\0')
+            partial = records.pop()
+            if records:
+                yield self._decode(records)
+        if partial:
+            yield self._decode([partial])
+
+    def _decode(self, records):
+        if self.encoding is None:
+            return records
+        return [record.decode(self.encoding) for record in records]
+
+
+class JsonLinesRecordReader(RecordReader):
+
+    '''One JSON value per line, as in JSON Lines. Empty lines are skipped.
+
+    A batch of lines is parsed with a single call to ``json.loads``.
+
+    '''
+
+    def batches(self, f):
+        lineno = 0
+        while True:
+            lines = list(itertools.islice(f, self.batch_size))
+            if not lines:
+                break
+            values = [line for line in lines if line.strip()]
+            if values:
+                try:
+                    records = json.loads('[%s]' % ','.join(values))
+                except ValueError:
+                    records = None
+                if records is None or len(records) != len(values):
+                    self._raise_error(f, lines, lineno)
+                yield records
+            lineno += len(lines)
+
+    def _raise_error(self, f, lines, lineno):
+        for i, line in enumerate(lines):
+            if line.strip():
+                try:
+                    json.loads(line)
+                except ValueError as e:
+                    raise cliapp.AppException(
+                        '%s:%d: %s' % (getattr(f, 'name', '-'),
+                                       lineno + i + 1, e))
+        # The lines are valid on their own, but one of them was not a
+        # complete value, such as "1, 2".
+        raise cliapp.AppException(
+            '%s:%d: more than one JSON value on a line' %
+            (getattr(f, 'name', '-'), lineno + 1))
+
+
+class CsvRecordReader(RecordReader):
+
+    '''Comma separated values, parsed by the csv module.
+
+    Each record is a list of strings. The file is opened in binary
+    mode and decoded here without translating newlines, as the csv
+    module requires, so that a quoted field keeps its line endings.
+
+    '''
+
+    binary = True
+
+    def batches(self, f):
+        if isinstance(f, io.TextIOBase):
+            text = f
+        else:
+            text = io.TextIOWrapper(
+                f, encoding=self.encoding, newline='')
+        try:
+            reader = csv.reader(text)
+            while True:
+                records = list(itertools.islice(reader, self.batch_size))
+                if not records:
+                    break
+                yield records
+        finally:
+            # The caller closes f, or keeps it open if it is the
+            # standard input, so the wrapper must not close it.
+            if text is not f and not f.closed:
+                text.detach()
+
+
+def iter_names(f, block_size):
+    '''Yield file names from a binary file listing them.
+
+    The names may be terminated by NUL bytes, as from ``find -print0``,
+    or by newlines. If the first block of ``block_size`` bytes contains
+    a NUL, NUL is assumed; otherwise, newlines. Empty names are
+    skipped. Names are decoded like ``os.fsdecode`` does, so any name
+    can be represented.
+
+    The file is read a block at a time, so memory use does not depend
+    on how many names there are.
+
+    '''
+
+    data = f.read(block_size)
+    separator = b'\0' if b'\0' in data else b'\n'
+    partial = b''
+    while data:
+        names = (partial + data).split(separator)
+        partial = names.pop()
+        for name in names:
+            if name:
+                yield os.fsdecode(name)
+        data = f.read(block_size)
+    if partial:
+        yield os.fsdecode(partial)
+
+
+readers = {
+    'nul': NulRecordReader,
+    'jsonl': JsonLinesRecordReader,
+    'csv': CsvRecordReader,
+}
@@ -0,0 +1,152 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import io
+import os
+import tempfile
+import unittest
+
+import cliapp
+import cliapp.records
+
+
+def read_all(reader, f):
+    return [record for batch in reader.batches(f) for record in batch]
+
+
+class NulRecordReaderTests(unittest.TestCase):
+
+    def test_splits_on_nul_across_blocks(self):
+        reader = cliapp.records.NulRecordReader(10, 4)
+        f = io.BytesIO(b'foo\0barbaz\0\0last')
+        self.assertEqual(read_all(reader, f),
+                         [b'foo', b'barbaz', b'', b'last'])
+
+    def test_decodes_records_if_encoding_is_set(self):
+        reader = cliapp.records.NulRecordReader(10, 4, encoding='utf-8')
+        f = io.BytesIO(b'foo\0bar\0')
+        self.assertEqual(read_all(reader, f), ['foo', 'bar'])
+
+
+class JsonLinesRecordReaderTests(unittest.TestCase):
+
+    def test_parses_values_in_batches(self):
+        reader = cliapp.records.JsonLinesRecordReader(2, 4096)
+        f = io.StringIO('{"a": 1}\n\n[2, 3]\n"x"\n')
+        batches = list(reader.batches(f))
+        self.assertEqual(batches, [[{'a': 1}], [[2, 3], 'x']])
+
+    def test_reports_line_of_invalid_value(self):
+        reader = cliapp.records.JsonLinesRecordReader(10, 4096)
+        f = io.StringIO('1\n2\n{"a":\n')
+        with self.assertRaises(cliapp.AppException) as cm:
+            read_all(reader, f)
+        self.assertTrue(':3:' in str(cm.exception))
+
+    def test_rejects_several_values_on_one_line(self):
+        reader = cliapp.records.JsonLinesRecordReader(10, 4096)
+        f = io.StringIO('1, 2\n')
+        self.assertRaises(cliapp.AppException, read_all, reader, f)
+
+
+class CsvRecordReaderTests(unittest.TestCase):
+
+    def test_parses_rows(self):
+        reader = cliapp.records.CsvRecordReader(10, 4096)
+        f = io.StringIO('a,b\n"c,d",e\n')
+        self.assertEqual(read_all(reader, f), [['a', 'b'], ['c,d', 'e']])
+
+    def test_keeps_line_endings_in_quoted_fields(self):
+        reader = cliapp.records.CsvRecordReader(10, 4096, encoding='utf-8')
+        f = io.BytesIO(b'"x\r\ny",z\r\n')
+        self.assertEqual(read_all(reader, f), [['x\r\ny', 'z']])
+        self.assertFalse(f.closed)
+
+
+class IterNamesTests(unittest.TestCase):
+
+    def test_reads_newline_terminated_names(self):
+        f = io.BytesIO(b'foo\nbar baz\n\nlast')
+        self.assertEqual(list(cliapp.records.iter_names(f, 3)),
+                         ['foo', 'bar baz', 'last'])
+
+    def test_reads_nul_terminated_names(self):
+        f = io.BytesIO(b'foo\nbar\0baz\0')
+        self.assertEqual(list(cliapp.records.iter_names(f, 8)),
+                         ['foo\nbar', 'baz'])
+
+    def test_reads_undecodable_names(self):
+        f = io.BytesIO(b'\xff\n')
+        names = list(cliapp.records.iter_names(f, 8))
+        self.assertEqual([os.fsencode(name) for name in names], [b'\xff'])
+
+
+class FilesFromTests(unittest.TestCase):
+
+    def test_processes_arguments_and_listed_files(self):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'bar\0baz\0')
+            f.flush()
+            app = cliapp.Application()
+            app.settings['files-from'] = f.name
+            processed = []
+            app.process_input = processed.append
+            app.process_inputs(['foo'])
+        self.assertEqual(processed, ['foo', 'bar', 'baz'])
+
+    def test_does_not_read_stdin_if_only_listed_files(self):
+        with tempfile.NamedTemporaryFile() as f:
+            app = cliapp.Application()
+            app.settings['files-from'] = f.name
+            processed = []
+            app.process_input = processed.append
+            app.process_inputs([])
+        self.assertEqual(processed, [])
+
+
+class ProcessInputRecordTests(unittest.TestCase):
+
+    def test_gives_records_to_process_input_record(self):
+        records = []
+
+        class App(cliapp.Application):
+
+            def add_settings(self):
+                self.settings['input-format'] = 'jsonl'
+
+            def open_input(self, name, mode='r'):
+                return io.StringIO('{"n": 1}\n{"n": 2}\n')
+
+            def process_input_record(self, name, record):
+                records.append((self.lineno, record))
+
+        App().run(args=['foo'])
+        self.assertEqual(records, [(1, {'n': 1}), (2, {'n': 2})])
+
+    def test_reads_csv_files_without_translating_newlines(self):
+        records = []
+
+        class App(cliapp.Application):
+
+            def process_input_record(self, name, record):
+                records.append(record)
+
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(b'"x\r\ny",z\n')
+            f.flush()
+            App().run(args=['--input-format=csv', f.name])
+        self.assertEqual(records, [['x\r\ny', 'z']])
@@ -27,6 +27,21 @@ import time
 import cliapp
 
 
+# The external processes started by runcmd that may still be running.
+_children = set()
+
+
+def running_child_pids():
+    '''Return the process ids of running external commands.
+
+    These are the commands started by runcmd or runcmd_unchecked that
+    have not finished yet.
+
+    '''
+
+    return sorted(p.pid for p in list(_children) if p.returncode is None)
+
+
 def runcmd(argv, *args, **kwargs):
     '''Run external command or pipeline.
 
@@ -98,6 +113,7 @@ def runcmd_unchecked(argv, *argvs, **kwargs):
     output_timeout = pop_kwarg('output_timeout', None)
     timeout_callback = pop_kwarg('timeout_callback', None)
 
+    pipeline = []
     try:
         pipeline = _build_pipeline(argvs,
                                    pipe_stdin,
@@ -114,6 +130,8 @@ def runcmd_unchecked(argv, *argvs, **kwargs):
             raise e
         else:
             raise
+    finally:
+        _children.difference_update(pipeline)
 
 
 def _build_pipeline(argvs, pipe_stdin, pipe_stdout, pipe_stderr, kwargs):
@@ -139,8 +157,14 @@ def _build_pipeline(argvs, pipe_stdin, pipe_stdout, pipe_stderr, kwargs):
         else:
             stdin = procs[-1].stdout
             stdout = subprocess.PIPE
-        p = subprocess.Popen(argv, stdin=stdin, stdout=stdout,
-                             stderr=stderr, close_fds=True, **kwargs)
+        try:
+            p = subprocess.Popen(argv, stdin=stdin, stdout=stdout,
+                                 stderr=stderr, close_fds=True, **kwargs)
+        except BaseException:
+            # The caller only gets the pipeline if all of it starts.
+            _children.difference_update(procs)
+            raise
+        _children.add(p)
 
         if i != 0:
             # Popen leaves this fd open in the parent,
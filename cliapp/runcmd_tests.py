@@ -47,6 +47,24 @@ class RuncmdTests(unittest.TestCase):
         self.assertEqual(out, b'')
         self.assertNotEqual(err, b'')
 
+    def test_lists_running_commands(self):
+        seen = []
+
+        def callback(data):
+            seen.extend(cliapp.running_child_pids())
+            return data
+
+        cliapp.runcmd(['sh', '-c', 'echo foo; sleep 0.2'], ['cat'],
+                      stdout_callback=callback)
+        self.assertEqual(len(seen), 2)
+        self.assertEqual(cliapp.running_child_pids(), [])
+
+    def test_forgets_commands_if_pipeline_fails_to_start(self):
+        self.assertRaises(
+            OSError, cliapp.runcmd_unchecked,
+            ['sleep', '0.1'], ['/nonexistent/cmd'])
+        self.assertEqual(cliapp.running_child_pids(), [])
+
     def test_runcmd_pipes_stdin_through_command(self):
         self.assertEqual(cliapp.runcmd(['cat'], feed_stdin=b'hello, world'),
                          b'hello, world')
@@ -46,11 +46,28 @@ if sys.version_info > (3, ):      # pragma: no cover
 log_group_name = 'Logging'
 config_group_name = 'Configuration files and settings'
 perf_group_name = 'Peformance'
+input_group_name = 'Input files'
 
 default_group_names = [
     log_group_name,
     config_group_name,
     perf_group_name,
+    input_group_name,
+]
+
+# Settings every application has always had. An application can't
+# define settings of these names itself. The other built-in settings
+# are replaced by an application setting of the same name: see
+# Settings.builtin.
+fixed_setting_names = [
+    'output',
+    'log',
+    'log-level',
+    'log-max',
+    'log-keep',
+    'log-mode',
+    'dump-memory-profile',
+    'memory-dump-interval',
 ]
 
 
@@ -306,6 +323,12 @@ class Settings(object):
 
         settings['verbose']
 
+    Built-in settings other than the ones in ``fixed_setting_names``
+    are replaced if the application adds a setting with the same name.
+    cliapp then uses the default value of its own setting, which turns
+    off the feature it controls. Use ``builtin`` to get the value of a
+    built-in setting.
+
     The list of configuration files for the appliation is stored
     in ``config_files``. Add or remove from the list if you wish.
     The files need to exist: those that don't are silently ignored.
@@ -317,6 +340,8 @@ class Settings(object):
         self._settingses = dict()
         self._all_config_data = {}
         self._canonical_names = list()
+        self._builtin_names = set()
+        self._replaced = {}
 
         self.version = version
         self.progname = progname
@@ -325,16 +350,34 @@ class Settings(object):
         self.epilog = epilog
 
         self._add_default_settings()
+        self._mark_builtin(set(self._settingses) - set(fixed_setting_names))
 
         self._config_files = None
         self._required_config_files = []
         self._cp = ConfigParser()
 
+    def __getstate__(self):
+        # The usage, description, and epilog may be methods of the
+        # application, which can't be pickled, and they are only needed
+        # for --help, so a copy of the settings does without them.
+        state = self.__dict__.copy()
+        state['usage'] = None
+        state['description'] = None
+        state['epilog'] = None
+        return state
+
     def _add_default_settings(self):
         self.string(['output'],
                     'write output to FILE, instead of standard output',
                     metavar='FILE')
 
+        self.choice(['output-compression'],
+                    ['auto', 'none', 'gzip', 'bzip2', 'xz', 'zstd'],
+                    'compress output with METHOD, one of none, gzip, bzip2, '
+                    'xz, or zstd, or if auto, choose from the suffix of the '
+                    '--output file name (default: %default)',
+                    metavar='METHOD')
+
         self.string(['log'],
                     'write log entries to FILE (default is to not write log '
                     'files at all); use "syslog" to log to system log, '
@@ -356,6 +399,11 @@ class Settings(object):
                     'set permissions of new log files to MODE (octal; '
                     'default %default)',
                     metavar='MODE', default='0600', group=log_group_name)
+        self.boolean(['log-status-on-signal'],
+                     'log the status of the program (current input file, '
+                     'counters, memory use, external commands, and stack '
+                     'traces of all threads) when it gets the USR1 signal',
+                     group=log_group_name)
 
         self.choice(['dump-memory-profile'],
                     ['simple', 'none'],
@@ -370,9 +418,171 @@ class Settings(object):
                      default=300,
                      group=perf_group_name)
 
+        self.choice(['input-format'],
+                    ['lines', 'nul', 'jsonl', 'csv'],
+                    'read input files as FORMAT records: lines of text, '
+                    'NUL terminated records, JSON Lines, or comma separated '
+                    'values (default: %default)',
+                    metavar='FORMAT',
+                    group=input_group_name)
+        self.string(['files-from'],
+                    'also process the input files named in FILE, one per '
+                    'line or terminated by NUL bytes; "-" means the '
+                    'standard input',
+                    metavar='FILE',
+                    group=input_group_name)
+        self.boolean(['input-recursive'],
+                     'process all files in directories named as inputs, '
+                     'and their subdirectories',
+                     group=input_group_name)
+        self.string_list(['input-include'],
+                         'with --input-recursive, process only files whose '
+                         'names match the glob PATTERN',
+                         metavar='PATTERN',
+                         group=input_group_name)
+        self.string_list(['input-exclude'],
+                         'with --input-recursive, skip files and directories '
+                         'whose names match the glob PATTERN',
+                         metavar='PATTERN',
+                         group=input_group_name)
+        self.string(['checkpoint'],
+                    'save the progress of processing input files to FILE '
+                    'every now and then, so that a later run can continue '
+                    'with --resume',
+                    metavar='FILE',
+                    group=input_group_name)
+        self.integer(['checkpoint-interval'],
+                     'save a checkpoint every SECONDS (default: %default)',
+                     metavar='SECONDS',
+                     default=60,
+                     group=input_group_name)
+        self.boolean(['resume'],
+                     'continue from the checkpoint saved in the --checkpoint '
+                     'file, if there is one',
+                     group=input_group_name)
+        self.string(['incremental'],
+                    'skip input files that have not changed since they '
+                    'were processed with the same index FILE, and reuse '
+                    'their results',
+                    metavar='FILE',
+                    group=input_group_name)
+        self.string(['shard'],
+                    'process only part I of N of the input files, chosen '
+                    'by a hash of their names, so that N runs with '
+                    'different I process each file once; a single input '
+                    'file is split into N parts instead, and the lines '
+                    'before part I are counted first, unless '
+                    '--input-split-lineno=offset',
+                    metavar='I/N',
+                    group=input_group_name)
+        self.boolean(['follow'],
+                     'after processing the input files, keep processing '
+                     'lines as they are added to them, like "tail -F"; '
+                     'a file that is rotated is re-opened',
+                     group=input_group_name)
+        self.string(['prefilter'],
+                    'give only lines that REGEX matches to '
+                    'process_input_line, searching large blocks of input '
+                    'at once instead of each line separately',
+                    metavar='REGEX',
+                    group=input_group_name)
+        self.boolean(['progress'],
+                     'report the progress of processing input files on '
+                     'the terminal, or in the log if the standard error '
+                     'is not a terminal',
+                     group=input_group_name)
+
+        self.integer(['jobs'],
+                     'process input files in N parallel worker processes; '
+                     'zero means one per CPU (default: %default)',
+                     metavar='N',
+                     default=1,
+                     group=perf_group_name)
+        self.boolean(['jobs-as-completed'],
+                     'with --jobs, write the output of each input file as '
+                     'soon as it has been processed, instead of in the '
+                     'order the files were given',
+                     group=perf_group_name)
+        self.bytesize(['input-split-size'],
+                      'with --jobs, split input files larger than SIZE into '
+                      'parts of about SIZE bytes, and process the parts in '
+                      'parallel; zero means never (default: %default)',
+                      default=0,
+                      group=perf_group_name)
+        self.choice(['input-split-lineno'],
+                    ['count', 'offset'],
+                    'line numbers to use in parts of split input files: '
+                    '"count" counts lines first to give exact line numbers, '
+                    '"offset" gives the byte offset of each line in the '
+                    'file instead (default: %default)',
+                    metavar='METHOD',
+                    group=perf_group_name)
+        self.boolean(['input-decompress'],
+                     'decompress input files compressed with gzip, bzip2, '
+                     'xz, or zstd, in a background thread',
+                     group=perf_group_name)
+        self.boolean(['input-readahead'],
+                     'read the next input file into the page cache while '
+                     'processing the current one, and tell the kernel '
+                     'input files are read sequentially',
+                     group=perf_group_name)
+        self.boolean(['input-drop-cache'],
+                     'drop the parts of input files that have been read '
+                     'from the page cache, so that large inputs do not push '
+                     'out other cached data',
+                     group=perf_group_name)
+        self.bytesize(['input-buffer-size'],
+                      'read input files using a buffer of SIZE bytes, '
+                      'and the standard input too, if it is given; zero '
+                      'means 1 MiB for files, and the standard input is '
+                      'read as it is (default: %default)',
+                      group=perf_group_name)
+        self.bytesize(['input-chunk-size'],
+                      'give input to process_input_chunk in chunks of about '
+                      'SIZE bytes (default: %default)',
+                      default=4 * 1024**2,
+                      group=perf_group_name)
+        self.bytesize(['output-buffer-size'],
+                      'write output using a buffer of SIZE bytes; zero '
+                      'means the standard output is written to as it is, '
+                      'and output files get a buffer of 1 MiB '
+                      '(default: %default)',
+                      group=perf_group_name)
+        self.integer(['partition-max-open'],
+                     'keep at most N files of partitioned output open at '
+                     'once (default: %default)',
+                     metavar='N',
+                     default=128,
+                     group=perf_group_name)
+        self.bytesize(['partition-buffer-size'],
+                      'write each file of partitioned output using a buffer '
+                      'of SIZE bytes (default: %default)',
+                      default=256 * 1024,
+                      group=perf_group_name)
+        self.bytesize(['memory-budget'],
+                      'keep at most about SIZE bytes of records in memory '
+                      'when sorting them, and write the rest to temporary '
+                      'files (default: %default)',
+                      default=256 * 1024**2,
+                      group=perf_group_name)
+        self.integer(['input-batch-size'],
+                     'give input to process_input_lines in batches of N '
+                     'lines (default: %default)',
+                     metavar='N',
+                     default=4096,
+                     group=perf_group_name)
+
+    def _mark_builtin(self, names):
+        # Mark settings as built-in ones, which an application setting
+        # of the same name replaces.
+        self._builtin_names.update(names)
+
     def _add_setting(self, setting):
         '''Add a setting to self._cp.'''
 
+        for name in setting.names:
+            if name in self._builtin_names:
+                self._replace_builtin(name)
         self._canonical_names.append(setting.names[0])
         for name in setting.names:
             self._settingses[name] = setting
@@ -422,6 +632,27 @@ class Settings(object):
         '''Add an integer setting.'''
         self._add_setting(IntegerSetting(names, default, help_text, **kwargs))
 
+    def _replace_builtin(self, name):
+        old = self._settingses[name]
+        self._canonical_names.remove(old.names[0])
+        for old_name in old.names:
+            del self._settingses[old_name]
+            self._builtin_names.discard(old_name)
+            self._replaced[old_name] = old
+
+    def builtin(self, name):
+        '''Return the value of a setting cliapp itself defines.
+
+        If the application has added a setting of the same name, that
+        replaces the built-in one, and the default value of the
+        built-in setting is returned.
+
+        '''
+
+        if name in self._replaced:
+            return self._replaced[name].value
+        return self[name]
+
     def __getitem__(self, name):
         return self._settingses[name].value
 
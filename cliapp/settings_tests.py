@@ -60,6 +60,15 @@ class SettingsTests(unittest.TestCase):
         self.assertEqual(sorted(x for x in self.settings.keys() if x in known),
                          sorted(known))
 
+    def test_application_setting_replaces_builtin_one(self):
+        self.settings.bytesize(['checkpoint', 'c'], 'checkpoint help')
+        self.settings.parse_args(['--checkpoint=1k', '--jobs=2'])
+        self.assertEqual(self.settings['checkpoint'], 1000)
+        self.assertEqual(self.settings['c'], 1000)
+        self.assertEqual(self.settings.builtin('checkpoint'), '')
+        self.assertEqual(self.settings.keys().count('checkpoint'), 1)
+        self.assertEqual(self.settings.builtin('jobs'), 2)
+
     def test_parses_options(self):
         self.settings.string(['foo'], 'foo help', group='foo')
         self.settings.boolean(['bar'], 'bar help')
@@ -0,0 +1,150 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+'''Find input files in directory trees.
+
+Directories are scanned with ``os.scandir`` by a small pool of
+threads, so that the stat calls for different directories overlap.
+Files are handed to the caller as soon as their directory has been
+scanned, instead of after the whole tree.
+
+'''
+
+
+import concurrent.futures
+import fnmatch
+import os
+import queue
+import threading
+
+
+# Number of threads scanning directories.
+threads = 8
+
+# Number of scanned directories that may wait for the caller.
+queue_size = 64
+
+
+def expand(names, include=(), exclude=()):
+    '''Yield names, with directories replaced by the files in them.
+
+    Directories are searched recursively. Files found in them are
+    included only if their basename matches one of the ``include``
+    glob patterns (if there are any), and does not match any of the
+    ``exclude`` patterns. Directories matching an ``exclude`` pattern
+    are not searched. Names that are not directories are yielded
+    as they are.
+
+    Files in one directory are yielded in sorted order, but
+    directories may be searched in any order.
+
+    '''
+
+    for name in names:
+        if name != '-' and os.path.isdir(name):
+            for filename in walk(name, include, exclude):
+                yield filename
+        else:
+            yield name
+
+
+def walk(top, include=(), exclude=()):
+    '''Yield names of files in a directory tree.
+
+    See ``expand`` for the meaning of the arguments.
+
+    '''
+
+    walker = _Walker(include, exclude)
+    return walker.walk(top)
+
+
+class _Walker(object):
+
+    def __init__(self, include, exclude):
+        self._include = list(include)
+        self._exclude = list(exclude)
+        self._results = queue.Queue(queue_size)
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._executor = None
+
+    def walk(self, top):
+        self._executor = concurrent.futures.ThreadPoolExecutor(threads)
+        self._submit(top)
+        try:
+            while True:
+                item = self._results.get()
+                if item is None:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                for filename in item:
+                    yield filename
+        finally:
+            self._stopped.set()
+            self._executor.shutdown(wait=False)
+
+    def _submit(self, dirname):
+        with self._lock:
+            self._pending += 1
+        self._executor.submit(self._scan, dirname)
+
+    def _scan(self, dirname):
+        try:
+            files = []
+            subdirs = []
+            with os.scandir(dirname) as entries:
+                for entry in entries:
+                    if self._excluded(entry.name):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.is_file() and self._included(entry.name):
+                        files.append(entry.path)
+            if not self._stopped.is_set():
+                for subdir in sorted(subdirs):
+                    self._submit(subdir)
+            if files:
+                self._put(sorted(files))
+        except BaseException as e:
+            self._put(e)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                done = self._pending == 0
+            if done:
+                self._put(None)
+
+    def _excluded(self, basename):
+        return any(fnmatch.fnmatch(basename, pattern)
+                   for pattern in self._exclude)
+
+    def _included(self, basename):
+        if not self._include:
+            return True
+        return any(fnmatch.fnmatch(basename, pattern)
+                   for pattern in self._include)
+
+    def _put(self, item):
+        while not self._stopped.is_set():
+            try:
+                self._results.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                pass
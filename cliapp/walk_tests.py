@@ -0,0 +1,79 @@
+# Copyright (C) 2026  Lars Wirzenius
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 2 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with this program; if not, write to the Free Software Foundation, Inc.,
+# 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301 USA.
+
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import cliapp
+import cliapp.walk
+
+
+class WalkTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        for dirname in ['a', 'a/b', 'a/b/c', 'skip', 'd']:
+            os.mkdir(self.path(dirname))
+        for filename in ['x.log', 'a/y.log', 'a/b/z.txt', 'a/b/c/w.log',
+                         'skip/v.log', 'd/u.log']:
+            with open(self.path(filename), 'w') as f:
+                f.write('%s\n' % filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def path(self, relative):
+        return os.path.join(self.tempdir, relative)
+
+    def relative(self, filenames):
+        return sorted(os.path.relpath(x, self.tempdir) for x in filenames)
+
+    def test_finds_all_files(self):
+        self.assertEqual(
+            self.relative(cliapp.walk.walk(self.tempdir)),
+            ['a/b/c/w.log', 'a/b/z.txt', 'a/y.log', 'd/u.log', 'skip/v.log',
+             'x.log'])
+
+    def test_includes_and_excludes_by_basename(self):
+        found = cliapp.walk.walk(
+            self.tempdir, include=['*.log'], exclude=['skip', 'u.*'])
+        self.assertEqual(self.relative(found),
+                         ['a/b/c/w.log', 'a/y.log', 'x.log'])
+
+    def test_expand_keeps_non_directories_in_place(self):
+        names = list(cliapp.walk.expand(
+            ['-', self.path('a/b'), 'does-not-exist']))
+        self.assertEqual(names[0], '-')
+        self.assertEqual(self.relative(names[1:3]),
+                         ['a/b/c/w.log', 'a/b/z.txt'])
+        self.assertEqual(names[3:], ['does-not-exist'])
+
+    def test_stops_when_caller_stops(self):
+        walker = cliapp.walk.walk(self.tempdir)
+        next(walker)
+        walker.close()
+
+    def test_application_processes_directories_recursively(self):
+        app = cliapp.Application()
+        app.settings['input-recursive'] = True
+        app.settings['input-include'] = ['*.txt']
+        processed = []
+        app.process_input = processed.append
+        app.process_inputs([self.tempdir])
+        self.assertEqual(self.relative(processed), ['a/b/z.txt'])
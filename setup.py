@@ -19,15 +19,13 @@ from distutils.core import setup
 import glob
 import sys
 
+if sys.version_info < (3, 9):
+    sys.exit('cliapp needs Python 3.9 or later')
+
 import cliapp
 
 
-# Only install manpages in the 3.x version so that the Debian
-# packaging doesn't end up having it in two packages.
-if sys.version_info > (3,):
-    manpages = [('share/man/man5', glob.glob('*.5'))]
-else:
-    manpages = None
+manpages = [('share/man/man5', glob.glob('*.5'))]
 
 
 setup(
@@ -49,7 +47,8 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: GNU General Public License (GPL)',
         'Operating System :: Unix',
-        'Programming Language :: Python :: 2',
+        'Programming Language :: Python :: 3',
+        'Programming Language :: Python :: 3 :: Only',
         'Topic :: Software Development :: Libraries :: Application Frameworks',
         'Topic :: Software Development :: User Interfaces',
         'Topic :: Text Processing :: Filters',